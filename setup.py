@@ -509,6 +509,10 @@ def build():
     ret.append( (f'{g_root}/src/_table_spans.py', to_dir) )
     ret.append( (f'{g_root}/src/_table_union.py', to_dir) )
     ret.append( (f'{g_root}/src/_table_headers.py', to_dir) )
+    ret.append( (f'{g_root}/src/_table_analysis.py', to_dir) )
+    ret.append( (f'{g_root}/src/_table_cache.py', to_dir) )
+    ret.append( (f'{g_root}/src/_displaylist_cache.py', to_dir) )
+    ret.append( (f'{g_root}/src/_merge.py', to_dir) )
     ret.append( (f'{g_root}/src/utils.py', to_dir) )
     ret.append( (f'{g_root}/src/_wxcolors.py', to_dir) )
     ret.append( (f'{g_root}/src/_apply_pages.py', to_dir) )
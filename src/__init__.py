@@ -13,11 +13,15 @@ from __future__ import annotations
 import atexit
 import binascii
 import collections
+import contextlib
+import functools
 import glob
 import importlib.util
 import inspect
 import io
 import math
+import mmap as mmap_module
+import operator
 import os
 import pathlib
 import re
@@ -2897,7 +2901,7 @@ class Document:
             raise IndexError(f"page {i} not in document")
         return self.load_page(i)
 
-    def __init__(self, filename=None, stream=None, filetype=None, rect=None, width=0, height=0, fontsize=11, archive=None):
+    def __init__(self, filename=None, stream=None, filetype=None, rect=None, width=0, height=0, fontsize=11, archive=None, *, mmap=False, fileobj=None):
         """Creates a document. Use 'open' as a synonym.
 
         Notes:
@@ -2908,8 +2912,11 @@ class Document:
             open(type, buffer) - type: valid extension, buffer: bytes object.
             open(stream=buffer, filetype=type) - keyword version of previous.
             open(filename, fileype=type) - filename with unrecognized extension.
+            open(fileobj=f) - seekable binary file object, read on demand.
             rect, width, height, fontsize: layout reflowable document
             on open (e.g. EPUB). Ignored if n/a.
+            mmap: memory-map the file given by filename instead of
+            reading it.
         """
         # We temporarily set JM_mupdf_show_errors=0 while we are constructing,
         # then restore its original value in a `finally:` block.
@@ -2928,6 +2935,9 @@ class Document:
             self.ShownPages  = {}
             self.InsertedImages  = {}
             self._page_refs  = weakref.WeakValueDictionary()
+            self._displaylist_cache = None
+            self._image_digests = {}
+            self._mmap = None   # memory map of the file, kept like self.stream
             if isinstance(filename, mupdf.PdfDocument):
                 pdf_document = filename
                 self.this = pdf_document
@@ -2941,6 +2951,11 @@ class Document:
                 w = r.x1 - r.x0
                 h = r.y1 - r.y0
 
+            if fileobj is not None and stream is not None:
+                raise ValueError("'stream' and 'fileobj' are mutually exclusive")
+            if mmap and (stream is not None or fileobj is not None):
+                raise ValueError("'mmap' requires a filename")
+
             self._name = filename
             self.stream = stream
             if isinstance(archive, pathlib.Path):
@@ -2982,7 +2997,31 @@ class Document:
                 except Exception as e:
                     if g_exceptions_verbose > 1:    exception_info()
                     raise FileDataError('Failed to open stream') from e
-            
+
+            elif fileobj is not None:
+                if filename is not None and filetype is None:
+                    filetype = filename
+                if not all(hasattr(fileobj, a) for a in ("seek", "readinto")):
+                    raise TypeError(f"bad fileobj: {type(fileobj)=}.")
+                # keep the file object as long as the document
+                self.stream = fileobj
+                length = fileobj.seek(0, io.SEEK_END)
+                if length == 0:
+                    raise EmptyFileError('Cannot open empty file object.')
+                if g_use_extra:
+                    # Read blocks on demand, keeping the 64 most recently used.
+                    fz_stream = extra.JM_new_fileobj_stream(fileobj, length, 64 * 1024, 64)
+                else:
+                    fileobj.seek(0)
+                    stream = fileobj.read()
+                    fz_stream = mupdf.fz_open_memory(mupdf.python_buffer_data(stream), len(stream))
+                    self.stream = stream
+                try:
+                    doc = mupdf.fz_open_document_with_stream_and_dir(filetype if filetype else '', fz_stream, archive.this)
+                except Exception as e:
+                    if g_exceptions_verbose > 1:    exception_info()
+                    raise FileDataError('Failed to open file object') from e
+
             elif filename:
                 assert not stream
                 if isinstance(filename, str):
@@ -3009,10 +3048,20 @@ class Document:
                 else:
                     suffix = pathlib.Path(filename).suffix.strip(".")
                 try:
-                    fz_stream = mupdf.fz_open_file(filename)
+                    # MuPDF memory streams are limited to 4 GB.
+                    if mmap and os.path.getsize(filename) < 1 << 32:
+                        with io.open(filename, 'rb') as f:
+                            self._mmap = mmap_module.mmap(f.fileno(), 0, access=mmap_module.ACCESS_READ)
+                        fz_stream = mupdf.fz_open_memory(mupdf.python_buffer_data(self._mmap), len(self._mmap))
+                    else:
+                        fz_stream = mupdf.fz_open_file(filename)
                     doc = mupdf.fz_open_document_with_stream_and_dir(suffix, fz_stream, archive.this)
                 except Exception as e:
                     if g_exceptions_verbose > 1:    exception_info()
+                    if self._mmap is not None:
+                        fz_stream = None
+                        self._mmap.close()
+                        self._mmap = None
                     raise FileDataError(f'Failed to open file {filename!r} as type {suffix}.') from e
 
             else:
@@ -3150,58 +3199,6 @@ class Document:
         Parameter values **must** equal those of method insert_pdf(), which must
         have been previously executed.
         """
-        #pymupdf.log( 'utils.do_links()')
-        # --------------------------------------------------------------------------
-        # internal function to create the actual "/Annots" object string
-        # --------------------------------------------------------------------------
-        def cre_annot(lnk, xref_dst, pno_src, ctm):
-            """Create annotation object string for a passed-in link."""
-
-            r = lnk["from"] * ctm  # rect in PDF coordinates
-            rect = _format_g(tuple(r))
-            if lnk["kind"] == LINK_GOTO:
-                txt = annot_skel["goto1"]  # annot_goto
-                idx = pno_src.index(lnk["page"])
-                p = lnk["to"] * ctm  # target point in PDF coordinates
-                annot = txt(xref_dst[idx], p.x, p.y, lnk["zoom"], rect)
-
-            elif lnk["kind"] == LINK_GOTOR:
-                if lnk["page"] >= 0:
-                    txt = annot_skel["gotor1"]  # annot_gotor
-                    pnt = lnk.get("to", Point(0, 0))  # destination point
-                    if type(pnt) is not Point:
-                        pnt = Point(0, 0)
-                    annot = txt(
-                        lnk["page"],
-                        pnt.x,
-                        pnt.y,
-                        lnk["zoom"],
-                        lnk["file"],
-                        lnk["file"],
-                        rect,
-                    )
-                else:
-                    txt = annot_skel["gotor2"]  # annot_gotor_n
-                    to = get_pdf_str(lnk["to"])
-                    to = to[1:-1]
-                    f = lnk["file"]
-                    annot = txt(to, f, rect)
-
-            elif lnk["kind"] == LINK_LAUNCH:
-                txt = annot_skel["launch"]  # annot_launch
-                annot = txt(lnk["file"], lnk["file"], rect)
-
-            elif lnk["kind"] == LINK_URI:
-                txt = annot_skel["uri"]  # annot_uri
-                annot = txt(lnk["uri"], rect)
-
-            else:
-                annot = ""
-
-            return annot
-
-        # --------------------------------------------------------------------------
-
         # validate & normalize parameters
         if from_page < 0:
             fp = 0
@@ -3225,51 +3222,23 @@ class Document:
         pno_src = list(range(fp, tp + incr, incr))
         pno_dst = [sa + i for i in range(len(pno_src))]
 
-        # lists of source / destination page xrefs
-        xref_src = []
-        xref_dst = []
-        for i in range(len(pno_src)):
-            p_src = pno_src[i]
-            p_dst = pno_dst[i]
-            old_xref = doc2.page_xref(p_src)
-            new_xref = doc1.page_xref(p_dst)
-            xref_src.append(old_xref)
-            xref_dst.append(new_xref)
+        # destination page xrefs by source page number
+        xref_dst = {}
+        for p_src, p_dst in zip(pno_src, pno_dst):
+            xref_dst[p_src] = doc1.page_xref(p_dst)
 
         # create the links for each copied page in destination PDF
-        for i in range(len(xref_src)):
-            page_src = doc2[pno_src[i]]  # load source page
-            links = page_src.get_links()  # get all its links
-            #log(f'{pno_src=}')
-            #log(f'{type(page_src)=}')
-            #log(f'{page_src=}')
-            #log(f'{=i len(links)}')
-            if len(links) == 0:  # no links there
-                page_src = None
-                continue
-            page_dst = doc1[pno_dst[i]]  # load destination page
-            
-            # In our call above to page_src.get_links(), we end up in
-            # fz_load_links(). This extracts the raw rects (encoded as strings
-            # such as `/Rect[10 782 40 822]`) and multiplies them by page_ctm
-            # from pdf_page_transform().
-            #
-            # We want to recreate the original raw rects, so we need to
-            # multiply by inverse of page_ctm. This fixes #4958.
-            ctm = mupdf.FzMatrix()
-            page_src_pdf_document = _as_pdf_page(page_src)
-            mupdf.pdf_page_transform(page_src_pdf_document, mupdf.FzRect(0), ctm)
-            ictm = Matrix(mupdf.fz_invert_matrix(ctm))
-
+        page_links = []  # (destination page xref, page number, link definitions)
+        for p_src, p_dst in zip(pno_src, pno_dst):
+            links, ictm = _copied_page_links(doc2, p_src)
             link_tab = []  # store all link definitions here
             for l in links:
-                if l["kind"] == LINK_GOTO and (l["page"] not in pno_src):
-                    continue  # GOTO link target not in copied pages
-                annot_text = cre_annot(l, xref_dst, pno_src, ictm)
+                annot_text = _link_annot_text(l, xref_dst, ictm)
                 if annot_text:
                     link_tab.append(annot_text)
             if link_tab != []:
-                page_dst._addAnnot_FromString( tuple(link_tab))
+                page_links.append((xref_dst[p_src], p_dst, tuple(link_tab)))
+        _add_link_annots(doc1, page_links)
         #log( 'utils.do_links() returning.')
 
     def _do_widgets(
@@ -3280,130 +3249,17 @@ class Document:
             to_page: int = -1,
             start_at: int = -1,
             join_duplicates=0,
+            deduplicate=True,
             ) -> None:
         """Insert widgets of copied page range into target PDF.
 
         Parameter values **must** equal those of method insert_pdf() which
-        must have been previously executed.
+        must have been previously executed. If deduplicate is false, duplicate
+        field names are left for a later _deduplicate_widget_names() call.
         """
         if not src.is_form_pdf:  # nothing to do: source PDF has no fields
             return
 
-        def clean_kid_parents(acro_fields):
-            """ Make sure all kids have correct "Parent" pointers."""
-            for i in range(acro_fields.pdf_array_len()):
-                parent = acro_fields.pdf_array_get(i)
-                kids = parent.pdf_dict_get(PDF_NAME("Kids"))
-                for j in range(kids.pdf_array_len()):
-                    kid = kids.pdf_array_get(j)
-                    kid.pdf_dict_put(PDF_NAME("Parent"), parent)
-
-        def join_widgets(pdf, acro_fields, xref1, xref2, name):
-            """Called for each pair of widgets having the same name.
-
-            Args:
-                pdf: target MuPDF document
-                acro_fields: object Root/AcroForm/Fields
-                xref1, xref2: widget xrefs having same names
-                name: (str) the name
-
-            Result:
-                Defined or updated widget parent that points to both widgets.
-            """
-
-            def re_target(pdf, acro_fields, xref1, kids1, xref2, kids2):
-                """Merge widget in xref2 into "Kids" list of widget xref1.
-
-                Args:
-                    xref1, kids1: target widget and its "Kids" array.
-                    xref2, kids2: source wwidget and its "Kids" array (may be empty).
-                """
-                # make indirect objects from widgets
-                w1_ind = mupdf.pdf_new_indirect(pdf, xref1, 0)
-                w2_ind = mupdf.pdf_new_indirect(pdf, xref2, 0)
-                # find source widget in "Fields" array
-                idx = acro_fields.pdf_array_find(w2_ind)
-                acro_fields.pdf_array_delete(idx)
-
-                if not kids2.pdf_is_array():  # source widget has no kids
-                    widget = mupdf.pdf_load_object(pdf, xref2)
-
-                    # delete name from widget and insert target as parent
-                    widget.pdf_dict_del(PDF_NAME("T"))
-                    widget.pdf_dict_put(PDF_NAME("Parent"), w1_ind)
-
-                    # put in target Kids
-                    kids1.pdf_array_push(w2_ind)
-                else:  # copy source kids to target kids
-                    for i in range(kids2.pdf_array_len()):
-                        kid = kids2.pdf_array_get(i)
-                        kid.pdf_dict_put(PDF_NAME("Parent"), w1_ind)
-                        kid_ind = mupdf.pdf_new_indirect(pdf, kid.pdf_to_num(), 0)
-                        kids1.pdf_array_push(kid_ind)
-
-            def new_target(pdf, acro_fields, xref1, w1, xref2, w2, name):
-                """Make new "Parent" for two widgets with same name.
-
-                Args:
-                    xref1, w1: first widget
-                    xref2, w2: second widget
-                    name: field name
-
-                Result:
-                    Both widgets have no "Kids". We create a new object with the
-                    name and a "Kids" array containing the widgets.
-                    Original widgets must be removed from AcroForm/Fields.
-                """
-                # make new "Parent" object
-                new = mupdf.pdf_new_dict(pdf, 5)
-                new.pdf_dict_put_text_string(PDF_NAME("T"), name)
-                kids = new.pdf_dict_put_array(PDF_NAME("Kids"), 2)
-                new_obj = mupdf.pdf_add_object(pdf, new)
-                new_obj_xref = new_obj.pdf_to_num()
-                new_ind = mupdf.pdf_new_indirect(pdf, new_obj_xref, 0)
-
-                # copy over some required source widget properties
-                ft = w1.pdf_dict_get(PDF_NAME("FT"))
-                w1.pdf_dict_del(PDF_NAME("FT"))
-                new_obj.pdf_dict_put(PDF_NAME("FT"), ft)
-
-                aa = w1.pdf_dict_get(PDF_NAME("AA"))
-                w1.pdf_dict_del(PDF_NAME("AA"))
-                new_obj.pdf_dict_put(PDF_NAME("AA"), aa)
-
-                # remove name field, insert "Parent" field in source widgets
-                w1.pdf_dict_del(PDF_NAME("T"))
-                w1.pdf_dict_put(PDF_NAME("Parent"), new_ind)
-                w2.pdf_dict_del(PDF_NAME("T"))
-                w2.pdf_dict_put(PDF_NAME("Parent"), new_ind)
-
-                # put source widgets in "kids" array
-                ind1 = mupdf.pdf_new_indirect(pdf, xref1, 0)
-                ind2 = mupdf.pdf_new_indirect(pdf, xref2, 0)
-                kids.pdf_array_push(ind1)
-                kids.pdf_array_push(ind2)
-
-                # remove source widgets from "AcroForm/Fields"
-                idx = acro_fields.pdf_array_find(ind1)
-                acro_fields.pdf_array_delete(idx)
-                idx = acro_fields.pdf_array_find(ind2)
-                acro_fields.pdf_array_delete(idx)
-
-                acro_fields.pdf_array_push(new_ind)
-
-            w1 = mupdf.pdf_load_object(pdf, xref1)
-            w2 = mupdf.pdf_load_object(pdf, xref2)
-            kids1 = w1.pdf_dict_get(PDF_NAME("Kids"))
-            kids2 = w2.pdf_dict_get(PDF_NAME("Kids"))
-
-            # check which widget has a suitable "Kids" array
-            if kids1.pdf_is_array():
-                re_target(pdf, acro_fields, xref1, kids1, xref2, kids2)  # pylint: disable=arguments-out-of-order
-            elif kids2.pdf_is_array():
-                re_target(pdf, acro_fields, xref2, kids2, xref1, kids1)  # pylint: disable=arguments-out-of-order
-            else:
-                new_target(pdf, acro_fields, xref1, w1, xref2, w2, name)  # pylint: disable=arguments-out-of-order
-
         def get_kids(parent, kids_list):
             """Return xref list of leaf kids for a parent.
 
@@ -3430,34 +3286,6 @@ class Document:
             kids_list = get_kids(parent, kids_list)
             return parent_xref, kids_list
 
-        def deduplicate_names(pdf, acro_fields, join_duplicates=False):
-            """Handle any widget name duplicates caused by the merge."""
-            names = {}  # key is a widget name, value a list of widgets having it.
-
-            # extract all names and widgets in "AcroForm/Fields"
-            for i in range(mupdf.pdf_array_len(acro_fields)):
-                wobject = mupdf.pdf_array_get(acro_fields, i)
-                xref = wobject.pdf_to_num()
-
-                # extract widget name and collect widget(s) using it
-                T = mupdf.pdf_dict_get_text_string(wobject, PDF_NAME("T"))
-                xrefs = names.get(T, [])
-                xrefs.append(xref)
-                names[T] = xrefs
-
-            for name, xrefs in names.items():
-                if len(xrefs) < 2:
-                    continue
-                xref0, xref1 = xrefs[:2]  # only exactly 2 should occur!
-                if join_duplicates:  # combine fields with equal names
-                    join_widgets(pdf, acro_fields, xref0, xref1, name)
-                else:  # make field names unique
-                    newname = name + f" [{xref1}]"  # append this to the name
-                    wobject = mupdf.pdf_load_object(pdf, xref1)
-                    wobject.pdf_dict_put_text_string(PDF_NAME("T"), newname)
-
-            clean_kid_parents(acro_fields)
-
         def get_acroform(doc):
             """Retrieve the AcroForm dictionary form a PDF."""
             pdf = mupdf.pdf_document_from_fz_document(doc)
@@ -3596,7 +3424,8 @@ class Document:
                 if is_aac:
                     mupdf.pdf_array_push(tar_co, w_obj_tar_ind)
 
-        deduplicate_names(tarpdf, acro_fields, join_duplicates=join_duplicates)
+        if deduplicate:
+            _deduplicate_widget_names(tarpdf, acro_fields, join_duplicates=join_duplicates)
 
     def _embeddedFileGet(self, idx):
         pdf = _as_pdf_document(self)
@@ -4091,10 +3920,50 @@ class Document:
             mupdf.pdf_array_push_real( color, 0.8)
         mupdf.pdf_dict_put( item, PDF_NAME('C'), color)
 
+    def _clear_displaylist_cache(self, xref=None):
+        """Forget cached display lists depending on xref, all if xref is None."""
+        if self._displaylist_cache is not None:
+            self._displaylist_cache.forget(xref)
+
+    def _forget_image_digests(self, xref=None):
+        """Forget image digests depending on xref, all if xref is None."""
+        if xref is None:
+            self._image_digests.clear()
+            return
+        for key, (_, deps) in list(self._image_digests.items()):
+            if xref in deps:
+                del self._image_digests[key]
+
+    def _image_digest(self, xref):
+        """MD5 digest of the Pixmap of image xref.
+
+        Computed once per xref and kept until the image, or an object it
+        references (e.g. its /SMask), is changed via PyMuPDF."""
+        entry = self._image_digests.get(xref)
+        if entry is not None:
+            return entry[0]
+        pix = Pixmap(self, xref)
+        digest = pix.digest
+        del pix
+        deps = {xref}
+        todo = [xref]
+        xreflen = self.xref_length()
+        while todo:
+            source = self.xref_object(todo.pop(), compressed=True)
+            for ref in re.findall(r"(\d+) \d+ R\b", source):
+                ref = int(ref)
+                if ref not in deps and 0 < ref < xreflen:
+                    deps.add(ref)
+                    todo.append(ref)
+        self._image_digests[xref] = (digest, deps)
+        return digest
+
     def _reset_page_refs(self):
         """Invalidate all pages in document dictionary."""
         if getattr(self, "is_closed", True):
             return
+        self._clear_displaylist_cache()
+        self._forget_image_digests()
         pages = [p for p in self._page_refs.values()]
         for page in pages:
             if page:
@@ -4171,6 +4040,7 @@ class Document:
 
     def add_ocg(self, name, config=-1, on=1, intent=None, usage=None):
         """Add new optional content group."""
+        self._clear_displaylist_cache()
         xref = 0
         pdf = _as_pdf_document(self)
 
@@ -4310,6 +4180,11 @@ class Document:
         #self.InsertedImages  = {}
         #self.this = None
         self.this = None
+        if self._mmap is not None:
+            # Unmap the file now, not on garbage collection: on Windows, a
+            # mapped file cannot be replaced or deleted.
+            self._mmap.close()
+            self._mmap = None
 
     def convert_to_pdf(self, from_page=0, to_page=-1, rotate=0):
         """Convert document to a PDF, selecting page range and optional rotation. Output bytes object."""
@@ -4706,6 +4581,29 @@ class Document:
         location = mupdf.fz_lookup_bookmark2( self.this, bm)
         return location.chapter, location.page
 
+    def find_tables(self, pages=None, workers=None, cache=None, **kwargs):
+        """Find the tables of many pages.
+
+        Args:
+            pages: page numbers to process, default all pages.
+            workers: number of worker processes; if > 1 and the document is
+                an unmodified file, pages are processed in parallel.
+            cache: directory of cached results; PDF pages whose content and
+                arguments are unchanged are served from it.
+            kwargs: passed to Page.find_tables().
+        Returns:
+            A list with one entry per page: a list of dicts describing the
+            page's tables, or None if table detection failed.
+        """
+        from . import _table_cache
+        return _table_cache.find_document_tables(
+                self,
+                pages=pages,
+                workers=workers,
+                cache=cache,
+                **kwargs,
+                )
+
     def fullcopy_page(self, pno, to=-1):
         """Make a full page duplicate."""
         pdf = _as_pdf_document(self)
@@ -5524,6 +5422,50 @@ class Document:
             self.Graftmaps[isrt] = None
         #log( 'insert_pdf(): returning')
 
+    def merge(
+            self,
+            sources,
+            *,
+            rotate=-1,
+            links=True,
+            annots=True,
+            widgets=True,
+            join_duplicates=False,
+            deduplicate=True,
+            show_progress=0,
+            ):
+        """Append the pages of many documents.
+
+        Args:
+            sources: iterable of documents to append, in this order. An item is
+                a Document, a filename or a tuple (document or filename,
+                pages). pages is None for all pages, a page number, or a
+                sequence of page numbers and (from_page, to_page) tuples as in
+                insert_pdf(). Documents given by filename are opened one at a
+                time and closed when their pages have been copied; non-PDF
+                documents are converted to PDF.
+            rotate, links, annots, widgets, join_duplicates, show_progress:
+                as in insert_pdf().
+            deduplicate: (bool) store fonts and images that several sources
+                contain only once.
+
+        Unlike a sequence of insert_pdf() calls, links between pages of a
+        source are kept for all its copied page ranges, and form field names
+        are made unique (or joined) once, after all sources.
+        """
+        from . import _merge
+        _merge.merge_documents(
+                self,
+                sources,
+                rotate=rotate,
+                links=links,
+                annots=annots,
+                widgets=widgets,
+                join_duplicates=join_duplicates,
+                deduplicate=deduplicate,
+                show_progress=show_progress,
+                )
+
     @property
     def is_dirty(self):
         pdf = _as_pdf_document(self, required=0)
@@ -5661,6 +5603,8 @@ class Document:
             raise ValueError("document closed or encrypted")
         pdf = _as_pdf_document(self)
         mupdf.pdf_redo(pdf)
+        self._clear_displaylist_cache()
+        self._forget_image_digests()
         return True
 
     def journal_save(self, filename):
@@ -5700,6 +5644,8 @@ class Document:
             raise ValueError("document closed or encrypted")
         pdf = _as_pdf_document(self)
         mupdf.pdf_undo(pdf)
+        self._clear_displaylist_cache()
+        self._forget_image_digests()
         return True
 
     @property
@@ -6333,6 +6279,8 @@ class Document:
             self.recolor(1)
         pdf = _as_pdf_document(self)
         mupdf.pdf_rewrite_images(pdf, opts)
+        self._clear_displaylist_cache()
+        self._forget_image_digests()
 
     def recolor(self, components=1):
         """Change the color component count on all pages.
@@ -6583,11 +6531,16 @@ class Document:
             raise ValueError("document closed or encrypted")
         if type(filename) is str:
             pass
+        elif isinstance(filename, mupdf.FzBuffer):  # from Document.write()
+            pass
         elif hasattr(filename, "open"):  # assume: pathlib.Path
             filename = str(filename)
         elif hasattr(filename, "name"):  # assume: file object
             filename = filename.name
-        elif not hasattr(filename, "seek"):  # assume file object
+        elif hasattr(filename, "seek"):  # assume file object
+            pass
+        elif not (g_use_extra and hasattr(filename, "write")):
+            # Without extra, we need seek() and tell() to write the xref.
             raise ValueError("filename must be str, Path or file object")
         if filename == self.name and not incremental:
             raise ValueError("save to original must be incremental")
@@ -6642,11 +6595,23 @@ class Document:
         if isinstance(filename, str):
             #log( 'calling mupdf.pdf_save_document()')
             mupdf.pdf_save_document(pdf, filename, opts)
+        elif isinstance(filename, mupdf.FzBuffer):
+            out = mupdf.FzOutput(filename)
+            mupdf.pdf_write_document(pdf, out, opts)
+            out.fz_close_output()
+        elif g_use_extra:
+            # MuPDF buffers the output and passes it to the file object in
+            # pieces of 1 MB, instead of calling back into Python for every
+            # (often tiny) piece it writes.
+            extra.JM_write_document_fileobj(pdf, filename, opts, 1024 * 1024)
         else:
             out = JM_new_output_fileptr(filename)
-            #log( f'{type(out)=} {type(out.this)=}')
             mupdf.pdf_write_document(pdf, out, opts)
             out.fz_close_output()
+        if garbage:
+            # Garbage collection may remove and renumber objects.
+            self._clear_displaylist_cache()
+            self._forget_image_digests()
         if raise_on_repair:
             if self.is_repaired and not is_repaired_pre:
                 raise Exception(f'Document save did a repair')
@@ -6885,6 +6850,28 @@ class Document:
         # remove any existing pages with their kids
         self._reset_page_refs()
 
+    def set_displaylist_cache(self, max_bytes=0):
+        """Enable, reset or disable caching of page display lists.
+
+        Args:
+            max_bytes: (int) upper limit of the estimated size of cached
+                display lists. 0 disables the cache.
+        Notes:
+            PDF only. If enabled, Page.get_displaylist() and Page.get_pixmap()
+            reuse the display list of a page instead of interpreting its
+            content again. A cached display list is replaced when PyMuPDF has
+            modified its page, or an object the page uses.
+        """
+        if self.is_closed or self.is_encrypted:
+            raise ValueError("document closed or encrypted")
+        if not self.is_pdf:
+            raise ValueError("is no PDF")
+        if max_bytes > 0:
+            from . import _displaylist_cache
+            self._displaylist_cache = _displaylist_cache.DisplayListCache(max_bytes)
+        else:
+            self._displaylist_cache = None
+
     def set_language(self, language=None):
         pdf = _as_pdf_document(self)
         if not language:
@@ -6898,6 +6885,7 @@ class Document:
         """Set the PDF keys /ON, /OFF, /RBGroups of an OC layer."""
         if self.is_closed:
             raise ValueError("document closed")
+        self._clear_displaylist_cache()
         ocgs = set(self.get_ocgs().keys())
         if ocgs == set():
             raise ValueError("document has no optional content")
@@ -6969,6 +6957,7 @@ class Document:
                 raise ValueError(f"bad OCG '{number}'.")
             number = select[0]  # this is the number for the name
         pdf = _as_pdf_document(self)
+        self._clear_displaylist_cache()
         if action == 1:
             mupdf.pdf_toggle_layer_config_ui(pdf, number)
         elif action == 2:
@@ -7069,6 +7058,7 @@ class Document:
         """
         if doc.is_closed or doc.is_encrypted:
             raise ValueError("document close or encrypted")
+        doc._clear_displaylist_cache()
         t, name = doc.xref_get_key(xref, "Subtype")
         if t != "name" or name not in ("/Image", "/Form"):
             raise ValueError(f"bad object type at xref {xref}")
@@ -7101,6 +7091,7 @@ class Document:
             Xref of the created or updated OCMD.
         """
 
+        doc._clear_displaylist_cache()
         all_ocgs = set(doc.get_ocgs().keys())
 
         def ve_maker(ve):
@@ -7863,6 +7854,7 @@ class Document:
     def switch_layer(self, config, as_default=0):
         """Activate an OC layer."""
         pdf = _as_pdf_document(self)
+        self._clear_displaylist_cache()
         cfgs = mupdf.pdf_dict_getl(
                 mupdf.pdf_trailer( pdf),
                 PDF_NAME('Root'),
@@ -7892,6 +7884,8 @@ class Document:
         # create new object with passed-in string
         new_obj = JM_pdf_obj_from_str(pdf, text)
         mupdf.pdf_update_object(pdf, xref, new_obj)
+        self._clear_displaylist_cache(xref)
+        self._forget_image_digests(xref)
         if page:
             JM_refresh_links( _as_pdf_page(page))
 
@@ -7912,6 +7906,8 @@ class Document:
             raise TypeError( MSG_BAD_BUFFER)
         JM_update_stream(pdf, obj, res, compress)
         pdf.dirty = 1
+        self._clear_displaylist_cache(xref)
+        self._forget_image_digests(xref)
 
     @property
     def version_count(self):
@@ -7947,10 +7943,9 @@ class Document:
             raise_on_repair=False,
             reproducible=False,
     ):
-        from io import BytesIO
-        bio = BytesIO()
+        buffer = mupdf.fz_new_buffer(64 * 1024)
         self.save(
-                bio,
+                buffer,
                 garbage=garbage,
                 clean=clean,
                 no_new_id=no_new_id,
@@ -7973,7 +7968,8 @@ class Document:
                 raise_on_repair=raise_on_repair,
                 reproducible=reproducible,
         )
-        return bio.getvalue()
+        # leaves the buffer empty, freeing its memory
+        return mupdf.fz_buffer_extract(buffer)
     
     def tobytes(self, *args, **kwargs):
         return self.write(*args, **kwargs)
@@ -8175,6 +8171,8 @@ class Document:
             return  # did not work: skip update
         if xref != -1:
             mupdf.pdf_update_object(pdf, xref, new_obj)
+            self._clear_displaylist_cache(xref)
+            self._forget_image_digests(xref)
         else:
             n = mupdf.pdf_dict_len(new_obj)
             for i in range(n):
@@ -8340,6 +8338,7 @@ class Font:
                    fontbuffer, script, lang, ordering,
                    is_bold, is_italic, is_serif, embed)
         self.this = font
+        self._advances = {}  # see _char_advances()
 
     def __repr__(self):
         return f"Font('{self.name}')"
@@ -8358,20 +8357,36 @@ class Font:
         buffer_ = mupdf.FzBuffer( mupdf.ll_fz_keep_buffer( self.this.m_internal.buffer))
         return mupdf.fz_buffer_extract_copy( buffer_)
 
+    def _char_advances(self, text, language, script, wmode, small_caps):
+        """Return dict of glyph advances (font size 1) by character.
+
+        The dict is kept per encoding parameters and contains at least the
+        characters of 'text'. Missing ones are measured in one call.
+        """
+        key = (language, script, wmode, bool(small_caps))
+        advances = self._advances.get(key)
+        if advances is None:
+            advances = self._advances[key] = {}
+        missing = set(text).difference(advances)
+        if missing:
+            missing = "".join(missing)
+            if g_use_extra:
+                lang = mupdf.fz_text_language_from_string(language)
+                values = extra.Font_char_advances(
+                        self.this, missing, script, lang, wmode, small_caps
+                        )
+            else:
+                values = [
+                        self.glyph_advance(ord(c), language, script, wmode, small_caps)
+                        for c in missing
+                        ]
+            advances.update(zip(missing, values))
+        return advances
+
     def char_lengths(self, text, fontsize=11, language=None, script=0, wmode=0, small_caps=0):
         """Return tuple of char lengths of unicode 'text' under a fontsize."""
-        lang = mupdf.fz_text_language_from_string(language)
-        rc = []
-        for ch in text:
-            c = ord(ch)
-            if small_caps:
-                gid = mupdf.fz_encode_character_sc(self.this, c)
-                if gid >= 0:
-                    font = self.this
-            else:
-                gid, font = mupdf.fz_encode_character_with_fallback(self.this, c, script, lang)
-            rc.append(fontsize * mupdf.fz_advance_glyph(font, gid, wmode))
-        return rc
+        advances = self._char_advances(text, language, script, wmode, small_caps)
+        return [fontsize * adv for adv in map(advances.__getitem__, text)]
 
     @property
     def descender(self):
@@ -8507,23 +8522,29 @@ class Font:
 
     def text_length(self, text, fontsize=11, language=None, script=0, wmode=0, small_caps=0):
         """Return length of unicode 'text' under a fontsize."""
-        thisfont = self.this
-        lang = mupdf.fz_text_language_from_string(language)
-        rc = 0
         if not isinstance(text, str):
             raise TypeError( MSG_BAD_TEXT)
-        for ch in text:
-            c = ord(ch)
-            if small_caps:
-                gid = mupdf.fz_encode_character_sc(thisfont, c)
-                if gid >= 0:
-                    font = thisfont
-            else:
-                gid, font = mupdf.fz_encode_character_with_fallback(thisfont, c, script, lang)
-            rc += mupdf.fz_advance_glyph(font, gid, wmode)
+        advances = self._char_advances(text, language, script, wmode, small_caps)
+        rc = functools.reduce(operator.add, map(advances.__getitem__, text), 0)
         rc *= fontsize
         return rc
 
+    def text_lengths(self, texts, fontsize=11, language=None, script=0, wmode=0, small_caps=0):
+        """Return list of lengths of unicode strings under a fontsize.
+
+        Same as [text_length(t, ...) for t in texts], measuring all
+        characters not seen before by this font in one call.
+        """
+        texts = list(texts)
+        if not all(isinstance(text, str) for text in texts):
+            raise TypeError( MSG_BAD_TEXT)
+        advances = self._char_advances("".join(texts), language, script, wmode, small_caps)
+        get = advances.__getitem__
+        return [
+                functools.reduce(operator.add, map(get, text), 0) * fontsize
+                for text in texts
+                ]
+
     def unicode_to_glyph_name(self, ch):
         """Return the glyph name for a unicode."""
         return unicode_to_glyph_name(ch)
@@ -8553,6 +8574,102 @@ class Graftmap:
         self.thisown = True
 
 
+def _htmlbox_layout(story, temp_rect, scale_low, opacity, scale_word_width, verbose):
+    """Lay out a Story for Page.insert_htmlbox().
+
+    Returns (spare_height, scale, fit_rect, doc, links): doc is a one-page PDF
+    showing the story, links are the links of its page. If the story does not
+    fit, fit_rect, doc and links are None and spare_height is -1.
+    """
+    # ----------------------------------------------------------------
+    # Find a scaling factor that lets our story fit in. Instead of scaling
+    # the text smaller, we instead look at how much bigger the rect needs
+    # to be to fit the text, then reverse the scaling to get how much we
+    # need to scale down the text.
+    # ----------------------------------------------------------------
+    rect_scale_max = None if scale_low == 0 else 1 / scale_low
+
+    fit = story.fit_scale(
+            temp_rect,
+            scale_min=1,
+            scale_max=rect_scale_max,
+            flags=mupdf.FZ_PLACE_STORY_FLAG_NO_OVERFLOW if scale_word_width else 0,
+            verbose=verbose,
+            )
+
+    if not fit.big_enough:  # there was no fit
+        scale = 1 / fit.parameter
+        return (-1, scale, None, None, None)
+
+    # fit.filled is a tuple; we convert it in place to a Rect for
+    # convenience. (fit.rect is already a Rect.)
+    fit.filled = Rect(fit.filled)
+    assert (fit.rect.x0, fit.rect.y0) == (0, 0)
+    assert (fit.filled.x0, fit.filled.y0) == (0, 0)
+
+    scale = 1 / fit.parameter
+    assert scale >= scale_low, f'{scale_low=} {scale=}'
+
+    spare_height = max((fit.rect.y1 - fit.filled.y1) * scale, 0)
+
+    def rect_function(*args):
+        return fit.rect, fit.rect, None
+
+    # draw story on temp PDF page
+    doc = story.write_with_links(rect_function)
+
+    # Insert opacity if requested.
+    # For this, we prepend a command to the /Contents.
+    if 0 <= opacity < 1:
+        tpage = doc[0]  # load page
+        # generate /ExtGstate for the page
+        alp0 = tpage._set_opacity(CA=opacity, ca=opacity)
+        s = f"/{alp0} gs\n"  # generate graphic state command
+        TOOLS._insert_contents(tpage, s.encode(), 0)
+
+    return spare_height, scale, fit.rect, doc, doc[0].get_links()
+
+
+class HtmlBox:
+    """HTML text prepared for repeated Page.insert_htmlbox() calls.
+
+    Args:
+        text: (str) text with optional HTML tags and stylings.
+        css: (str) CSS styling commands.
+        archive: Archive object pointing to locations of used fonts or images.
+        max_layouts: (int) number of box sizes for which layouts are kept.
+    Notes:
+        The text is parsed once. For the max_layouts most recently used box
+        sizes (and scale_low, opacity) the fitting result and the page showing
+        the laid out text are kept, so that inserting the same text into boxes
+        of the same size again skips fitting and the creation of a temporary
+        PDF. Within the target document, all these insertions share one Form
+        XObject.
+    """
+
+    def __init__(self, text, *, css=None, archive=None, max_layouts=16):
+        if css is None:
+            css = ""
+        # use a small border by default
+        self._story = Story(html=text, user_css="body {margin:1px;}" + css, archive=archive)
+        # Each layout holds a one-page Document, so we only keep the most
+        # recently used ones.
+        self._layouts = collections.OrderedDict()
+        self._max_layouts = max(max_layouts, 1)
+
+    def _layout(self, rect, scale_low, opacity, scale_word_width, verbose):
+        key = (rect.width, rect.height, scale_low, opacity, scale_word_width)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = _htmlbox_layout(self._story, rect, scale_low, opacity, scale_word_width, verbose)
+            self._layouts[key] = layout
+            while len(self._layouts) > self._max_layouts:
+                self._layouts.popitem(last=False)
+        else:
+            self._layouts.move_to_end(key)
+        return layout
+
+
 class Link:
     def __del__(self):
         self._erase()
@@ -8667,11 +8784,19 @@ class Link:
             val.parent = self.parent  # copy owning page from prev link
             val.parent._annot_refs[id(val)] = val
             if self.xref > 0:  # prev link has an xref
-                link_xrefs = [x[0] for x in self.parent.annot_xrefs() if x[1] == mupdf.PDF_ANNOT_LINK]
-                link_ids = [x[2] for x in self.parent.annot_xrefs() if x[1] == mupdf.PDF_ANNOT_LINK]
-                idx = link_xrefs.index(self.xref)
-                val.xref = link_xrefs[idx + 1]
-                val.id = link_ids[idx + 1]
+                # The page's link annotations and the position of this link
+                # among them are passed along the chain, so that iterating
+                # over all links does not look them up for every link.
+                link_annots = getattr(self, "_link_annots", None)
+                if link_annots is None:
+                    link_annots = [x for x in self.parent.annot_xrefs() if x[1] == mupdf.PDF_ANNOT_LINK]
+                    idx = [x[0] for x in link_annots].index(self.xref)
+                else:
+                    idx = self._link_index
+                val.xref = link_annots[idx + 1][0]
+                val.id = link_annots[idx + 1][2]
+                val._link_annots = link_annots
+                val._link_index = idx + 1
             else:
                 val.xref = 0
                 val.id = ""
@@ -9187,6 +9312,305 @@ class linkDest:
                 self.kind = LINK_LAUNCH
         assert isinstance(self.named, dict)
 
+
+_GOTO_URI = re.compile(r"#page=(\d+)&zoom=([^&]*)")
+
+
+def _page_link_dicts(page):
+    """Links of a page as Page.get_links() makes them, without 'xref' / 'id'.
+
+    Internal links to a page location and external URIs, by far the most
+    frequent kinds, are converted directly from the MuPDF links. All others
+    go through Link objects and utils.getLinkDict() like in get_links().
+    """
+    links = []
+    link = mupdf.fz_load_links(page.this)
+    while link.m_internal:
+        r = link.rect()
+        uri = link.m_internal.uri or ""
+        nl = None
+        if mupdf.fz_is_external_link(uri):
+            if ":" in uri and not uri.startswith("file:"):
+                nl = {"kind": LINK_URI, "xref": 0, "from": Rect(r.x0, r.y0, r.x1, r.y1), "uri": uri}
+        else:
+            m = _GOTO_URI.fullmatch(uri.replace("&zoom=nan", "&zoom=0"))
+            zoom = m.group(2).split(",") if m else ()
+            if len(zoom) >= 3:
+                try:
+                    to = Point(float(zoom[1]), float(zoom[2]))
+                except ValueError:
+                    pass
+                else:
+                    nl = {
+                            "kind": LINK_GOTO,
+                            "xref": 0,
+                            "from": Rect(r.x0, r.y0, r.x1, r.y1),
+                            "page": int(m.group(1)) - 1,
+                            "to": to,
+                            "zoom": 0.0,
+                            }
+        if nl is None:
+            ln = Link(link)
+            ln.thisown = True
+            ln.parent = weakref.proxy(page)
+            nl = utils.getLinkDict(ln, page.parent)
+        links.append(nl)
+        link = link.next()
+    return links
+
+
+def _link_annot_text(lnk, xref_dst, ctm):
+    """Create annotation object string for a passed-in link.
+
+    Coordinates are transformed with ctm. GOTO targets are looked up in
+    xref_dst, a dict of destination page xrefs by source page number; links
+    to other pages and of unsupported kinds give an empty string.
+    """
+    # rect in PDF coordinates
+    r = lnk["from"]
+    r = mupdf.fz_transform_rect(mupdf.FzRect(r.x0, r.y0, r.x1, r.y1), ctm)
+    rect = _format_g((r.x0, r.y0, r.x1, r.y1))
+    if lnk["kind"] == LINK_GOTO:
+        if lnk["page"] not in xref_dst:
+            return ""  # GOTO link target not in copied pages
+        txt = annot_skel["goto1"]  # annot_goto
+        # target point in PDF coordinates
+        p = lnk["to"]
+        p = mupdf.fz_transform_point(mupdf.FzPoint(p.x, p.y), ctm)
+        annot = txt(xref_dst[lnk["page"]], p.x, p.y, lnk["zoom"], rect)
+
+    elif lnk["kind"] == LINK_GOTOR:
+        if lnk["page"] >= 0:
+            txt = annot_skel["gotor1"]  # annot_gotor
+            pnt = lnk.get("to", Point(0, 0))  # destination point
+            if type(pnt) is not Point:
+                pnt = Point(0, 0)
+            annot = txt(
+                lnk["page"],
+                pnt.x,
+                pnt.y,
+                lnk["zoom"],
+                lnk["file"],
+                lnk["file"],
+                rect,
+            )
+        else:
+            txt = annot_skel["gotor2"]  # annot_gotor_n
+            to = get_pdf_str(lnk["to"])
+            to = to[1:-1]
+            f = lnk["file"]
+            annot = txt(to, f, rect)
+
+    elif lnk["kind"] == LINK_LAUNCH:
+        txt = annot_skel["launch"]  # annot_launch
+        annot = txt(lnk["file"], lnk["file"], rect)
+
+    elif lnk["kind"] == LINK_URI:
+        txt = annot_skel["uri"]  # annot_uri
+        annot = txt(lnk["uri"], rect)
+
+    else:
+        annot = ""
+
+    return annot
+
+
+def _copied_page_links(doc, pno):
+    """Links of PDF page pno, for copying them to another PDF.
+
+    Returns (links, ictm): the link dicts of _page_link_dicts() and the matrix
+    that converts their coordinates back to PDF coordinates. links is empty
+    if the page has no links.
+    """
+    # links are annotations: skip loading pages without any
+    if doc.xref_get_key(doc.page_xref(pno), "Annots")[0] == "null":
+        return [], None
+    page = doc[pno]
+    links = _page_link_dicts(page)
+    if not links:
+        return [], None
+
+    # In _page_link_dicts(), we end up in fz_load_links(). This extracts the
+    # raw rects (encoded as strings such as `/Rect[10 782 40 822]`) and
+    # multiplies them by page_ctm from pdf_page_transform().
+    #
+    # We want to recreate the original raw rects, so we need to multiply by
+    # inverse of page_ctm. This fixes #4958.
+    ctm = mupdf.FzMatrix()
+    mupdf.pdf_page_transform(_as_pdf_page(page), mupdf.FzRect(0), ctm)
+    return links, mupdf.fz_invert_matrix(ctm)
+
+
+def _add_link_annots(doc, page_links):
+    """Add link annotations to pages of PDF doc.
+
+    page_links is a sequence of (page xref, page number, tuple of annotation
+    object strings).
+    """
+    if g_use_extra:
+        extra.Document_addAnnots_FromString(
+                _as_pdf_document(doc),
+                [(xref, link_tab) for xref, _, link_tab in page_links],
+                )
+    else:
+        for _, pno, link_tab in page_links:
+            doc[pno]._addAnnot_FromString(link_tab)
+
+
+def _clean_kid_parents(acro_fields):
+    """ Make sure all kids have correct "Parent" pointers."""
+    for i in range(acro_fields.pdf_array_len()):
+        parent = acro_fields.pdf_array_get(i)
+        kids = parent.pdf_dict_get(PDF_NAME("Kids"))
+        for j in range(kids.pdf_array_len()):
+            kid = kids.pdf_array_get(j)
+            kid.pdf_dict_put(PDF_NAME("Parent"), parent)
+
+
+def _join_widgets(pdf, acro_fields, xref1, xref2, name):
+    """Called for each pair of widgets having the same name.
+
+    Args:
+        pdf: target MuPDF document
+        acro_fields: object Root/AcroForm/Fields
+        xref1, xref2: widget xrefs having same names
+        name: (str) the name
+
+    Result:
+        Defined or updated widget parent that points to both widgets. Returns
+        its xref.
+    """
+
+    def re_target(pdf, acro_fields, xref1, kids1, xref2, kids2):
+        """Merge widget in xref2 into "Kids" list of widget xref1.
+
+        Args:
+            xref1, kids1: target widget and its "Kids" array.
+            xref2, kids2: source wwidget and its "Kids" array (may be empty).
+        """
+        # make indirect objects from widgets
+        w1_ind = mupdf.pdf_new_indirect(pdf, xref1, 0)
+        w2_ind = mupdf.pdf_new_indirect(pdf, xref2, 0)
+        # find source widget in "Fields" array
+        idx = acro_fields.pdf_array_find(w2_ind)
+        acro_fields.pdf_array_delete(idx)
+
+        if not kids2.pdf_is_array():  # source widget has no kids
+            widget = mupdf.pdf_load_object(pdf, xref2)
+
+            # delete name from widget and insert target as parent
+            widget.pdf_dict_del(PDF_NAME("T"))
+            widget.pdf_dict_put(PDF_NAME("Parent"), w1_ind)
+
+            # put in target Kids
+            kids1.pdf_array_push(w2_ind)
+        else:  # copy source kids to target kids
+            for i in range(kids2.pdf_array_len()):
+                kid = kids2.pdf_array_get(i)
+                kid.pdf_dict_put(PDF_NAME("Parent"), w1_ind)
+                kid_ind = mupdf.pdf_new_indirect(pdf, kid.pdf_to_num(), 0)
+                kids1.pdf_array_push(kid_ind)
+
+    def new_target(pdf, acro_fields, xref1, w1, xref2, w2, name):
+        """Make new "Parent" for two widgets with same name.
+
+        Args:
+            xref1, w1: first widget
+            xref2, w2: second widget
+            name: field name
+
+        Result:
+            Both widgets have no "Kids". We create a new object with the
+            name and a "Kids" array containing the widgets.
+            Original widgets must be removed from AcroForm/Fields.
+        """
+        # make new "Parent" object
+        new = mupdf.pdf_new_dict(pdf, 5)
+        new.pdf_dict_put_text_string(PDF_NAME("T"), name)
+        kids = new.pdf_dict_put_array(PDF_NAME("Kids"), 2)
+        new_obj = mupdf.pdf_add_object(pdf, new)
+        new_obj_xref = new_obj.pdf_to_num()
+        new_ind = mupdf.pdf_new_indirect(pdf, new_obj_xref, 0)
+
+        # copy over some required source widget properties
+        ft = w1.pdf_dict_get(PDF_NAME("FT"))
+        w1.pdf_dict_del(PDF_NAME("FT"))
+        new_obj.pdf_dict_put(PDF_NAME("FT"), ft)
+
+        aa = w1.pdf_dict_get(PDF_NAME("AA"))
+        w1.pdf_dict_del(PDF_NAME("AA"))
+        new_obj.pdf_dict_put(PDF_NAME("AA"), aa)
+
+        # remove name field, insert "Parent" field in source widgets
+        w1.pdf_dict_del(PDF_NAME("T"))
+        w1.pdf_dict_put(PDF_NAME("Parent"), new_ind)
+        w2.pdf_dict_del(PDF_NAME("T"))
+        w2.pdf_dict_put(PDF_NAME("Parent"), new_ind)
+
+        # put source widgets in "kids" array
+        ind1 = mupdf.pdf_new_indirect(pdf, xref1, 0)
+        ind2 = mupdf.pdf_new_indirect(pdf, xref2, 0)
+        kids.pdf_array_push(ind1)
+        kids.pdf_array_push(ind2)
+
+        # remove source widgets from "AcroForm/Fields"
+        idx = acro_fields.pdf_array_find(ind1)
+        acro_fields.pdf_array_delete(idx)
+        idx = acro_fields.pdf_array_find(ind2)
+        acro_fields.pdf_array_delete(idx)
+
+        acro_fields.pdf_array_push(new_ind)
+        return new_obj_xref
+
+    w1 = mupdf.pdf_load_object(pdf, xref1)
+    w2 = mupdf.pdf_load_object(pdf, xref2)
+    kids1 = w1.pdf_dict_get(PDF_NAME("Kids"))
+    kids2 = w2.pdf_dict_get(PDF_NAME("Kids"))
+
+    # check which widget has a suitable "Kids" array
+    if kids1.pdf_is_array():
+        re_target(pdf, acro_fields, xref1, kids1, xref2, kids2)  # pylint: disable=arguments-out-of-order
+        return xref1
+    if kids2.pdf_is_array():
+        re_target(pdf, acro_fields, xref2, kids2, xref1, kids1)  # pylint: disable=arguments-out-of-order
+        return xref2
+    return new_target(pdf, acro_fields, xref1, w1, xref2, w2, name)  # pylint: disable=arguments-out-of-order
+
+
+def _deduplicate_widget_names(pdf, acro_fields, join_duplicates=False):
+    """Handle any widget name duplicates caused by the merge.
+
+    Duplicates are joined to the first field of their name, or renamed.
+    """
+    names = {}  # key is a widget name, value a list of widgets having it.
+
+    # extract all names and widgets in "AcroForm/Fields"
+    for i in range(mupdf.pdf_array_len(acro_fields)):
+        wobject = mupdf.pdf_array_get(acro_fields, i)
+        xref = wobject.pdf_to_num()
+
+        # extract widget name and collect widget(s) using it
+        T = mupdf.pdf_dict_get_text_string(wobject, PDF_NAME("T"))
+        xrefs = names.get(T, [])
+        xrefs.append(xref)
+        names[T] = xrefs
+
+    for name, xrefs in names.items():
+        if len(xrefs) < 2:
+            continue
+        # more than 2 only occur if several sources were merged at once
+        xref0 = xrefs[0]
+        for xref1 in xrefs[1:]:
+            if join_duplicates:  # combine fields with equal names
+                xref0 = _join_widgets(pdf, acro_fields, xref0, xref1, name)
+            else:  # make field names unique
+                newname = name + f" [{xref1}]"  # append this to the name
+                wobject = mupdf.pdf_load_object(pdf, xref1)
+                wobject.pdf_dict_put_text_string(PDF_NAME("T"), newname)
+
+    _clean_kid_parents(acro_fields)
+
+
 class Widget:
     '''
     Class describing a PDF form field ("widget")
@@ -10970,6 +11394,8 @@ class Page:
         ropt.num_comp = components
         ropts = mupdf.PdfRecolorOptions(ropt)
         mupdf.pdf_recolor_page(pdfdoc, self.number, ropts)
+        self.parent._clear_displaylist_cache()
+        self.parent._forget_image_digests()
 
     def clip_to_rect(self, rect):
         """Clip away page content outside the rectangle."""
@@ -11685,6 +12111,9 @@ class Page:
         Include (default) or exclude annotations.
         '''
         CheckParent(self)
+        cache = self.parent._displaylist_cache
+        if cache is not None:
+            return DisplayList(cache.get(self, annots))
         if annots:
             dl = mupdf.fz_new_display_list_from_page(self.this)
         else:
@@ -11712,6 +12141,9 @@ class Page:
                 'even_odd',
                 )
         val = self.get_cdrawings(extended=extended)
+        if g_use_extra:
+            # Same conversion in C, bypassing the generic constructors.
+            return extra.drawings_as_objects(val, Point, Rect, Quad)
         for i in range(len(val)):
             npath = val[i]
             if not npath["type"].startswith("clip"):
@@ -11912,9 +12344,7 @@ class Page:
         digests = {}
         for item in imglist:
             xref = item[0]
-            pix = Pixmap(doc, xref)
-            digests[pix.digest] = xref
-            del pix
+            digests[doc._image_digest(xref)] = xref
         for i in range(len(imginfo)):
             item = imginfo[i]
             xref = digests.get(item["digest"], 0)
@@ -11944,9 +12374,7 @@ class Page:
             elif len(imglist) != 1:
                 raise ValueError("multiple image names found")
             xref = imglist[0][0]
-        pix = Pixmap(page.parent, xref)  # make pixmap of the image to compute MD5
-        digest = pix.digest
-        del pix
+        digest = page.parent._image_digest(xref)  # MD5 of the image's pixmap
         infos = page.get_image_info(hashes=True)
         if not transform:
             bboxes = [Rect(im["bbox"]) for im in infos if im["digest"] == digest]
@@ -12043,47 +12471,246 @@ class Page:
             pix.set_dpi(dpi, dpi)
         return pix
 
-    def remove_rotation(self):
-        """Set page rotation to 0 while maintaining visual appearance."""
-        rot = self.rotation  # normalized rotation value
-        if rot == 0:
-            return  Identity # nothing to do
+    def _render_bands(
+                page,
+                tile_size,
+                matrix,
+                dpi,
+                colorspace,
+                clip,
+                alpha,
+                annots,
+                ):
+        """Implementation of render_tiles().
 
-        # need to derotate the page's content
-        mb = self.mediabox  # current mediabox
+        Returns (irect, colorspace, tiles): the raster's IRect in device space,
+        the resolved Colorspace and a generator of (x, y, pixmap) tuples.
+        """
+        if isinstance(tile_size, int):
+            tile_width = tile_height = tile_size
+        else:
+            tile_width, tile_height = tile_size
+        if tile_width < 0 or tile_height <= 0:
+            raise ValueError("bad tile_size")
+        if colorspace is None:
+            colorspace = csRGB
+        if dpi:
+            zoom = dpi / 72
+            matrix = Matrix(zoom, zoom)
 
-        if rot == 90:
-            # before derotation, shift content horizontally
-            mat0 = Matrix(1, 0, 0, 1, mb.y1 - mb.x1 - mb.x0 - mb.y0, 0)
-        elif rot == 270:
-            # before derotation, shift content vertically
-            mat0 = Matrix(1, 0, 0, 1, 0, mb.x1 - mb.y1 - mb.y0 - mb.x0)
-        else:  # rot = 180
-            mat0 = Matrix(1, 0, 0, 1, -2 * mb.x0, -2 * mb.y0)
+        if type(colorspace) is str:
+            if colorspace.upper() == "GRAY":
+                colorspace = csGRAY
+            elif colorspace.upper() == "CMYK":
+                colorspace = csCMYK
+            else:
+                colorspace = csRGB
+        if colorspace.n not in (1, 3, 4):
+            raise ValueError("unsupported colorspace")
 
-        # prefix with derotation matrix
-        mat = mat0 * self.derotation_matrix
-        cmd = _format_g(tuple(mat)) + ' cm '
-        cmd = cmd.encode('utf8')
-        _ = TOOLS._insert_contents(self, cmd, False)  # prepend to page contents
+        dl = page.get_displaylist(annots=annots).this
+        ctm = JM_matrix_from_py(matrix)
+        rclip = JM_rect_from_py(clip)
+        rect = mupdf.fz_intersect_rect(mupdf.fz_bound_display_list(dl), rclip)
+        irect = mupdf.fz_round_rect(mupdf.fz_transform_rect(rect, ctm))
+        if not tile_width:
+            tile_width = max(irect.x1 - irect.x0, 1)
+        inverse = mupdf.fz_invert_matrix(ctm)
+        tiles = [
+                mupdf.FzIrect(x, y, min(x + tile_width, irect.x1), min(y + tile_height, irect.y1))
+                for y in range(irect.y0, irect.y1, tile_height)
+                for x in range(irect.x0, irect.x1, tile_width)
+                ]
 
-        # swap x- and y-coordinates
-        if rot in (90, 270):
-            x0, y0, x1, y1 = mb
-            mb.x0 = y0
-            mb.y0 = x0
-            mb.x1 = y1
-            mb.y1 = x1
-            self.set_mediabox(mb)
+        def render(tile):
+            pix = mupdf.fz_new_pixmap_with_bbox(colorspace.this, tile, mupdf.FzSeparations(), alpha)
+            if alpha:
+                mupdf.fz_clear_pixmap(pix)
+            else:
+                mupdf.fz_clear_pixmap_with_value(pix, 0xFF)
+            # Only run display list items that can touch the tile.
+            scissor = mupdf.fz_intersect_rect(
+                    mupdf.fz_transform_rect(mupdf.FzRect(tile), inverse),
+                    rclip,
+                    )
+            dev = mupdf.fz_new_draw_device(ctm, pix)
+            mupdf.fz_run_display_list(dl, dev, mupdf.FzMatrix(), scissor, mupdf.FzCookie())
+            mupdf.fz_close_device(dev)
+            pix = Pixmap('raw', pix)
+            if dpi:
+                pix.set_dpi(dpi, dpi)
+            return tile.x0 - irect.x0, tile.y0 - irect.y0, pix
 
-        self.set_rotation(0)
-        rot = ~mat  # inverse of the derotation matrix
+        return irect, colorspace, (render(tile) for tile in tiles)
 
-        for annot in self.annots():  # modify rectangles of annotations
-            r = annot.rect * rot
-            # TODO: only try to set rectangle for applicable annot types
-            annot.set_rect(r)
-        for link in self.get_links():  # modify 'from' rectangles of links
+    def render_tiles(
+                page: 'Page',
+                tile_size=512,
+                *,
+                matrix: matrix_like=Identity,
+                dpi=None,
+                colorspace: Colorspace=None,
+                clip: rect_like=None,
+                alpha: bool=False,
+                annots: bool=True,
+                ):
+        """Render the page in tiles, without making a pixmap of the full raster.
+
+        Args:
+            tile_size: (int or sequence of 2 ints) width and height of tiles.
+                A width of 0 means the full raster width, i.e. horizontal bands.
+        Keyword args:
+            matrix, dpi, colorspace, clip, alpha, annots: as in get_pixmap().
+        Returns:
+            A generator of (x, y, pixmap) in rows from top to bottom, where
+            (x, y) is the position of the tile's top-left pixel within the
+            raster that get_pixmap() would make with these arguments.
+        """
+        _, _, tiles = page._render_bands(tile_size, matrix, dpi, colorspace, clip, alpha, annots)
+        return tiles
+
+    def render_to_file(
+                page: 'Page',
+                filename,
+                output=None,
+                *,
+                matrix: matrix_like=Identity,
+                dpi=None,
+                colorspace: Colorspace=None,
+                clip: rect_like=None,
+                alpha: bool=False,
+                annots: bool=True,
+                band_height: int=256,
+                ):
+        """Render the page to an image file, one band of pixels at a time.
+
+        Args:
+            filename: (str, Path) the file to write.
+            output: (str) only use to overrule filename extension. Default is
+                PNG. Others are PNM, PGM, PPM, PBM, PKM, PAM, PSD, PS. PBM and
+                PKM are halftoned to 1 bit per component of gray or CMYK.
+        Keyword args:
+            matrix, dpi, colorspace, clip, alpha, annots: as in get_pixmap().
+            band_height: (int) height of the rendered bands in pixels.
+        Notes:
+            Produces the same image as get_pixmap().save(), but needs memory
+            for one band of pixels only.
+        """
+        valid_formats = {
+                "png": mupdf.FzBandWriter.PNG,
+                "pnm": mupdf.FzBandWriter.PNM,
+                "pgm": mupdf.FzBandWriter.PNM,
+                "ppm": mupdf.FzBandWriter.PNM,
+                "pbm": mupdf.FzBandWriter.PBM,
+                "pkm": mupdf.FzBandWriter.PKM,
+                "pam": mupdf.FzBandWriter.PAM,
+                "psd": mupdf.FzBandWriter.PSD,
+                "ps": mupdf.FzBandWriter.PS,
+                }
+        # Band writers of bitmaps, with the colorspace that they need.
+        bitmap_colorspaces = {
+                mupdf.FzBandWriter.PBM: csGRAY,
+                mupdf.FzBandWriter.PKM: csCMYK,
+                }
+        if type(filename) is not str and hasattr(filename, "absolute"):
+            filename = str(filename)
+        if output is None:
+            _, ext = os.path.splitext(filename)
+            output = ext[1:]
+        kind = valid_formats.get(output.lower(), None)
+        if kind is None:
+            raise ValueError(f"Image format {output} not in {tuple(valid_formats.keys())}")
+        bitmap_colorspace = bitmap_colorspaces.get(kind)
+        if colorspace is None and bitmap_colorspace:
+            colorspace = bitmap_colorspace
+        irect, colorspace, bands = page._render_bands(
+                (0, band_height), matrix, dpi, colorspace, clip, alpha, annots
+                )
+        if alpha and (bitmap_colorspace or kind in (mupdf.FzBandWriter.PNM, mupdf.FzBandWriter.PS)):
+            raise ValueError(f"'{output}' cannot have alpha")
+        if colorspace.n > 3 and kind in (mupdf.FzBandWriter.PNG, mupdf.FzBandWriter.PNM):
+            raise ValueError(f"unsupported colorspace for '{output}'")
+        if bitmap_colorspace and colorspace.n != bitmap_colorspace.n:
+            raise ValueError(f"unsupported colorspace for '{output}'")
+        resolution = int(dpi) if dpi else 96  # the default of new pixmaps
+        out = mupdf.FzOutput(filename, 0)
+        try:
+            writer = mupdf.FzBandWriter(out, kind)
+            mupdf.fz_write_header(
+                    writer,
+                    irect.x1 - irect.x0,
+                    irect.y1 - irect.y0,
+                    colorspace.n + bool(alpha),
+                    bool(alpha),
+                    resolution,
+                    resolution,
+                    0,
+                    colorspace.this,
+                    mupdf.FzSeparations(),
+                    )
+            for _, _, band in bands:
+                if bitmap_colorspace:
+                    # The halftone pattern is aligned with the band's y
+                    # coordinate, so bands match a halftoned full pixmap.
+                    bitmap = mupdf.fz_new_bitmap_from_pixmap_band(band.this, mupdf.FzHalftone(), 0)
+                    mupdf.fz_write_band(
+                            writer,
+                            bitmap.m_internal.stride,
+                            bitmap.m_internal.h,
+                            bitmap.m_internal.samples,
+                            )
+                    continue
+                mupdf.fz_write_band(
+                        writer,
+                        band.stride,
+                        band.height,
+                        mupdf.ll_fz_pixmap_samples(band.this.m_internal),
+                        )
+            mupdf.fz_close_band_writer(writer)
+        finally:
+            mupdf.fz_close_output(out)
+
+    def remove_rotation(self):
+        """Set page rotation to 0 while maintaining visual appearance."""
+        rot = self.rotation  # normalized rotation value
+        if rot == 0:
+            return  Identity # nothing to do
+
+        # need to derotate the page's content
+        mb = self.mediabox  # current mediabox
+
+        if rot == 90:
+            # before derotation, shift content horizontally
+            mat0 = Matrix(1, 0, 0, 1, mb.y1 - mb.x1 - mb.x0 - mb.y0, 0)
+        elif rot == 270:
+            # before derotation, shift content vertically
+            mat0 = Matrix(1, 0, 0, 1, 0, mb.x1 - mb.y1 - mb.y0 - mb.x0)
+        else:  # rot = 180
+            mat0 = Matrix(1, 0, 0, 1, -2 * mb.x0, -2 * mb.y0)
+
+        # prefix with derotation matrix
+        mat = mat0 * self.derotation_matrix
+        cmd = _format_g(tuple(mat)) + ' cm '
+        cmd = cmd.encode('utf8')
+        _ = TOOLS._insert_contents(self, cmd, False)  # prepend to page contents
+
+        # swap x- and y-coordinates
+        if rot in (90, 270):
+            x0, y0, x1, y1 = mb
+            mb.x0 = y0
+            mb.y0 = x0
+            mb.x1 = y1
+            mb.y1 = x1
+            self.set_mediabox(mb)
+
+        self.set_rotation(0)
+        rot = ~mat  # inverse of the derotation matrix
+
+        for annot in self.annots():  # modify rectangles of annotations
+            r = annot.rect * rot
+            # TODO: only try to set rectangle for applicable annot types
+            annot.set_rect(r)
+        for link in self.get_links():  # modify 'from' rectangles of links
             r = link["from"] * rot
             self.delete_link(link)
             link["from"] = r
@@ -12172,26 +12799,16 @@ class Page:
         # list of all vector graphic rectangles
         prects = sorted([p["rect"] for p in paths], key=lambda r: (r.y1, r.x0))
 
-        new_rects = []  # the final list of the joined rectangles
-
         # -------------------------------------------------------------------------
         # The strategy is to identify and join all rects that are neighbors
         # -------------------------------------------------------------------------
-        while prects:  # the algorithm will empty this list
-            r = +prects[0]  # copy of first rectangle
-            repeat = True
-            while repeat:
-                repeat = False
-                for i in range(len(prects) - 1, 0, -1):  # from back to front
-                    if are_neighbors(prects[i], r):
-                        r |= prects[i].tl  # include in first rect
-                        r |= prects[i].br  # include in first rect
-                        del prects[i]  # delete this rect
-                        repeat = True
-
-            new_rects.append(r)
-            del prects[0]
-            prects = sorted(set(prects), key=lambda r: (r.y1, r.x0))
+        from . import _table_analysis
+        new_rects = [
+            +r  # do not hand out rects of the drawings
+            for r in _table_analysis.cluster_rects(
+                prects, are_neighbors, delta_x, delta_y
+            )
+        ]
 
         new_rects = sorted(set(new_rects), key=lambda r: (r.y1, r.x0))
         if not final_filter:
@@ -12489,7 +13106,8 @@ class Page:
 
         Args:
             rect: (rect-like) rectangle into which the text should be placed.
-            text: (str) text with optional HTML tags and stylings.
+            text: (str) text with optional HTML tags and stylings, or a Story,
+                or an HtmlBox for text inserted repeatedly.
             css: (str) CSS styling commands.
             scale_low: (float) force-fit content by scaling it down. Must be in
                 range [0, 1]. If 1, no scaling will take place. If 0, arbitrary
@@ -12531,62 +13149,24 @@ class Page:
         else:
             temp_rect = Rect(0, 0, rect.width, rect.height)
 
-        # use a small border by default
-        mycss = "body {margin:1px;}" + css  # append user CSS
-
-        # either make a story, or accept a given one
-        if isinstance(text, str):  # if a string, convert to a Story
-            story = Story(html=text, user_css=mycss, archive=archive)
-        elif isinstance(text, Story):
-            story = text
+        # either make a story, or accept a given one or a prepared HtmlBox
+        if isinstance(text, HtmlBox):
+            if css or archive:
+                raise ValueError("'css' and 'archive' are part of the HtmlBox")
+            layout = text._layout(temp_rect, scale_low, opacity, _scale_word_width, _verbose)
         else:
-            raise ValueError("'text' must be a string or a Story")
-        
-        # ----------------------------------------------------------------
-        # Find a scaling factor that lets our story fit in. Instead of scaling
-        # the text smaller, we instead look at how much bigger the rect needs
-        # to be to fit the text, then reverse the scaling to get how much we
-        # need to scale down the text.
-        # ----------------------------------------------------------------
-        rect_scale_max = None if scale_low == 0 else 1 / scale_low
-
-        fit = story.fit_scale(
-                temp_rect,
-                scale_min=1,
-                scale_max=rect_scale_max,
-                flags=mupdf.FZ_PLACE_STORY_FLAG_NO_OVERFLOW if _scale_word_width else 0,
-                verbose=_verbose,
-                )
-        
-        if not fit.big_enough:  # there was no fit
-            scale = 1 / fit.parameter
-            return (-1, scale)
-
-        # fit.filled is a tuple; we convert it in place to a Rect for
-        # convenience. (fit.rect is already a Rect.)
-        fit.filled = Rect(fit.filled)
-        assert (fit.rect.x0, fit.rect.y0) == (0, 0)
-        assert (fit.filled.x0, fit.filled.y0) == (0, 0)
-        
-        scale = 1 / fit.parameter
-        assert scale >= scale_low, f'{scale_low=} {scale=}'
-        
-        spare_height = max((fit.rect.y1 - fit.filled.y1) * scale, 0)
-
-        def rect_function(*args):
-            return fit.rect, fit.rect, None
-
-        # draw story on temp PDF page
-        doc = story.write_with_links(rect_function)
-
-        # Insert opacity if requested.
-        # For this, we prepend a command to the /Contents.
-        if 0 <= opacity < 1:
-            tpage = doc[0]  # load page
-            # generate /ExtGstate for the page
-            alp0 = tpage._set_opacity(CA=opacity, ca=opacity)
-            s = f"/{alp0} gs\n"  # generate graphic state command
-            TOOLS._insert_contents(tpage, s.encode(), 0)
+            if isinstance(text, str):  # if a string, convert to a Story
+                # use a small border by default
+                mycss = "body {margin:1px;}" + css  # append user CSS
+                story = Story(html=text, user_css=mycss, archive=archive)
+            elif isinstance(text, Story):
+                story = text
+            else:
+                raise ValueError("'text' must be a string, a Story or an HtmlBox")
+            layout = _htmlbox_layout(story, temp_rect, scale_low, opacity, _scale_word_width, _verbose)
+        spare_height, scale, fit_rect, doc, links = layout
+        if doc is None:  # there was no fit
+            return (spare_height, scale)
 
         # put result in target page
         page.show_pdf_page(rect, doc, 0, rotate=rotate, oc=oc, overlay=overlay)
@@ -12594,8 +13174,8 @@ class Page:
         # -------------------------------------------------------------------------
         # re-insert links in target rect (show_pdf_page cannot copy annotations)
         # -------------------------------------------------------------------------
-        # scaled center point of fit.rect
-        mp1 = (fit.rect.tl + fit.rect.br) / 2 * scale
+        # scaled center point of fit_rect
+        mp1 = (fit_rect.tl + fit_rect.br) / 2 * scale
 
         # center point of target rect
         mp2 = (rect.tl + rect.br) / 2
@@ -12611,8 +13191,9 @@ class Page:
         )
 
         # copy over links
-        for link in doc[0].get_links():
-            link["from"] *= mat
+        for link in links:
+            link = dict(link)
+            link["from"] = link["from"] * mat
             page.insert_link(link)
 
         return spare_height, scale
@@ -12941,6 +13522,8 @@ class Page:
                 link_id = xrefs[0]
                 val.xref = link_id[0]
                 val.id = link_id[2]
+                val._link_annots = xrefs
+                val._link_index = 0
         else:
             val.xref = 0
             val.id = ""
@@ -16605,6 +17188,40 @@ class TextPage:
         self._getNewBlockList(page_dict, raw)
         return page_dict
 
+    def _block_views(self, block, block_n, raw, out):
+        # Same selection and numbering of blocks as JM_make_textpage_dict().
+        tp_rect = mupdf.FzRect(self.this.m_internal.mediabox)
+        infinite = mupdf.fz_is_infinite_rect(tp_rect)
+        while block:
+            bbox = mupdf.FzRect(block.bbox)
+            if block.type == mupdf.FZ_STEXT_BLOCK_STRUCT:
+                down = extra.JM_stext_block_down(block)
+                if down:
+                    block_n += 1
+                    number = block_n
+                    blocks = []
+                    block_n = self._block_views(down, block_n, raw, blocks)
+                    out.append(TextBlock(self, block, number, raw, blocks))
+            elif block.type == mupdf.FZ_STEXT_BLOCK_IMAGE:
+                if infinite or mupdf.fz_contains_rect(tp_rect, bbox):
+                    block_n += 1
+                    out.append(TextBlock(self, block, block_n, raw))
+            elif infinite or JM_rects_overlap(tp_rect, bbox):
+                block_n += 1
+                out.append(TextBlock(self, block, block_n, raw))
+            block = block.next
+        return block_n
+
+    def blocks(self, raw=False):
+        """Return the blocks of extractDICT() / extractRAWDICT() as lazy views.
+
+        Items behave like the corresponding read-only dicts, but lines, spans
+        and chars are only created when accessed.
+        """
+        blocks = []
+        self._block_views(self.this.m_internal.first_block, -1, raw, blocks)
+        return blocks
+
     def extractBLOCKS(self):
         """Return a list with text block information."""
         if 1 or g_use_extra:
@@ -16854,6 +17471,101 @@ class TextPage:
                 buflen = 0
         return lines
 
+    _columns_typecodes = {
+            'x0': 'f', 'y0': 'f', 'x1': 'f', 'y1': 'f',
+            'origin_x': 'f', 'origin_y': 'f', 'size': 'f', 'dir_x': 'f', 'dir_y': 'f',
+            'ascender': 'f', 'descender': 'f',
+            'block': 'i', 'line': 'i', 'span': 'i', 'word': 'i', 'font': 'i',
+            'c': 'I', 'flags': 'I', 'char_flags': 'I', 'color': 'I', 'alpha': 'I',
+            }
+
+    def extract_columns(self, level='char', delimiters=None):
+        """Return chars, words or spans as a dict of columns.
+
+        Args:
+            level: 'char', 'word' or 'span'.
+            delimiters: (str) extra word delimiters, as in extractWORDS().
+        Returns:
+            A dict mapping names to `array.array` items with one entry per
+            char / word / span, plus list items 'text' (words, spans) and
+            'fonts' (chars, spans; the 'font' column indexes into it).
+        """
+        import array
+        levels = ('char', 'word', 'span')
+        if level not in levels:
+            raise ValueError(f'level must be one of {levels}: {level!r}')
+        if g_use_extra:
+            columns = extra.extract_columns(self.this, levels.index(level), delimiters)
+            for name, value in columns.items():
+                typecode = self._columns_typecodes.get(name)
+                if typecode:
+                    a = array.array(typecode)
+                    a.frombytes(value)
+                    columns[name] = a
+            return columns
+
+        if level == 'word':
+            names = ('x0', 'y0', 'x1', 'y1', 'text', 'block', 'line', 'word')
+            columns = {name: [] for name in names}
+            for word in self.extractWORDS(delimiters):
+                for name, value in zip(names, word):
+                    columns[name].append(value)
+        else:
+            names = [
+                    'x0', 'y0', 'x1', 'y1', 'block', 'line', 'span',
+                    'origin_x', 'origin_y', 'dir_x', 'dir_y', 'size', 'font', 'flags',
+                    'char_flags', 'color', 'alpha',
+                    ]
+            if level == 'char':
+                names += ['c']
+            else:
+                names += ['ascender', 'descender', 'text']
+            columns = {name: [] for name in names}
+            fonts = dict()
+            def add_blocks(blocks):
+                for block in blocks:
+                    if block['type'] == mupdf.FZ_STEXT_BLOCK_STRUCT:
+                        add_blocks(block['blocks'])
+                    if block['type'] != mupdf.FZ_STEXT_BLOCK_TEXT:
+                        continue
+                    for line_n, line in enumerate(block['lines']):
+                        for span_n, span in enumerate(line['spans']):
+                            font = fonts.setdefault(span['font'], len(fonts))
+                            items = span['chars'] if level == 'char' else [span]
+                            for item in items:
+                                for name, value in zip(('x0', 'y0', 'x1', 'y1'), item['bbox']):
+                                    columns[name].append(value)
+                                columns['origin_x'].append(item['origin'][0])
+                                columns['origin_y'].append(item['origin'][1])
+                                columns['dir_x'].append(line['dir'][0])
+                                columns['dir_y'].append(line['dir'][1])
+                                columns['size'].append(span['size'])
+                                columns['block'].append(block['number'])
+                                columns['line'].append(line_n)
+                                columns['span'].append(span_n)
+                                columns['font'].append(font)
+                                columns['flags'].append(span['flags'])
+                                columns['color'].append(span['color'])
+                                columns['alpha'].append(span['alpha'])
+                                if level == 'char':
+                                    columns['c'].append(ord(item['c']))
+                                    columns['char_flags'].append(
+                                            span['char_flags']
+                                            | (mupdf.FZ_STEXT_SYNTHETIC if item['synthetic'] else 0)
+                                            )
+                                else:
+                                    columns['char_flags'].append(span['char_flags'])
+                                    columns['ascender'].append(span['ascender'])
+                                    columns['descender'].append(span['descender'])
+                                    columns['text'].append(''.join(c['c'] for c in span['chars']))
+            add_blocks(self.extractRAWDICT()['blocks'])
+            columns['fonts'] = list(fonts)
+        for name, value in columns.items():
+            typecode = self._columns_typecodes.get(name)
+            if typecode:
+                columns[name] = array.array(typecode, value)
+        return columns
+
     def extractXHTML(self) -> str:
         """Return page content as a XHTML string."""
         return self._extractText(4)
@@ -16909,6 +17621,229 @@ class TextPage:
     extractTEXT = extractText
 
 
+class _TextView(collections.abc.Mapping):
+    '''
+    Base class of the items returned by TextPage.blocks(). Behaves like the
+    corresponding read-only dict of TextPage.extractDICT() / extractRAWDICT(),
+    but creates values only when they are accessed.
+    '''
+    __slots__ = ()
+
+    def __contains__(self, key):
+        return key in self._keys()
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {list(self._keys())}>'
+
+
+class TextBlock(_TextView):
+    '''
+    A block of a TextPage. Text blocks have keys "type", "number", "flags",
+    "bbox" and "lines", structure blocks have their child blocks in "blocks".
+    '''
+    __slots__ = ('_textpage', '_block', '_raw', 'number', '_blocks', '_lines', '_bbox', '_dict')
+
+    def __init__(self, textpage, block, number, raw, blocks=None):
+        self._textpage = textpage
+        self._block = block
+        self._raw = raw
+        self.number = number
+        self._blocks = blocks
+        self._lines = None
+        self._bbox = None
+        self._dict = None
+
+    @property
+    def type(self):
+        return self._block.type
+
+    def _keys(self):
+        if self._block.type == mupdf.FZ_STEXT_BLOCK_TEXT:
+            return (dictkey_type, dictkey_number, 'flags', dictkey_bbox, dictkey_lines)
+        keys = (dictkey_type, dictkey_number)
+        keys += tuple(k for k in self._block_dict() if k != dictkey_type)
+        if self._block.type == mupdf.FZ_STEXT_BLOCK_STRUCT:
+            keys += (dictkey_blocks,)
+        return keys
+
+    def _block_dict(self):
+        if self._dict is None:
+            self._dict = dict()
+            extra.JM_make_block_dict(self._block, self._dict)
+        return self._dict
+
+    def __getitem__(self, key):
+        if key == dictkey_type:
+            return self._block.type
+        if key == dictkey_number:
+            return self.number
+        if self._block.type == mupdf.FZ_STEXT_BLOCK_TEXT:
+            if key == dictkey_lines:
+                return self.lines
+            if key == dictkey_bbox:
+                return self.bbox
+        elif self._block.type == mupdf.FZ_STEXT_BLOCK_STRUCT:
+            if key == dictkey_blocks:
+                return self.blocks
+        return self._block_dict()[key]
+
+    @property
+    def blocks(self):
+        '''List of TextBlock items of a structure block.'''
+        return self._blocks
+
+    @property
+    def lines(self):
+        '''List of TextLine items of a text block.'''
+        if self._lines is None:
+            self._lines = []
+            if self._block.type == mupdf.FZ_STEXT_BLOCK_TEXT:
+                tp_rect = self._textpage.this.m_internal.mediabox
+                infinite = mupdf.fz_is_infinite_rect(mupdf.FzRect(tp_rect))
+                for line in mupdf.FzStextBlock(self._block):
+                    if not infinite and not JM_rects_overlap(tp_rect, line.m_internal.bbox):
+                        continue
+                    self._lines.append(TextLine(self, line))
+        return self._lines
+
+    @property
+    def bbox(self):
+        if self._block.type != mupdf.FZ_STEXT_BLOCK_TEXT:
+            return self._block_dict()[dictkey_bbox]
+        if self._bbox is None:
+            bbox = mupdf.FzRect(mupdf.FzRect.Fixed_EMPTY)
+            for line in self.lines:
+                bbox = mupdf.fz_union_rect(bbox, line._rect())
+            self._bbox = JM_py_from_rect(bbox)
+        return self._bbox
+
+
+class TextLine(_TextView):
+    '''
+    A line of a TextBlock, with keys "spans", "wmode", "dir" and "bbox".
+    '''
+    __slots__ = ('_parent', '_line', '_spans', '_line_rect', '_chars')
+
+    def __init__(self, parent, line):
+        self._parent = parent
+        self._line = line
+        self._spans = None
+        self._line_rect = None
+        self._chars = None
+
+    def _keys(self):
+        return (dictkey_spans, dictkey_wmode, dictkey_dir, dictkey_bbox)
+
+    def __getitem__(self, key):
+        if key == dictkey_spans:
+            return self.spans
+        if key == dictkey_wmode:
+            return self._line.m_internal.wmode
+        if key == dictkey_dir:
+            return JM_py_from_point(self._line.m_internal.dir)
+        if key == dictkey_bbox:
+            return self.bbox
+        raise KeyError(key)
+
+    def _rect(self):
+        if self._line_rect is None:
+            self.spans  # Sets self._line_rect.
+        return self._line_rect
+
+    @property
+    def bbox(self):
+        return JM_py_from_rect(self._rect())
+
+    @property
+    def spans(self):
+        '''List of TextSpan items.'''
+        if self._spans is None:
+            textpage = self._parent._textpage
+            line_dict = dict()
+            self._line_rect = extra.JM_make_spanlist(
+                    line_dict,
+                    self._line,
+                    0,
+                    mupdf.fz_new_buffer(64),
+                    mupdf.FzRect(textpage.this.m_internal.mediabox),
+                    )
+            self._spans = [TextSpan(self, i, span) for i, span in enumerate(line_dict[dictkey_spans])]
+        return self._spans
+
+    def _span_chars(self, span_n):
+        if self._chars is None:
+            self._chars = collections.defaultdict(list)
+            items = extra.JM_stext_line_chars(self._parent._textpage.this.m_internal, self._line.m_internal)
+            for item in items:
+                self._chars[item[0]].append(TextChar(item))
+        return self._chars[span_n]
+
+
+class TextSpan(_TextView):
+    '''
+    A span of a TextLine. Both "text" and "chars" can be accessed, whatever
+    the `raw` arg of TextPage.blocks().
+    '''
+    __slots__ = ('_parent', '_number', '_span')
+
+    def __init__(self, parent, number, span):
+        self._parent = parent
+        self._number = number
+        self._span = span
+
+    def _keys(self):
+        keys = list(self._span)
+        if self._parent._parent._raw:
+            keys[keys.index(dictkey_text)] = dictkey_chars
+        return keys
+
+    def __getitem__(self, key):
+        if key == dictkey_chars:
+            return self.chars
+        return self._span[key]
+
+    @property
+    def chars(self):
+        '''List of TextChar items.'''
+        return self._parent._span_chars(self._number)
+
+    @property
+    def text(self):
+        return self._span[dictkey_text]
+
+
+class TextChar(_TextView):
+    '''
+    A char of a TextSpan, with keys "origin", "bbox", "c" and "synthetic".
+    '''
+    __slots__ = ('_item',)
+
+    def __init__(self, item):
+        # (span, c, origin_x, origin_y, x0, y0, x1, y1, char_flags).
+        self._item = item
+
+    def _keys(self):
+        return (dictkey_origin, dictkey_bbox, dictkey_c, 'synthetic')
+
+    def __getitem__(self, key):
+        item = self._item
+        if key == dictkey_origin:
+            return item[2:4]
+        if key == dictkey_bbox:
+            return item[4:8]
+        if key == dictkey_c:
+            return chr(item[1])
+        if key == 'synthetic':
+            return bool(item[8] & mupdf.FZ_STEXT_SYNTHETIC)
+        raise KeyError(key)
+
+
 class TextWriter:
 
     def __init__(self, page_rect, opacity=1, color=None):
@@ -17086,6 +18021,30 @@ class TextWriter:
         std_width = rect.width - tolerance
         std_start = rect.x0 + tolerance
 
+        def fitting(lengths, start, width, gap=0):
+            """Number of items from lengths[start] that fit in 'width'.
+
+            Returns the largest n with sum(lengths[start:start + n]) +
+            gap * (n - 1) <= width, but at least 1. Running sums give a
+            first guess, which is then checked with this exact expression.
+            """
+            def total(n):
+                return sum(lengths[start:start + n]) + gap * (n - 1)
+
+            end = len(lengths)
+            n = 0
+            acc = -gap
+            for i in range(start, end):
+                acc += lengths[i] + gap
+                if acc > width:
+                    break
+                n += 1
+            while start + n < end and total(n + 1) <= width:
+                n += 1
+            while n > 1 and total(n) > width:
+                n -= 1
+            return max(n, 1)
+
         def norm_words(width, words):
             """Cut any word in pieces no longer than 'width'."""
             nwords = []
@@ -17099,17 +18058,12 @@ class TextWriter:
                     continue
 
                 # word longer than rect width - split it in parts
-                n = len(wl_lst)
-                while n > 0:
-                    wl = sum(wl_lst[:n])
-                    if wl <= width:
-                        nwords.append(w[:n])
-                        word_lengths.append(wl)
-                        w = w[n:]
-                        wl_lst = wl_lst[n:]
-                        n = len(wl_lst)
-                    else:
-                        n -= 1
+                start = 0
+                while start < len(wl_lst):
+                    n = fitting(wl_lst, start, width)
+                    nwords.append(w[start:start + n])
+                    word_lengths.append(sum(wl_lst[start:start + n]))
+                    start += n
             return nwords, word_lengths
 
         def output_justify(start, line):
@@ -17196,22 +18150,13 @@ class TextWriter:
             # cut in parts any words that are longer than rect width
             words, word_lengths = norm_words(width, words)
 
-            n = len(words)
-            while True:
-                line0 = " ".join(words[:n])
-                wl = sum(word_lengths[:n]) + space_len * (n - 1)
-                if wl <= width:
-                    new_lines.append((line0, wl))
-                    words = words[n:]
-                    word_lengths = word_lengths[n:]
-                    n = len(words)
-                    line0 = None
-                else:
-                    n -= 1
-
-                if len(words) == 0:
-                    break
-                assert n
+            start = 0
+            while start < len(words):
+                n = fitting(word_lengths, start, width, space_len)
+                line0 = " ".join(words[start:start + n])
+                wl = sum(word_lengths[start:start + n]) + space_len * (n - 1)
+                new_lines.append((line0, wl))
+                start += n
 
         # -------------------------------------------------------------------------
         # List of lines created. Each item is (text, tl), where 'tl' is the PDF
@@ -24885,6 +25830,7 @@ def apply_pages(
         pages=None,
         method='single',
         concurrency=None,
+        shared_memory=False,
         _stats=False,
         ):
     '''
@@ -24921,6 +25867,13 @@ def apply_pages(
         concurrency:
             Number of worker processes to use when operating concurrently. If
             None, we use the number of available CPUs.
+        shared_memory:
+            If true and `method` is 'mp' or 'fork', large bytes-like results
+            (for example from `Pixmap.samples` or `Pixmap.tobytes()`) and large
+            bytes-like items of tuple or list results are passed from worker
+            processes via memory-mapped files (in /dev/shm if available)
+            instead of being pickled, and are returned as read-only
+            memoryviews.
         _stats:
             Internal, may change or be removed. If true, we output simple
             timing diagnostics.
@@ -24928,56 +25881,155 @@ def apply_pages(
     Note: We require a file path rather than a Document, because Document
     instances do not work properly after a fork - internal file descriptor
     offsets are shared between the parent and child processes.
+    
+    See also `iter_pages()`, which yields results as they become available.
     '''
     if _stats:
         t0 = time.time()
     
+    pages = _apply_pages_pages(path, pages, _stats)
+    ret = [None] * len(pages)
+    for i, r in _apply_pages_iter(
+            path,
+            pagefn,
+            pagefn_args,
+            pagefn_kwargs,
+            initfn,
+            initfn_args,
+            initfn_kwargs,
+            pages,
+            method,
+            concurrency,
+            None,
+            shared_memory,
+            _stats,
+            ):
+        ret[i] = r
+
+    if _stats:
+        t = time.time() - t0
+        log(f'{t:.2f}s: total.')
+    return ret
+
+
+def iter_pages(
+        path,
+        pagefn,
+        *,
+        pagefn_args=(),
+        pagefn_kwargs=dict(),
+        initfn=None,
+        initfn_args=(),
+        initfn_kwargs=dict(),
+        pages=None,
+        method='single',
+        concurrency=None,
+        depth=None,
+        shared_memory=False,
+        _stats=False,
+        ):
+    '''
+    Like `apply_pages()` but is a generator that yields `(pno, result)`
+    tuples as soon as each page's `pagefn()` returns, instead of returning a
+    list after all pages have been processed.
+    
+    With concurrency, results are yielded in the order in which workers
+    finish, not in page order.
+    
+    Args:
+        depth:
+            Maximum number of pages that have been sent to workers but whose
+            results have not yet been yielded. This bounds memory use if the
+            caller is slower than the workers. If None we use twice the
+            number of workers. Ignored if `method` is 'single'.
+        
+        Other args are as for `apply_pages()`.
+    
+    If the generator is closed early, pending pages are abandoned and worker
+    processes are shut down.
+    '''
+    pages = _apply_pages_pages(path, pages, _stats)
+    if depth is None:
+        depth = 2 * (concurrency or os.cpu_count())
+    for i, r in _apply_pages_iter(
+            path,
+            pagefn,
+            pagefn_args,
+            pagefn_kwargs,
+            initfn,
+            initfn_args,
+            initfn_kwargs,
+            pages,
+            method,
+            concurrency,
+            depth,
+            shared_memory,
+            _stats,
+            ):
+        yield pages[i], r
+
+
+def _apply_pages_pages(path, pages, _stats):
+    '''
+    Returns `pages` as a list, defaulting to all pages in document `path`.
+    '''
+    if pages is None:
+        if _stats:
+            t = time.time()
+        with Document(path) as document:
+            pages = list(range(len(document)))
+        if _stats:
+            t = time.time() - t
+            log(f'{t:.2f}s: count pages.')
+    return list(pages)
+
+
+def _apply_pages_iter(
+        path,
+        pagefn,
+        pagefn_args,
+        pagefn_kwargs,
+        initfn,
+        initfn_args,
+        initfn_kwargs,
+        pages,
+        method,
+        concurrency,
+        depth,
+        shared_memory,
+        _stats,
+        ):
+    '''
+    Implementation of `apply_pages()` and `iter_pages()`. Yields `(index,
+    result)` where `index` is position within list `pages`.
+    '''
+    if _stats:
+        t = time.time()
+    
     if method == 'single':
         if initfn:
             initfn(*initfn_args, **initfn_kwargs)
-        ret = list()
-        document = Document(path)
-        if pages is None:
-            pages = range(len(document))
-        for pno in pages:
-            page = document[pno]
-            r = pagefn(page, *pagefn_args, **initfn_kwargs)
-            ret.append(r)
+        with Document(path) as document:
+            for i, pno in enumerate(pages):
+                page = document[pno]
+                yield i, pagefn(page, *pagefn_args, **pagefn_kwargs)
     
     else:
         # Use concurrency.
         #
         from . import _apply_pages
-    
-        if pages is None:
-            if _stats:
-                t = time.time()
-            with Document(path) as document:
-                num_pages = len(document)
-                pages = list(range(num_pages))
-            if _stats:
-                t = time.time() - t
-                log(f'{t:.2f}s: count pages.')
-    
-        if _stats:
-            t = time.time()
         
         if method == 'mp':
-            ret = _apply_pages._multiprocessing(
-                    path,
-                    pages,
-                    pagefn,
-                    pagefn_args,
-                    pagefn_kwargs,
-                    initfn,
-                    initfn_args,
-                    initfn_kwargs,
-                    concurrency,
-                    _stats,
-                    )
-    
+            fn = _apply_pages._multiprocessing
         elif method == 'fork':
-            ret = _apply_pages._fork(
+            fn = _apply_pages._fork
+        else:
+            assert 0, f'Unrecognised {method=}.'
+        
+        # We close the generator before removing `shared_dir`, so that
+        # workers have finished writing to it.
+        with _apply_pages._shared_directory() if shared_memory else contextlib.nullcontext() as shared_dir, \
+                contextlib.closing(fn(
                     path,
                     pages,
                     pagefn,
@@ -24988,19 +26040,17 @@ def apply_pages(
                     initfn_kwargs,
                     concurrency,
                     _stats,
-                    )
-        
-        else:
-            assert 0, f'Unrecognised {method=}.'
-        
-        if _stats:
-            t = time.time() - t
-            log(f'{t:.2f}s: work.')
-
+                    depth,
+                    shared_dir,
+                    )) as results:
+            for i, r in results:
+                if shared_dir:
+                    r = _apply_pages._shared_get(r)
+                yield i, r
+    
     if _stats:
-        t = time.time() - t0
-        log(f'{t:.2f}s: total.')
-    return ret
+        t = time.time() - t
+        log(f'{t:.2f}s: work.')
 
 
 def get_text(
@@ -25067,6 +26117,281 @@ def get_text(
             )
 
 
+def apply_documents(
+        paths,
+        pagefn,
+        *,
+        pagefn_args=(),
+        pagefn_kwargs=dict(),
+        initfn=None,
+        initfn_args=(),
+        initfn_kwargs=dict(),
+        passwords=None,
+        concurrency=None,
+        unit_pages=None,
+        shared_memory=False,
+        _stats=False,
+        ):
+    '''
+    Generator that runs `pagefn()` on all pages of many documents using
+    worker processes, yielding `(path, pno, result)` in the order in which
+    pages complete.
+    
+    Work is scheduled in units of consecutive pages of a document, so workers
+    process many small documents in parallel and a single large document is
+    shared between all workers rather than making the others wait.
+    
+    Errors do not stop processing of other documents or pages:
+    
+    * If a document cannot be opened or authenticated, we yield `(path, None,
+      exception)`.
+    * If `pagefn()` raises an exception, we yield `(path, pno, exception)`.
+    * If a unit's results cannot be returned from a worker, for example
+      because they cannot be pickled, we yield `(path, pno, exception)` for
+      each page of the unit.
+    
+    Args:
+        paths:
+            Iterable of document paths. Consumed lazily.
+        pagefn
+        pagefn_args
+        pagefn_kwargs
+        initfn
+        initfn_args
+        initfn_kwargs
+        concurrency
+        shared_memory:
+            As for `apply_pages()`.
+        passwords:
+            None or a dict mapping paths to passwords for encrypted documents.
+        unit_pages:
+            Number of pages in each unit of work. If None, we choose a size
+            based on the measured time per page.
+        _stats:
+            If true, we log throughput at the end.
+    
+    For repeated calls, create a `PagePool` and use its `apply_documents()`
+    method, which avoids starting new worker processes each time.
+    '''
+    with PagePool(
+            concurrency,
+            initfn=initfn,
+            initfn_args=initfn_args,
+            initfn_kwargs=initfn_kwargs,
+            ) as pool:
+        yield from pool.apply_documents(
+                paths,
+                pagefn,
+                pagefn_args=pagefn_args,
+                pagefn_kwargs=pagefn_kwargs,
+                passwords=passwords,
+                unit_pages=unit_pages,
+                shared_memory=shared_memory,
+                )
+        if _stats:
+            log(f'{pool.stats}')
+
+class PagePool:
+    '''
+    Pool of worker processes for running a function on the pages of many
+    documents.
+    
+    `apply_pages(method='mp')` creates new worker processes for each call,
+    which then have to import pymupdf and open the document. A PagePool keeps
+    its workers running until `close()` is called, and each worker keeps up
+    to `max_documents` recently used Documents open, so it is much faster
+    for many calls on small documents.
+    
+    Args:
+        concurrency:
+            Number of worker processes. If None, we use the number of
+            available CPUs.
+        max_documents:
+            Maximum number of Documents that each worker keeps open. Least
+            recently used Documents are closed first. Documents whose file
+            has been modified since they were opened are reopened.
+        initfn:
+            If true, called once in each worker process; is passed
+            (*initfn_args, **initfn_kwargs).
+        initfn_args
+        initfn_kwargs:
+            Args to pass to initfn. Must be picklable.
+    
+    Attribute `stats` has information about the most recent call of
+    `apply_pages()`, `iter_pages()` or `get_text()`: `.path`, `.num_pages`,
+    `.num_batches`, `.num_opens` (number of times a worker had to open the
+    document), `.t_worker` (total time spent in workers) and `.t` (elapsed
+    time).
+    
+    Can be used as a context manager.
+    '''
+    def __init__(
+            self,
+            concurrency=None,
+            *,
+            max_documents=16,
+            initfn=None,
+            initfn_args=(),
+            initfn_kwargs=dict(),
+            ):
+        import multiprocessing
+        from . import _apply_pages
+        if concurrency is None:
+            concurrency = multiprocessing.cpu_count()
+        assert max_documents >= 1, f'Invalid {max_documents=}.'
+        self.concurrency = concurrency
+        self.stats = None
+        self._pool = multiprocessing.Pool(
+                concurrency,
+                _apply_pages._pool_worker_init,
+                (max_documents, initfn, initfn_args, initfn_kwargs),
+                )
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+    
+    def apply_pages(
+            self,
+            path,
+            pagefn,
+            *,
+            pagefn_args=(),
+            pagefn_kwargs=dict(),
+            pages=None,
+            shared_memory=False,
+            ):
+        '''
+        Returns list of results from `pagefn()`. Args are as for
+        `pymupdf.apply_pages()`.
+        '''
+        pages = _apply_pages_pages(path, pages, False)
+        ret = [None] * len(pages)
+        for i, r in self._iter(path, pagefn, pagefn_args, pagefn_kwargs, pages, None, shared_memory):
+            ret[i] = r
+        return ret
+    
+    def iter_pages(
+            self,
+            path,
+            pagefn,
+            *,
+            pagefn_args=(),
+            pagefn_kwargs=dict(),
+            pages=None,
+            depth=None,
+            shared_memory=False,
+            ):
+        '''
+        Yields `(pno, result)` as results become available. Args are as for
+        `pymupdf.iter_pages()`.
+        '''
+        pages = _apply_pages_pages(path, pages, False)
+        if depth is None:
+            depth = 2 * self.concurrency
+        for i, r in self._iter(path, pagefn, pagefn_args, pagefn_kwargs, pages, depth, shared_memory):
+            yield pages[i], r
+    
+    def get_text(
+            self,
+            path,
+            *,
+            pages=None,
+            option='text',
+            clip=None,
+            flags=None,
+            textpage=None,
+            sort=False,
+            delimiters=None,
+            ):
+        '''
+        Returns list of results from `Page.get_text()`. Args are as for
+        `pymupdf.get_text()`.
+        '''
+        args_dict = dict(
+                option=option,
+                clip=clip,
+                flags=flags,
+                textpage=textpage,
+                sort=sort,
+                delimiters=delimiters,
+                )
+        return self.apply_pages(path, Page.get_text, pagefn_kwargs=args_dict, pages=pages)
+    
+    def apply_documents(
+            self,
+            paths,
+            pagefn,
+            *,
+            pagefn_args=(),
+            pagefn_kwargs=dict(),
+            passwords=None,
+            unit_pages=None,
+            shared_memory=False,
+            ):
+        '''
+        Generator that runs `pagefn()` on all pages of many documents,
+        yielding `(path, pno, result)` in the order in which pages complete.
+        See `pymupdf.apply_documents()` for details.
+        
+        Attribute `stats` is updated as results arrive, and also has method
+        `.pages_per_second()`.
+        '''
+        from . import _apply_pages
+        assert self._pool, 'PagePool is closed.'
+        self.stats = _apply_pages._DocumentsStats()
+        with _apply_pages._shared_directory() if shared_memory else contextlib.nullcontext() as shared_dir, \
+                contextlib.closing(_apply_pages._pool_documents_iter(
+                    self._pool,
+                    self.concurrency,
+                    paths,
+                    pagefn,
+                    pagefn_args,
+                    pagefn_kwargs,
+                    passwords,
+                    unit_pages,
+                    shared_dir,
+                    self.stats,
+                    )) as results:
+            yield from results
+    
+    def close(self):
+        '''
+        Waits for outstanding work and terminates the worker processes.
+        '''
+        if self._pool:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+    
+    def _iter(self, path, pagefn, pagefn_args, pagefn_kwargs, pages, depth, shared_memory):
+        from . import _apply_pages
+        assert self._pool, 'PagePool is closed.'
+        path = os.path.abspath(path)
+        self.stats = _apply_pages._JobStats(path, len(pages))
+        # Closing `_pool_job()` waits for batches that are still running, so
+        # they do not write to `shared_dir` after we have removed it.
+        with _apply_pages._shared_directory() if shared_memory else contextlib.nullcontext() as shared_dir, \
+                contextlib.closing(_apply_pages._pool_job(
+                    self._pool,
+                    self.concurrency,
+                    path,
+                    pages,
+                    pagefn,
+                    pagefn_args,
+                    pagefn_kwargs,
+                    depth,
+                    self.stats,
+                    shared_dir,
+                    )) as results:
+            for i, r in results:
+                if shared_dir:
+                    r = _apply_pages._shared_get(r)
+                yield i, r
+
+
 class TOOLS:
     '''
     We use @staticmethod to avoid the need to create an instance of this class.
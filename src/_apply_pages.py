@@ -1,5 +1,10 @@
+import collections
+import math
+import mmap
 import multiprocessing
 import os
+import queue
+import tempfile
 import time
 
 import pymupdf
@@ -7,6 +12,22 @@ import pymupdf
 
 # Support for concurrent processing of document pages.
 #
+# The `_multiprocessing()` and `_fork()` backends are generators that yield
+# `(index, result)` tuples in the order in which workers finish, where `index`
+# is the position within `pages`. At most `depth` pages are in flight (sent to
+# workers but not yet yielded) at any time, which bounds memory use in the
+# parent when the caller consumes results slowly.
+#
+# Pages are sent to workers in batches of consecutive entries in `pages`, see
+# `_Batches`. This reduces IPC overhead for documents with many cheap pages,
+# and keeps neighbouring pages in the same worker, where they share the
+# worker's Document and its cached page tree and resources.
+#
+
+# Approximate number of seconds of work that we aim to send to a worker in a
+# single batch.
+_batch_time = 0.05
+
 
 class _worker_State:
     pass
@@ -22,6 +43,7 @@ def _worker_init(
         pagefn_args,
         pagefn_kwargs,
         stats,
+        shared_dir=None,
         ):
     # pylint: disable=attribute-defined-outside-init
     _worker_state.path = path
@@ -29,6 +51,7 @@ def _worker_init(
     _worker_state.pagefn_args = pagefn_args
     _worker_state.pagefn_kwargs = pagefn_kwargs
     _worker_state.stats = stats
+    _worker_state.shared_dir = shared_dir
     _worker_state.document = None
     if initfn:
         initfn(*initfn_args, **initfn_kwargs)
@@ -40,6 +63,80 @@ def _stats_write(t, label):
         pymupdf.log(f'{os.getpid()=}: {t:2f}s: {label}.')   # pylint: disable=c-extension-no-member
 
 
+class _Batches:
+    '''
+    Splits indexes `0..num_pages-1` into consecutive batches.
+    
+    Batch sizes adapt to the per-page cost measured by workers: we aim for
+    each batch to take about `_batch_time` seconds, so expensive pages are
+    sent one at a time and cheap pages in large batches. Batches are also
+    limited so that there is still work for all workers near the end.
+    
+    We keep at most `2 * concurrency` batches and `depth` pages in flight.
+    '''
+    def __init__(self, num_pages, concurrency, depth):
+        self.num_pages = num_pages
+        self.concurrency = concurrency
+        self.depth = depth
+        self.next_index = 0
+        self.page_time = None
+        self.in_flight_batches = 0
+        self.in_flight_pages = 0
+        self.num_batches = 0
+    
+    def next(self):
+        '''
+        Returns `(start, stop)` for the next batch, or None if we have
+        finished or have enough work in flight.
+        '''
+        remaining = self.num_pages - self.next_index
+        space = self.depth - self.in_flight_pages
+        if not remaining or space <= 0:
+            return None
+        if self.in_flight_batches >= 2 * self.concurrency:
+            return None
+        if self.page_time is None:
+            n = 1
+        else:
+            n = int(_batch_time / max(self.page_time, 1e-6))
+        n = min(n, math.ceil(remaining / (2 * self.concurrency)), space)
+        n = max(n, 1)
+        start = self.next_index
+        self.next_index += n
+        self.in_flight_batches += 1
+        self.in_flight_pages += n
+        self.num_batches += 1
+        return start, self.next_index
+    
+    def batch_done(self, num_pages, t):
+        '''
+        Updates state after a batch of `num_pages` pages that took `t`
+        seconds.
+        '''
+        self.in_flight_batches -= 1
+        page_time = t / num_pages
+        if self.page_time is None:
+            self.page_time = page_time
+        else:
+            self.page_time = (self.page_time + page_time) / 2
+    
+    def page_done(self):
+        '''
+        Called when a page's result has been passed to our caller.
+        '''
+        self.in_flight_pages -= 1
+
+
+def _depth(depth, num_pages):
+    '''
+    Returns maximum number of pages in flight.
+    '''
+    if depth is None:
+        return num_pages
+    assert depth > 0, f'Invalid {depth=}.'
+    return depth
+
+
 def _worker_fn(page_number):
     # Create Document from filename if we haven't already done so.
     if not _worker_state.document:
@@ -66,7 +163,81 @@ def _worker_fn(page_number):
         _stats_write(t, '_worker_state.pagefn()')
     
     return ret
+
+
+def _worker_batch_fn(page_numbers):
+    '''
+    Returns `(results, t)` where `results` is list of results from
+    `_worker_fn()` for each item in `page_numbers`, and `t` is the time taken.
+    '''
+    t = time.time()
+    ret = list()
+    for page_number in page_numbers:
+        r = _worker_fn(page_number)
+        if _worker_state.shared_dir:
+            r = _shared_put(r, _worker_state.shared_dir)
+        ret.append(r)
+    return ret, time.time() - t
+
+
+def _pool_iter(pool, batches, pages, fn, args, on_batch=None):
+    '''
+    Yields `(index, result)` for all pages, using `multiprocessing.Pool`
+    `pool` to run `fn(*args, page_numbers)` for each batch from `_Batches`
+    `batches`.
+    
+    `fn()` must return a tuple whose first two items are `(results, t)`. If
+    `on_batch` is not None, it is called with each such tuple.
+    
+    If we are closed early or raise an exception, we wait for batches that
+    are still running and discard their results. Otherwise they could write
+    shared-memory results into a directory that our caller has removed.
+    '''
+    # Callbacks are run in a Pool thread and write `(start, r, exception)` to
+    # `done`.
+    done = queue.Queue()
+    in_flight = 0
+    
+    def submit():
+        nonlocal in_flight
+        while 1:
+            batch = batches.next()
+            if not batch:
+                break
+            start, stop = batch
+            pool.apply_async(
+                    fn,
+                    (*args, pages[start:stop]),
+                    callback=lambda r, start=start: done.put((start, r, None)),
+                    error_callback=lambda e, start=start: done.put((start, None, e)),
+                    )
+            in_flight += 1
     
+    try:
+        submit()
+        while batches.in_flight_batches:
+            start, r, e = done.get()
+            in_flight -= 1
+            if e is not None:
+                raise e
+            results, t = r[:2]
+            batches.batch_done(len(results), t)
+            if on_batch:
+                on_batch(r)
+            # Keep workers busy while our caller handles `results`.
+            submit()
+            for i, ret in enumerate(results):
+                batches.page_done()
+                submit()
+                yield start + i, ret
+    finally:
+        while in_flight:
+            r = done.get()[1]
+            in_flight -= 1
+            if r is not None:
+                for ret in r[0]:
+                    _shared_discard(ret)
+
 
 def _multiprocessing(
         path,
@@ -79,8 +250,13 @@ def _multiprocessing(
         initfn_kwargs,
         concurrency,
         stats,
+        depth=None,
+        shared_dir=None,
         ):
     #print(f'_worker_mp(): {concurrency=}', flush=1)
+    if concurrency is None:
+        concurrency = multiprocessing.cpu_count()
+    batches = _Batches(len(pages), concurrency, _depth(depth, len(pages)))
     with multiprocessing.Pool(
             concurrency,
             _worker_init,
@@ -89,10 +265,12 @@ def _multiprocessing(
                 initfn, initfn_args, initfn_kwargs,
                 pagefn, pagefn_args, pagefn_kwargs,
                 stats,
+                shared_dir,
             ),
             ) as pool:
-        result = pool.map_async(_worker_fn, pages)
-        return result.get()
+        yield from _pool_iter(pool, batches, pages, _worker_batch_fn, ())
+    if stats:
+        pymupdf.log(f'{len(pages)=} {batches.num_batches=} {batches.page_time=}')   # pylint: disable=c-extension-no-member
     
 
 def _fork(
@@ -106,13 +284,17 @@ def _fork(
         initfn_kwargs,
         concurrency,
         stats,
+        depth=None,
+        shared_dir=None,
         ):
     verbose = 0
     if concurrency is None:
         concurrency = multiprocessing.cpu_count()
-    # We write page numbers to `queue_down` and read `(page_num, text)` from
-    # `queue_up`. Workers each repeatedly read the next available page number
-    # from `queue_down`, extract the text and write it onto `queue_up`.
+    batches = _Batches(len(pages), concurrency, _depth(depth, len(pages)))
+    # We write `(start, page_numbers)` to `queue_down` and read `(start,
+    # (results, t))` from `queue_up`. Workers each repeatedly read the next
+    # available batch of page numbers from `queue_down`, extract the text and
+    # write it onto `queue_up`.
     #
     # This is better than pre-allocating a subset of pages to each worker
     # because it ensures there will never be idle workers until we are near the
@@ -121,7 +303,6 @@ def _fork(
     queue_down = multiprocessing.Queue()
     queue_up = multiprocessing.Queue()
     def childfn():
-        document = None
         if verbose:
             pymupdf.log(f'{os.getpid()=}: {initfn=} {initfn_args=}')
         _worker_init(
@@ -133,50 +314,34 @@ def _fork(
                 pagefn_args,
                 pagefn_kwargs,
                 stats,
+                shared_dir,
                 )
         while 1:
             if verbose:
                 pymupdf.log(f'{os.getpid()=}: calling get().')
-            page_num = queue_down.get()
+            item = queue_down.get()
             if verbose:
-                pymupdf.log(f'{os.getpid()=}: {page_num=}.')
-            if page_num is None:
+                pymupdf.log(f'{os.getpid()=}: {item=}.')
+            if item is None:
                 break
+            start, page_numbers = item
             try:
-                if not document:
-                    if stats:
-                        t = time.time()
-                    document = pymupdf.Document(path)   # pylint: disable=c-extension-no-member
-                    if stats:
-                        _stats_write(t, 'pymupdf.Document(path)')
-                
-                if stats:
-                    t = time.time()
-                page = document[page_num]
-                if stats:
-                    _stats_write(t, 'document[page_num]')
-                
-                if verbose:
-                    pymupdf.log(f'{os.getpid()=}: {_worker_state=}')
-                
-                if stats:
-                    t = time.time()
-                ret = pagefn(
-                        page,
-                        *_worker_state.pagefn_args,
-                        **_worker_state.pagefn_kwargs,
-                        )
-                if stats:
-                    _stats_write(t, f'{page_num=} pagefn()')
+                ret = _worker_batch_fn(page_numbers)
             except Exception as e:
                 if verbose: pymupdf.log(f'{os.getpid()=}: exception {e=}')
                 ret = e
             if verbose:
-                pymupdf.log(f'{os.getpid()=}: sending {page_num=} {ret=}')
+                pymupdf.log(f'{os.getpid()=}: sending {start=} {ret=}')
                 
-            queue_up.put( (page_num, ret) )
-
-    error = None
+            queue_up.put( (start, ret) )
+    
+    def submit():
+        while 1:
+            batch = batches.next()
+            if not batch:
+                break
+            start, stop = batch
+            queue_down.put( (start, pages[start:stop]) )
 
     pids = list()
     try:
@@ -201,45 +366,39 @@ def _fork(
         if stats:
             _stats_write(t, 'create child processes')
 
-        # Send page numbers.
-        if stats:
-            t = time.time()
+        # Send initial batches; thereafter we send new batches as results
+        # arrive and are passed to our caller.
         if verbose:
             pymupdf.log(f'Sending page numbers.')
-        for page_num in range(len(pages)):
-            queue_down.put(page_num)
-        if stats:
-            _stats_write(t, 'Send page numbers')
+        submit()
 
         # Collect results. We give up if any worker sends an exception instead
         # of text, but this hasn't been tested.
-        ret = [None] * len(pages)
-        for i in range(len(pages)):
-            page_num, text = queue_up.get()
+        while batches.in_flight_batches:
+            start, r = queue_up.get()
             if verbose:
-                pymupdf.log(f'{page_num=} {len(text)=}')
-            assert ret[page_num] is None
-            if isinstance(text, Exception):
-                if not error:
-                    error = text
-                break
-            ret[page_num] = text
-
+                pymupdf.log(f'{start=} {type(r)=}')
+            if isinstance(r, Exception):
+                raise r
+            results, t = r
+            batches.batch_done(len(results), t)
+            submit()
+            for i, ret in enumerate(results):
+                batches.page_done()
+                submit()
+                yield start + i, ret
+        if stats:
+            pymupdf.log(f'{len(pages)=} {batches.num_batches=} {batches.page_time=}')   # pylint: disable=c-extension-no-member
+        
+    finally:
         # Close queue. This should cause exception in workers and terminate
         # them, but on macos-arm64 this does not seem to happen, so we also
         # send None, which makes workers terminate.
-        for i in range(concurrency):
+        for i in range(len(pids)):
             queue_down.put(None)
         if verbose: pymupdf.log(f'Closing queues.')
         queue_down.close()
-
-        if error:
-            raise error
-        if verbose:
-            pymupdf.log(f'After concurrent, returning {len(ret)=}')
-        return ret
         
-    finally:
         # Join all child processes.
         if stats:
             t = time.time()
@@ -251,3 +410,423 @@ def _fork(
                 pymupdf.log(f'{pid=} => {e=}')
         if stats:
             _stats_write(t, 'Join all child proceses')
+
+
+# Support for `pymupdf.PagePool`.
+#
+# Worker processes are long-lived and are sent the path and `pagefn` with
+# each batch of pages, so a single pool can be used for many documents. Each
+# worker keeps an LRU cache of open Documents.
+#
+
+_pool_documents = collections.OrderedDict()
+_pool_max_documents = 1
+
+
+def _pool_worker_init(max_documents, initfn, initfn_args, initfn_kwargs):
+    global _pool_max_documents
+    _pool_max_documents = max_documents
+    if initfn:
+        initfn(*initfn_args, **initfn_kwargs)
+
+
+def _pool_document(path, password=None):
+    '''
+    Returns `(document, opened)` where `document` is a Document for `path`
+    from our cache, and `opened` is true if we had to open it.
+    
+    If the document is encrypted we authenticate with `password`.
+    '''
+    # Reopen if the file has changed since we opened it.
+    st = os.stat(path)
+    stamp = st.st_mtime_ns, st.st_size
+    item = _pool_documents.get(path)
+    if item:
+        if item[0] == stamp:
+            _pool_documents.move_to_end(path)
+            return item[1], False
+        del _pool_documents[path]
+        item[1].close()
+    while len(_pool_documents) >= _pool_max_documents:
+        _, (_, document) = _pool_documents.popitem(last=False)
+        document.close()
+    document = pymupdf.Document(path)   # pylint: disable=c-extension-no-member
+    if document.needs_pass and not document.authenticate(password or ''):
+        document.close()
+        raise ValueError(f'Cannot authenticate encrypted document: {path!r}.')
+    _pool_documents[path] = stamp, document
+    return document, True
+
+
+def _pool_batch_fn(path, pagefn, pagefn_args, pagefn_kwargs, shared_dir, page_numbers):
+    '''
+    Returns `(results, t, opened)`.
+    '''
+    t = time.time()
+    document, opened = _pool_document(path)
+    results = list()
+    for page_number in page_numbers:
+        page = document[page_number]
+        r = pagefn(page, *pagefn_args, **pagefn_kwargs)
+        if shared_dir:
+            r = _shared_put(r, shared_dir)
+        results.append(r)
+    return results, time.time() - t, opened
+
+
+class _JobStats:
+    '''
+    Statistics for a single `pymupdf.PagePool` job.
+    '''
+    def __init__(self, path, num_pages):
+        self.path = path
+        self.num_pages = num_pages
+        self.num_batches = 0
+        self.num_opens = 0
+        self.t_worker = 0
+        self.t = 0
+        self._t0 = time.time()
+    
+    def batch_done(self, r):
+        _, t, opened = r
+        self.num_batches += 1
+        self.num_opens += opened
+        self.t_worker += t
+        self.t = time.time() - self._t0
+    
+    def __repr__(self):
+        return (
+                f'_JobStats(path={self.path!r} num_pages={self.num_pages}'
+                f' num_batches={self.num_batches} num_opens={self.num_opens}'
+                f' t_worker={self.t_worker:.3f} t={self.t:.3f})'
+                )
+
+
+def _pool_job(pool, concurrency, path, pages, pagefn, pagefn_args, pagefn_kwargs, depth, stats, shared_dir):
+    '''
+    Yields `(index, result)` for all `pages` of `path`, using `pool` which
+    was created with `_pool_worker_init()`. Updates `_JobStats` `stats` as
+    batches complete.
+    '''
+    batches = _Batches(len(pages), concurrency, _depth(depth, len(pages)))
+    yield from _pool_iter(
+            pool,
+            batches,
+            pages,
+            _pool_batch_fn,
+            (path, pagefn, pagefn_args, pagefn_kwargs, shared_dir),
+            stats.batch_done,
+            )
+
+
+# Support for `pymupdf.PagePool.apply_documents()`.
+#
+# Work units are `(path, start, stop)` page ranges. Initially we send one
+# unit per document with `stop=None`; the worker processes the first pages
+# and tells us the page count, and we then queue the rest of the document as
+# further units. Idle workers take the next unit from the Pool's shared task
+# queue, so a single large document is spread across all workers instead of
+# leaving them idle. We prefer units from documents that we have already
+# started, which keeps few documents open at once and lets workers reuse
+# their cached Documents.
+#
+
+def _pool_unit_fn(
+        path,
+        password,
+        start,
+        stop,
+        unit_pages,
+        pagefn,
+        pagefn_args,
+        pagefn_kwargs,
+        shared_dir,
+        ):
+    '''
+    Returns `(results, t, opened, count)` for pages `start..stop-1` of `path`,
+    where `count` is the number of pages in the document. If `stop` is None
+    we process up to `unit_pages` pages. Exceptions from `pagefn()` are
+    returned as results.
+    
+    If the document cannot be opened or authenticated, returns `(exception,
+    t, False, None)`.
+    '''
+    t = time.time()
+    try:
+        document, opened = _pool_document(path, password)
+    except Exception as e:
+        return e, time.time() - t, False, None
+    count = len(document)
+    if stop is None:
+        stop = min(count, start + unit_pages)
+    results = list()
+    for page_number in range(start, stop):
+        try:
+            page = document[page_number]
+            r = pagefn(page, *pagefn_args, **pagefn_kwargs)
+            if shared_dir:
+                r = _shared_put(r, shared_dir)
+        except Exception as e:
+            r = e
+        results.append(r)
+    return results, time.time() - t, opened, count
+
+
+class _DocumentsStats:
+    '''
+    Statistics for `pymupdf.PagePool.apply_documents()`.
+    '''
+    def __init__(self):
+        self.num_documents = 0
+        self.num_pages = 0
+        self.num_errors = 0
+        self.num_batches = 0
+        self.num_opens = 0
+        self.t_worker = 0
+        self.t = 0
+        self._t0 = time.time()
+    
+    def pages_per_second(self):
+        return self.num_pages / self.t if self.t else 0
+    
+    def __repr__(self):
+        return (
+                f'_DocumentsStats(num_documents={self.num_documents}'
+                f' num_pages={self.num_pages} num_errors={self.num_errors}'
+                f' num_batches={self.num_batches} num_opens={self.num_opens}'
+                f' t_worker={self.t_worker:.3f} t={self.t:.3f}'
+                f' pages_per_second={self.pages_per_second():.1f})'
+                )
+
+
+def _pool_documents_iter(
+        pool,
+        concurrency,
+        paths,
+        pagefn,
+        pagefn_args,
+        pagefn_kwargs,
+        passwords,
+        unit_pages,
+        shared_dir,
+        stats,
+        ):
+    '''
+    Yields `(path, pno, result)` for all pages of all documents in `paths`,
+    using `pool` which was created with `_pool_worker_init()`. If a document
+    cannot be opened we yield `(path, None, exception)`. If a unit of a
+    document fails as a whole, e.g. because its result cannot be pickled, we
+    yield `(path, pno, exception)` for each of its pages.
+    '''
+    paths = enumerate(paths)
+    # Units `(document_id, path, start, stop)` for documents that we have
+    # already started.
+    units = collections.deque()
+    # Number of pages not yet received, for each started document.
+    remaining = dict()
+    # `(exception, unit_pages)` for documents whose first unit failed as a
+    # whole. We then send a unit with no pages to find the page count.
+    first_errors = dict()
+    # Callbacks are run in a Pool thread and write `(document_id, path,
+    # start, stop, unit_pages, r, exception)` to `done`.
+    done = queue.Queue()
+    in_flight = 0
+    page_time = None
+    
+    def unit_size():
+        if unit_pages:
+            return unit_pages
+        if page_time is None:
+            return 1
+        return max(1, min(int(_batch_time / max(page_time, 1e-6)), 256))
+    
+    def submit():
+        nonlocal in_flight
+        while in_flight < 2 * concurrency:
+            if units:
+                document_id, path, start, stop = units.popleft()
+            else:
+                document_id, path = next(paths, (None, None))
+                if path is None:
+                    break
+                start, stop = 0, None
+            password = passwords.get(path) if passwords else None
+            n = unit_size()
+            pool.apply_async(
+                    _pool_unit_fn,
+                    (
+                        path,
+                        password,
+                        start,
+                        stop,
+                        n,
+                        pagefn,
+                        pagefn_args,
+                        pagefn_kwargs,
+                        shared_dir,
+                    ),
+                    callback=lambda r, x=(document_id, path, start, stop, n): done.put((*x, r, None)),
+                    error_callback=lambda e, x=(document_id, path, start, stop, n): done.put((*x, None, e)),
+                    )
+            in_flight += 1
+    
+    try:
+        submit()
+        while in_flight:
+            document_id, path, start, stop, n, r, e = done.get()
+            in_flight -= 1
+            stats.t = time.time() - stats._t0
+            if e is None and r[3] is None:
+                # `_pool_unit_fn()` could not open the document.
+                e = r[0]
+            elif e is not None and stop is None:
+                # The first unit failed as a whole, so we don't know how many
+                # pages it had. Find the page count with a unit that has no
+                # pages.
+                first_errors[document_id] = e, n
+                units.appendleft((document_id, path, 0, 0))
+                submit()
+                continue
+            if e is not None and document_id not in remaining:
+                # Failed to open document, or to find its page count.
+                first_errors.pop(document_id, None)
+                stats.num_documents += 1
+                stats.num_errors += 1
+                submit()
+                yield path, None, e
+                continue
+            if e is not None:
+                # A later unit failed as a whole, so all its pages failed.
+                results = [e] * (stop - start)
+            else:
+                results, t, opened, count = r
+                stats.num_batches += 1
+                stats.num_opens += opened
+                stats.t_worker += t
+                if results:
+                    pt = t / len(results)
+                    page_time = pt if page_time is None else (page_time + pt) / 2
+                if document_id not in remaining:
+                    # First unit of this document, so queue the remaining pages.
+                    remaining[document_id] = count
+                    if document_id in first_errors:
+                        e, n = first_errors.pop(document_id)
+                        results = [e] * min(n, count)
+                    n = unit_size()
+                    for i in range(len(results), count, n):
+                        units.append((document_id, path, i, min(i + n, count)))
+            remaining[document_id] -= len(results)
+            if not remaining[document_id]:
+                del remaining[document_id]
+                stats.num_documents += 1
+            submit()
+            for i, ret in enumerate(results):
+                stats.num_pages += 1
+                if isinstance(ret, Exception):
+                    stats.num_errors += 1
+                elif shared_dir:
+                    ret = _shared_get(ret)
+                yield path, start + i, ret
+    finally:
+        # Wait for units that are still running, see `_pool_iter()`.
+        while in_flight:
+            r = done.get()[5]
+            in_flight -= 1
+            if r is not None and r[3] is not None:
+                for ret in r[0]:
+                    _shared_discard(ret)
+
+
+# Support for returning large results via memory-mapped files.
+#
+# If `shared_dir` is set, workers write bytes-like results of at least
+# `_shared_min` bytes to a new file in directory `shared_dir` and return a
+# `_SharedResult` instead. The parent replaces these with read-only
+# memoryviews of the mapped file. This avoids pickling large buffers and
+# sending them through a pipe. We use a directory in /dev/shm if available, so
+# files are backed by shared memory.
+#
+# This applies to results themselves and to items of results that are tuples
+# or lists, for example `(width, height, samples)`.
+#
+
+_shared_min = 64 * 1024
+
+
+class _SharedResult:
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+    
+    def get(self):
+        '''
+        Returns a read-only memoryview of our data and removes our file.
+        '''
+        with open(self.path, 'rb') as f:
+            if os.name == 'nt':
+                # Cannot remove a file while it is mapped.
+                ret = f.read()
+            else:
+                ret = memoryview(mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ))
+        os.remove(self.path)
+        return ret
+
+
+def _shared_directory():
+    '''
+    Returns a `tempfile.TemporaryDirectory` for use as `shared_dir`.
+    '''
+    d = '/dev/shm'
+    return tempfile.TemporaryDirectory(
+            prefix='pymupdf-',
+            dir=d if os.path.isdir(d) else None,
+            )
+
+
+def _shared_put(r, shared_dir):
+    '''
+    Returns `r` with large bytes-like items replaced by `_SharedResult`s.
+    Called in workers.
+    '''
+    if type(r) in (tuple, list):
+        return type(r)(_shared_put_item(item, shared_dir) for item in r)
+    return _shared_put_item(r, shared_dir)
+
+
+def _shared_put_item(r, shared_dir):
+    if isinstance(r, (bytes, bytearray, memoryview)):
+        size = memoryview(r).nbytes
+        if size >= _shared_min:
+            fd, path = tempfile.mkstemp(dir=shared_dir)
+            with open(fd, 'wb') as f:
+                f.write(r)
+            return _SharedResult(path, size)
+        if isinstance(r, memoryview):
+            # Memoryviews cannot be pickled.
+            return r.tobytes()
+    return r
+
+
+def _shared_discard(r):
+    '''
+    Removes the files of `_SharedResult`s in `r`, a result that we are not
+    going to use. Called in parent.
+    '''
+    for item in r if type(r) in (tuple, list) else (r,):
+        if isinstance(item, _SharedResult):
+            os.remove(item.path)
+
+
+def _shared_get(r):
+    '''
+    Returns `r` with `_SharedResult`s replaced by their data. Called in
+    parent.
+    '''
+    if type(r) in (tuple, list):
+        return type(r)(
+                item.get() if isinstance(item, _SharedResult) else item
+                for item in r
+                )
+    if isinstance(r, _SharedResult):
+        return r.get()
+    return r
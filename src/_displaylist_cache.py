@@ -0,0 +1,222 @@
+"""
+Copyright (C) 2023 Artifex Software, Inc.
+
+This file is part of PyMuPDF.
+
+PyMuPDF is free software: you can redistribute it and/or modify it under the
+terms of the GNU Affero General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option)
+any later version.
+
+PyMuPDF is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU Affero General Public License for more
+details.
+
+You should have received a copy of the GNU Affero General Public License
+along with MuPDF. If not, see <https://www.gnu.org/licenses/agpl-3.0.en.html>
+
+Alternative licensing terms are available from the licensor.
+For commercial licensing, see <https://www.artifex.com/> or contact
+Artifex Software, Inc., 39 Mesa Street, Suite 108A, San Francisco,
+CA 94129, USA, for further information.
+
+---------------------------------------------------------------------
+
+PyMuPDF display list cache, behind Document.set_displaylist_cache().
+
+Keeps the display lists of recently used PDF pages, so that rendering a page
+at several resolutions interprets the page's content only once. Document
+methods that change PDF objects, like update_stream(), call forget().
+"""
+
+import collections
+import hashlib
+import re
+
+import pymupdf
+
+
+_REFERENCE = re.compile(r"(\d+) 0 R\b")
+
+
+def _references(doc, xref, key):
+    """Xrefs of the objects referenced by the value of key."""
+    kind, value = doc.xref_get_key(xref, key)
+    if kind in ("xref", "array", "dict"):
+        return [int(x) for x in _REFERENCE.findall(value)]
+    return []
+
+
+def _page_state(page):
+    """Digest of what a PDF page's display list is made from.
+
+    Changes whenever PyMuPDF modifies the page's geometry, its page object,
+    the resources dictionary, the content streams or the annotations
+    (dictionaries and normal appearances). Other objects, like images, fonts
+    and Form XObjects, are not looked at: changes to them are reported via
+    DisplayListCache.forget(). Streams are hashed without decompressing them.
+    """
+    doc = page.parent
+    h = hashlib.sha256()
+    h.update(
+        repr(
+            (
+                page.xref,
+                page.rotation,
+                tuple(page.mediabox),
+                tuple(page.cropbox),
+            )
+        ).encode()
+    )
+    xrefs = range(1, doc.xref_length())
+
+    def add_object(xref):
+        h.update(b"%d:" % xref)
+        if xref in xrefs:  # ignore references to missing objects
+            h.update(doc.xref_object(xref, compressed=True).encode())
+
+    def add_stream(xref):
+        add_object(xref)
+        if xref in xrefs and doc.xref_is_stream(xref):
+            h.update(doc.xref_stream_raw(xref) or b"")
+
+    add_object(page.xref)
+    # The resources dictionary and its sub-dictionaries, e.g. /XObject.
+    kind, resources = doc.xref_get_key(page.xref, "Resources")
+    if kind == "xref":
+        xref = int(resources.split()[0])
+        add_object(xref)
+        resources = doc.xref_object(xref, compressed=True) if xref in xrefs else ""
+    elif kind != "dict":
+        resources = ""
+    for xref in map(int, _REFERENCE.findall(resources)):
+        if xref in xrefs and not doc.xref_is_stream(xref):
+            add_object(xref)
+    for xref in _references(doc, page.xref, "Contents"):
+        add_stream(xref)
+    for xref in _annotation_appearances(doc, page, xrefs, add_object):
+        add_stream(xref)
+    return h.digest()
+
+
+def _annotation_appearances(doc, page, xrefs, add_object):
+    """Xrefs of the annotations' normal appearances, or their states.
+
+    Calls add_object() for each annotation."""
+    for xref in _references(doc, page.xref, "Annots"):
+        add_object(xref)
+        if xref in xrefs:
+            yield from _references(doc, xref, "AP/N")
+
+
+def _page_size(page):
+    """Decompressed length of a PDF page's content and appearance streams.
+
+    An estimate of the size of the page's display list."""
+    doc = page.parent
+    xrefs = range(1, doc.xref_length())
+    size = 0
+    streams = _references(doc, page.xref, "Contents")
+    streams += _annotation_appearances(doc, page, xrefs, lambda xref: None)
+    for xref in streams:
+        if xref in xrefs and doc.xref_is_stream(xref):
+            size += len(doc.xref_stream(xref) or b"")
+    return size
+
+
+def _page_dependencies(page):
+    """Xrefs of all objects a PDF page's display list may depend on.
+
+    These are the objects reachable from the page object, its ancestors in
+    the page tree (for inherited resources) and the optional content
+    properties. Other pages and the page tree are not followed.
+    """
+    doc = page.parent
+    xrefs = range(1, doc.xref_length())
+    deps = set()
+    todo = [page.xref]
+    catalog = doc.pdf_catalog()
+    if catalog in xrefs:
+        deps.add(catalog)
+        todo += _references(doc, catalog, "OCProperties")
+    xref = page.xref
+    while True:
+        kind, value = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(value.split()[0])
+        if xref in deps or xref not in xrefs:
+            break
+        deps.add(xref)
+        todo += _references(doc, xref, "Resources")
+    while todo:
+        xref = todo.pop()
+        if xref in deps or xref not in xrefs:
+            continue
+        deps.add(xref)
+        if xref != page.xref and doc.xref_get_key(xref, "Type")[1] in ("/Page", "/Pages"):
+            continue
+        source = doc.xref_object(xref, compressed=True)
+        if xref == page.xref:
+            source = re.sub(r"/Parent\s+\d+ 0 R", "", source)
+        todo += map(int, _REFERENCE.findall(source))
+    return deps
+
+
+class DisplayListCache:
+    """Least recently used display lists of a document's PDF pages.
+
+    Entries are keyed by page number, annotations flag and rotation, and are
+    replaced when the page's state (see _page_state()) has changed since they
+    were made. forget() removes the entries that depend on a changed object.
+    The total estimated size is kept below `max_bytes`.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def forget(self, xref=None):
+        """Remove the entries that depend on xref, all if xref is None."""
+        if xref is None:
+            self.clear()
+            return
+        for key, entry in list(self._entries.items()):
+            if xref in entry[3]:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= entry[1]
+
+    def get(self, page, annots):
+        """Return a mupdf.FzDisplayList of `page`, made or cached."""
+        key = (page.number, bool(annots), page.rotation)
+        state = _page_state(page)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == state:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        if annots:
+            dl = pymupdf.mupdf.fz_new_display_list_from_page(page.this)
+        else:
+            dl = pymupdf.mupdf.fz_new_display_list_from_page_contents(page.this)
+        if entry is not None:
+            self._remove(key)
+        size = _page_size(page)
+        if size <= self.max_bytes:
+            self._entries[key] = (state, size, dl, _page_dependencies(page))
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return dl
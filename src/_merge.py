@@ -0,0 +1,302 @@
+"""
+Copyright (C) 2023 Artifex Software, Inc.
+
+This file is part of PyMuPDF.
+
+PyMuPDF is free software: you can redistribute it and/or modify it under the
+terms of the GNU Affero General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option)
+any later version.
+
+PyMuPDF is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU Affero General Public License for more
+details.
+
+You should have received a copy of the GNU Affero General Public License
+along with MuPDF. If not, see <https://www.gnu.org/licenses/agpl-3.0.en.html>
+
+Alternative licensing terms are available from the licensor.
+For commercial licensing, see <https://www.artifex.com/> or contact
+Artifex Software, Inc., 39 Mesa Street, Suite 108A, San Francisco,
+CA 94129, USA, for further information.
+
+---------------------------------------------------------------------
+
+PyMuPDF merging of many documents, behind Document.merge().
+
+Appends the pages of a sequence of sources to a PDF, opening and closing the
+sources one at a time. The pages of each source are grafted below a page tree
+node of their own, so appending does not become slower as the target grows.
+Links and form field names are fixed up once, after all sources, and fonts and
+images that several sources contain are stored once.
+"""
+
+import hashlib
+import re
+
+import pymupdf
+from pymupdf import mupdf
+
+
+_REFERENCE = re.compile(r"(\d+) 0 R\b")
+# Objects that are shared if equal, together with the objects they reference.
+_SHARED = re.compile(r"/Type\s*/Font\b|/Subtype\s*/Image\b")
+_PAGE = re.compile(r"/Type\s*/Pages?\b")
+
+
+def _replace_references(pdf, obj, remap):
+    """Replace references to xrefs in remap in a direct object, recursively."""
+    if mupdf.pdf_is_dict(obj):
+        for i in range(mupdf.pdf_dict_len(obj)):
+            value = mupdf.pdf_dict_get_val(obj, i)
+            if not mupdf.pdf_is_indirect(value):
+                _replace_references(pdf, value, remap)
+            elif mupdf.pdf_to_num(value) in remap:
+                value = mupdf.pdf_new_indirect(pdf, remap[mupdf.pdf_to_num(value)], 0)
+                mupdf.pdf_dict_put(obj, mupdf.pdf_dict_get_key(obj, i), value)
+    elif mupdf.pdf_is_array(obj):
+        for i in range(mupdf.pdf_array_len(obj)):
+            value = mupdf.pdf_array_get(obj, i)
+            if not mupdf.pdf_is_indirect(value):
+                _replace_references(pdf, value, remap)
+            elif mupdf.pdf_to_num(value) in remap:
+                value = mupdf.pdf_new_indirect(pdf, remap[mupdf.pdf_to_num(value)], 0)
+                mupdf.pdf_array_put(obj, i, value)
+
+
+class SharedObjects:
+    """Fonts and images added to a PDF by a merge, keyed by their content.
+
+    add() replaces newly added fonts and images that equal earlier ones by
+    the earlier ones. Objects are equal if their sources, their stream data
+    and the objects they reference (recursively) are equal.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.xrefs = {}  # digest -> xref
+        self.removed = 0
+
+    def add(self, first):
+        """Deduplicate the objects from xref first to the end of the PDF."""
+        doc = self.doc
+        sources = {
+            xref: doc.xref_object(xref, compressed=True)
+            for xref in range(first, doc.xref_length())
+        }
+        digests = {}
+        active = set()
+
+        def digest(xref):
+            """Hex digest of an object and what it references, or None.
+
+            Pages, page tree nodes and objects in reference cycles have no
+            digest, and neither have objects that reference them.
+            """
+            if xref not in sources:  # not added by this source
+                return f"#{xref}"
+            if xref in digests:
+                return digests[xref]
+            if xref in active or len(active) > 100:
+                return None
+            source = sources[xref]
+            result = None
+            if not _PAGE.search(source):
+                active.add(xref)
+                children = {}
+                for ref in set(_REFERENCE.findall(source)):
+                    children[ref] = digest(int(ref))
+                    if children[ref] is None:
+                        break
+                else:
+                    h = hashlib.sha256(
+                        _REFERENCE.sub(
+                            lambda m: children[m.group(1)] + " R", source
+                        ).encode()
+                    )
+                    if doc.xref_is_stream(xref):
+                        h.update(doc.xref_stream_raw(xref) or b"")
+                    result = h.hexdigest()
+                active.discard(xref)
+            digests[xref] = result
+            return result
+
+        for xref, source in sources.items():
+            if _SHARED.search(source):
+                digest(xref)
+        remap = {}
+        for xref, value in digests.items():
+            if value is not None:
+                known = self.xrefs.setdefault(value, xref)
+                if known != xref:
+                    remap[xref] = known
+        if not remap:
+            return
+
+        pdf = pymupdf._as_pdf_document(doc)
+        for xref, source in sources.items():
+            if xref in remap:
+                continue
+            if any(int(ref) in remap for ref in _REFERENCE.findall(source)):
+                _replace_references(pdf, mupdf.pdf_load_object(pdf, xref), remap)
+        for xref in remap:
+            mupdf.pdf_delete_object(pdf, xref)
+        self.removed += len(remap)
+
+
+def _page_ranges(pages, page_count):
+    """List of (from_page, to_page) tuples for a merge() pages argument."""
+    if pages is None:
+        return [(0, page_count - 1)] if page_count else []
+    if isinstance(pages, int):
+        pages = [pages]
+    ranges = []
+    for item in pages:
+        if isinstance(item, int):
+            pno = item + page_count if item < 0 else item
+            if not 0 <= pno < page_count:
+                raise ValueError("bad page number(s)")
+            if ranges:
+                fp, tp = ranges[-1]
+                if fp <= tp == pno - 1 or fp >= tp == pno + 1:
+                    ranges[-1] = (fp, pno)
+                    continue
+            ranges.append((pno, pno))
+        else:
+            # like insert_pdf()
+            fp, tp = item
+            fp = min(max(fp, 0), page_count - 1)
+            if tp < 0:
+                tp = page_count - 1
+            tp = min(tp, page_count - 1)
+            if fp >= 0:
+                ranges.append((fp, tp))
+    return ranges
+
+
+def _open_source(item):
+    """Return (document, pages, opened) for an item of merge() sources."""
+    if isinstance(item, tuple):
+        src, pages = item
+    else:
+        src, pages = item, None
+    opened = not isinstance(src, pymupdf.Document)
+    if opened:
+        src = pymupdf.Document(src)
+    if not src.is_pdf:
+        try:
+            pdfbytes = src.convert_to_pdf()
+        finally:
+            if opened:
+                src.close()
+        src = pymupdf.Document("pdf", pdfbytes)
+        opened = True
+    return src, pages, opened
+
+
+def merge_documents(
+        doc,
+        sources,
+        *,
+        rotate=-1,
+        links=True,
+        annots=True,
+        widgets=True,
+        join_duplicates=False,
+        deduplicate=True,
+        show_progress=0,
+        ):
+    """Implementation of Document.merge()."""
+    if doc.is_closed or doc.is_encrypted:
+        raise ValueError("document closed or encrypted")
+    if not doc.is_pdf:
+        raise ValueError("is no PDF")
+    pdf = pymupdf._as_pdf_document(doc)
+    pymupdf.ENSURE_OPERATION(pdf)
+    root = mupdf.pdf_dict_get(mupdf.pdf_trailer(pdf), pymupdf.PDF_NAME("Root"))
+    pages = mupdf.pdf_dict_get(root, pymupdf.PDF_NAME("Pages"))
+    shared = SharedObjects(doc) if deduplicate else None
+    link_tabs = []  # (page xref, page number, annotation sources)
+    forms = False
+
+    for item in sources:
+        src, src_pages, opened = _open_source(item)
+        try:
+            ranges = _page_ranges(src_pages, src.page_count)
+            if not ranges:
+                continue
+            forms = forms or (widgets and src.is_form_pdf)
+            first = doc.xref_length()
+            start = doc.page_count
+            # While the source is copied, its page tree node is the root, so
+            # insert_pdf() only ever sees the pages of this source.
+            node = mupdf.pdf_add_new_dict(pdf, 4)
+            node.pdf_dict_put(pymupdf.PDF_NAME("Type"), pymupdf.PDF_NAME("Pages"))
+            node.pdf_dict_put_array(pymupdf.PDF_NAME("Kids"), 8)
+            node.pdf_dict_put_int(pymupdf.PDF_NAME("Count"), 0)
+            root.pdf_dict_put(pymupdf.PDF_NAME("Pages"), node)
+            xref_dst = {}  # destination page xrefs by source page number
+            page_links = []  # (page xref, page number, links, matrix)
+            try:
+                for fp, tp in ranges:
+                    sa = doc.page_count
+                    doc.insert_pdf(
+                            src,
+                            from_page=fp,
+                            to_page=tp,
+                            rotate=rotate,
+                            links=False,
+                            annots=annots,
+                            widgets=False,
+                            show_progress=show_progress,
+                            final=0,
+                            )
+                    if widgets:
+                        doc._do_widgets(
+                                src,
+                                doc.Graftmaps[src._graft_id],
+                                from_page=fp,
+                                to_page=tp,
+                                start_at=sa,
+                                join_duplicates=join_duplicates,
+                                deduplicate=False,
+                                )
+                    incr = 1 if fp <= tp else -1
+                    for i, p_src in enumerate(range(fp, tp + incr, incr)):
+                        xref = doc.page_xref(sa + i)
+                        xref_dst.setdefault(p_src, xref)
+                        if links:
+                            lnks, ictm = pymupdf._copied_page_links(src, p_src)
+                            if lnks:
+                                page_links.append((xref, start + sa + i, lnks, ictm))
+            finally:
+                doc.Graftmaps.pop(src._graft_id, None)
+                root.pdf_dict_put(pymupdf.PDF_NAME("Pages"), pages)
+                count = node.pdf_dict_get_int(pymupdf.PDF_NAME("Count"))
+                if count:
+                    node.pdf_dict_put(pymupdf.PDF_NAME("Parent"), pages)
+                    pages.pdf_dict_get(pymupdf.PDF_NAME("Kids")).pdf_array_push(node)
+                    pages.pdf_dict_put_int(
+                            pymupdf.PDF_NAME("Count"),
+                            pages.pdf_dict_get_int(pymupdf.PDF_NAME("Count")) + count,
+                            )
+                else:
+                    mupdf.pdf_delete_object(pdf, node.pdf_to_num())
+                doc._reset_page_refs()
+            # GOTO link targets are known once all ranges of the source are in.
+            for xref, pno, lnks, ictm in page_links:
+                link_tab = [pymupdf._link_annot_text(l, xref_dst, ictm) for l in lnks]
+                link_tab = tuple(t for t in link_tab if t)
+                if link_tab:
+                    link_tabs.append((xref, pno, link_tab))
+            if shared is not None:
+                shared.add(first)
+        finally:
+            if opened:
+                src.close()
+
+    pymupdf._add_link_annots(doc, link_tabs)
+    if forms:
+        acro_fields = mupdf.pdf_dict_getp(mupdf.pdf_trailer(pdf), "Root/AcroForm/Fields")
+        pymupdf._deduplicate_widget_names(pdf, acro_fields, join_duplicates=join_duplicates)
@@ -0,0 +1,344 @@
+"""
+Copyright (C) 2023 Artifex Software, Inc.
+
+This file is part of PyMuPDF.
+
+PyMuPDF is free software: you can redistribute it and/or modify it under the
+terms of the GNU Affero General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option)
+any later version.
+
+PyMuPDF is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU Affero General Public License for more
+details.
+
+You should have received a copy of the GNU Affero General Public License
+along with MuPDF. If not, see <https://www.gnu.org/licenses/agpl-3.0.en.html>
+
+Alternative licensing terms are available from the licensor.
+For commercial licensing, see <https://www.artifex.com/> or contact
+Artifex Software, Inc., 39 Mesa Street, Suite 108A, San Francisco,
+CA 94129, USA, for further information.
+
+---------------------------------------------------------------------
+
+PyMuPDF per-page extraction context shared by the table stages.
+
+Provides PageAnalysis, which extracts a page's text and vector graphics once
+and serves them to table detection (make_edges), grid refinement, span
+resolution and the union stage. find_tables() binds one PageAnalysis for the
+duration of a call; the public refine_grid* / resolve_spans entry points bind
+one when called on their own.
+
+Also provides BoxIndex, a spatial index of word or char boxes that the
+word-in-cell lookups of these stages query instead of scanning the page, and
+cluster_rects(), the rectangle joining of make_edges() and
+Page.cluster_drawings().
+"""
+
+import contextlib
+import heapq
+from contextvars import ContextVar
+from functools import cached_property
+import math
+from operator import itemgetter
+
+import pymupdf
+
+
+_ANALYSIS_VAR = ContextVar("pymupdf_table_analysis", default=None)
+
+
+class BoxIndex:
+    """Boxes bucketed on a uniform grid by their center points.
+
+    candidates(x0, y0, x1, y1) returns, in ascending order, the indices of all
+    boxes whose center may lie in that (closed) rectangle -- a superset that
+    also contains every box contained in it. Callers apply their exact
+    membership test to the candidates, so results equal a scan of all boxes.
+    Inverted boxes and boxes without a finite center are always candidates.
+    """
+
+    def __init__(self, items, key=itemgetter(0, 1, 2, 3), size=16.0):
+        self.items = items
+        self.size = size
+        self._buckets = buckets = {}
+        self._always = always = []
+        xs = []
+        ys = []
+        for i, item in enumerate(items):
+            x0, y0, x1, y1 = key(item)
+            cx = (x0 + x1) * 0.5
+            cy = (y0 + y1) * 0.5
+            if x0 <= x1 and y0 <= y1 and math.isfinite(cx) and math.isfinite(cy):
+                xs.append(cx)
+                ys.append(cy)
+                buckets.setdefault((int(cx // size), int(cy // size)), []).append(i)
+            else:
+                always.append(i)
+        if xs:
+            self._bounds = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self._bounds = None
+
+    def candidates(self, x0, y0, x1, y1):
+        """Indices of the boxes that may have their center in the rectangle."""
+        out = list(self._always)
+        if self._bounds is None or not (x0 <= x1 and y0 <= y1):
+            return out
+        bx0, by0, bx1, by1 = self._bounds
+        x0 = max(x0, bx0)
+        y0 = max(y0, by0)
+        x1 = min(x1, bx1)
+        y1 = min(y1, by1)
+        if x0 > x1 or y0 > y1:
+            return out
+        size = self.size
+        ix0, iy0 = int(x0 // size), int(y0 // size)
+        ix1, iy1 = int(x1 // size), int(y1 // size)
+        buckets = self._buckets
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) <= len(buckets):
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    bucket = buckets.get((ix, iy))
+                    if bucket:
+                        out.extend(bucket)
+        else:
+            for (ix, iy), bucket in buckets.items():
+                if ix0 <= ix <= ix1 and iy0 <= iy <= iy1:
+                    out.extend(bucket)
+        out.sort()
+        return out
+
+
+def cluster_rects(rects, are_neighbors, x_tolerance, y_tolerance, size=32.0):
+    """Join rectangles that are neighbors of a growing cluster rectangle.
+
+    Equivalent to this loop over a list of Rect objects::
+
+        while rects:
+            r = rects[0]
+            repeat = True
+            while repeat:
+                repeat = False
+                for i in range(len(rects) - 1, 0, -1):
+                    if are_neighbors(r, rects[i]):
+                        r = r | rects[i].tl | rects[i].br
+                        del rects[i]
+                        repeat = True
+            yield r
+            del rects[0]
+
+    but only calls are_neighbors() for rectangles in grid cells near ``r``,
+    instead of for all remaining ones. are_neighbors(r1, r2) must be False
+    whenever the normalized rectangles, enlarged by the tolerances, are
+    disjoint.
+
+    Returns the list of cluster rectangles.
+    """
+    count = len(rects)
+    buckets = {}
+    always = []  # non-finite or very large rectangles: checked every pass
+    for i, rect in enumerate(rects):
+        x0, y0, x1, y1 = rect
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        if not all(map(math.isfinite, (x0, y0, x1, y1))):
+            always.append(i)
+            continue
+        ix0, iy0 = int(x0 // size), int(y0 // size)
+        ix1, iy1 = int(x1 // size), int(y1 // size)
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > 256:
+            always.append(i)
+            continue
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                buckets.setdefault((ix, iy), []).append(i)
+
+    def cell_range(r):
+        # cells touched by r enlarged by the tolerances, plus one cell margin
+        x0, y0, x1, y1 = r
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        if not all(map(math.isfinite, (x0, y0, x1, y1))):
+            return None
+        return (
+            int((x0 - x_tolerance) // size) - 1,
+            int((y0 - y_tolerance) // size) - 1,
+            int((x1 + x_tolerance) // size) + 1,
+            int((y1 + y_tolerance) // size) + 1,
+        )
+
+    def new_cells(old, new):
+        # bucket contents of cells in range `new`, but not in range `old`
+        def fresh(ix, iy):
+            return old is None or not (
+                old[0] <= ix <= old[2] and old[1] <= iy <= old[3]
+            )
+
+        if (new[2] - new[0] + 1) * (new[3] - new[1] + 1) <= len(buckets):
+            for ix in range(new[0], new[2] + 1):
+                for iy in range(new[1], new[3] + 1):
+                    if fresh(ix, iy):
+                        bucket = buckets.get((ix, iy))
+                        if bucket:
+                            yield bucket
+        else:
+            for (ix, iy), bucket in buckets.items():
+                if new[0] <= ix <= new[2] and new[1] <= iy <= new[3] and fresh(ix, iy):
+                    yield bucket
+
+    alive = [True] * count
+    clusters = []
+    for seed in range(count):
+        if not alive[seed]:
+            continue
+        alive[seed] = False
+        r = rects[seed]
+        repeat = True
+        while repeat:
+            repeat = False
+            # One pass: visit the remaining rectangles in descending order.
+            # Candidates are kept in a heap of negated indices; rectangles
+            # at or after `pos` have already been visited in this pass.
+            pos = count
+            heap = []
+            pushed = set()
+            cells = cell_range(r)
+            if cells is None:  # every rectangle is a candidate
+                sources = [range(count)]
+            else:
+                sources = [always, *new_cells(None, cells)]
+            while True:
+                for indices in sources:
+                    for i in indices:
+                        if i < pos and alive[i] and i not in pushed:
+                            pushed.add(i)
+                            heapq.heappush(heap, -i)
+                if not heap:
+                    break
+                pos = -heapq.heappop(heap)
+                rect = rects[pos]
+                sources = ()
+                if not are_neighbors(r, rect):
+                    continue
+                r = r | rect.tl | rect.br
+                alive[pos] = False
+                repeat = True
+                if cells is None:
+                    continue
+                grown = cell_range(r)
+                if grown is None:
+                    sources = [range(pos)]
+                elif grown != cells:
+                    sources = list(new_cells(cells, grown))
+                cells = grown
+        clusters.append(r)
+    return clusters
+
+
+class PageAnalysis:
+    """Text and vector graphics of one page, each extracted at most once.
+
+    All text views come from a single TextPage made with TEXTFLAGS_WORDS; the
+    table stages only read text blocks, so images are not collected. Views are
+    built on first access and must be treated as read-only by consumers.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._views = {}
+
+    @cached_property
+    def textpage(self):
+        return self.page.get_textpage(flags=pymupdf.TEXTFLAGS_WORDS)
+
+    @cached_property
+    def words(self):
+        """The page's words, as returned by page.get_text("words")."""
+        return self.page.get_text("words", textpage=self.textpage)
+
+    @cached_property
+    def dict(self):
+        """The page's text in page.get_text("dict") format."""
+        return self.page.get_text("dict", textpage=self.textpage)
+
+    @cached_property
+    def rawdict(self):
+        """The page's text in page.get_text("rawdict") format."""
+        return self.page.get_text("rawdict", textpage=self.textpage)
+
+    @cached_property
+    def spans(self):
+        """Non-blank text spans as (rect, text) with the text stripped."""
+        spans = []
+        for block in self.dict.get("blocks", []):
+            for line in block.get("lines", []):
+                for span in line.get("spans", []):
+                    text = str(span.get("text") or "").strip()
+                    if not text:
+                        continue
+                    bbox = span.get("bbox")
+                    if not bbox:
+                        continue
+                    rect = pymupdf.Rect(bbox)
+                    if not rect.is_empty:
+                        spans.append((rect, text))
+        return spans
+
+    @cached_property
+    def drawings(self):
+        """The page's vector graphics, as returned by page.get_drawings()."""
+        return self.page.get_drawings()
+
+    def view(self, name, build):
+        """Return view ``name``, computing it as build(self) on first use.
+
+        Lets a table stage keep a derived view (e.g. refinement words) for the
+        lifetime of this analysis rather than on the Page object."""
+        try:
+            return self._views[name]
+        except KeyError:
+            value = self._views[name] = build(self)
+            return value
+
+
+def page_analysis(page):
+    """The PageAnalysis bound for ``page``, else a new, unbound one."""
+    analysis = _ANALYSIS_VAR.get()
+    if analysis is not None and analysis.page is page:
+        return analysis
+    return PageAnalysis(page)
+
+
+def bind_analysis(page):
+    """Bind a new PageAnalysis of ``page`` unless one is already bound.
+
+    Returns the token to pass to unbind_analysis(), None if nothing was bound."""
+    analysis = _ANALYSIS_VAR.get()
+    if analysis is not None and analysis.page is page:
+        return None
+    return _ANALYSIS_VAR.set(PageAnalysis(page))
+
+
+def unbind_analysis(token):
+    """Undo a bind_analysis() call."""
+    if token is not None:
+        _ANALYSIS_VAR.reset(token)
+
+
+@contextlib.contextmanager
+def analyzing(page):
+    """Bind a PageAnalysis of ``page`` for the duration of the block.
+
+    Nested uses for the same page object share the outer analysis."""
+    token = bind_analysis(page)
+    try:
+        yield _ANALYSIS_VAR.get()
+    finally:
+        unbind_analysis(token)
@@ -0,0 +1,249 @@
+"""
+Copyright (C) 2023 Artifex Software, Inc.
+
+This file is part of PyMuPDF.
+
+PyMuPDF is free software: you can redistribute it and/or modify it under the
+terms of the GNU Affero General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option)
+any later version.
+
+PyMuPDF is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU Affero General Public License for more
+details.
+
+You should have received a copy of the GNU Affero General Public License
+along with MuPDF. If not, see <https://www.gnu.org/licenses/agpl-3.0.en.html>
+
+Alternative licensing terms are available from the licensor.
+For commercial licensing, see <https://www.artifex.com/> or contact
+Artifex Software, Inc., 39 Mesa Street, Suite 108A, San Francisco,
+CA 94129, USA, for further information.
+
+---------------------------------------------------------------------
+
+PyMuPDF document-level table extraction, behind Document.find_tables().
+
+Runs find_tables() on many pages, optionally in worker processes, and keeps
+the per-page results in an on-disk cache. Results are plain JSON data rather
+than Table objects, so that they can cross process boundaries and be stored.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import tempfile
+
+import pymupdf
+from pymupdf import table
+
+
+# A cache entry is keyed by a digest of everything that determines a page's
+# tables: the page's geometry, the PDF objects reachable from the page (its
+# content streams, resources, fonts, images, annotations), the find_tables()
+# arguments (which determine the TableSettings), the PyMuPDF version and
+# whether the layout analyzer is available. Objects of other pages, reachable
+# e.g. via link destinations or the page tree, are not followed.
+_REFERENCE = re.compile(r"(\d+) 0 R\b")
+
+
+def _page_digest(page):
+    """Hex digest of a PDF page's content, None for other document types."""
+    doc = page.parent
+    if not doc.is_pdf:
+        return None
+    h = hashlib.sha256()
+    h.update(
+        repr(
+            (
+                tuple(page.mediabox),
+                tuple(page.cropbox),
+                page.rotation,
+                tuple(page.transformation_matrix),
+            )
+        ).encode()
+    )
+    todo = [page.xref]
+    # Resources may be inherited from the page tree, which we do not follow.
+    xref = page.xref
+    while doc.xref_get_key(xref, "Resources")[0] == "null":
+        kind, value = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(value.split()[0])
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind == "xref":
+            todo.append(int(value.split()[0]))
+        elif kind == "dict":
+            h.update(value.encode())
+            todo.extend(int(x) for x in _REFERENCE.findall(value))
+    seen = set()
+    while todo:
+        xref = todo.pop()
+        if xref in seen or not 0 < xref < doc.xref_length():
+            continue
+        seen.add(xref)
+        h.update(b"%d:" % xref)
+        if xref != page.xref and doc.xref_get_key(xref, "Type")[1] in ("/Page", "/Pages"):
+            continue
+        source = doc.xref_object(xref, compressed=True)
+        h.update(source.encode())
+        if doc.xref_is_stream(xref):
+            h.update(doc.xref_stream_raw(xref) or b"")
+        if xref == page.xref:
+            # the page's /Parent leads to the page tree and all other pages
+            source = re.sub(r"/Parent\s+\d+ 0 R", "", source)
+        todo.extend(int(x) for x in _REFERENCE.findall(source))
+    return h.hexdigest()
+
+
+def _argument_value(value):
+    """JSON-compatible value of a find_tables() argument.
+
+    Raises TypeError for values that are not plain data, because their repr()
+    need not identify them."""
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value).hex()
+    if isinstance(value, (pymupdf.Point, pymupdf.Rect, pymupdf.IRect, pymupdf.Quad, pymupdf.Matrix)):
+        return [type(value).__name__, [_argument_value(v) for v in value]]
+    if isinstance(value, (list, tuple)):
+        return [_argument_value(v) for v in value]
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise TypeError("dict keys must be str")
+        return {k: _argument_value(v) for k, v in value.items()}
+    raise TypeError(f"cannot make cache key of {type(value).__name__}")
+
+
+def _arguments_digest(kwargs):
+    """Hex digest of find_tables() arguments, with defaults applied.
+
+    None if an argument is not plain data; such calls are not cached."""
+    bound = inspect.signature(table.find_tables).bind(None, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    del arguments["page"]
+    try:
+        arguments = _argument_value(arguments)
+    except TypeError:
+        return None
+    h = hashlib.sha256()
+    h.update(
+        json.dumps(
+            [arguments, pymupdf.VersionBind, pymupdf._get_layout is not None],
+            sort_keys=True,
+        ).encode()
+    )
+    return h.hexdigest()
+
+
+def _as_list(rect):
+    return None if rect is None else [float(v) for v in rect]
+
+
+def _table_result(tab):
+    """JSON-compatible description of a Table."""
+    return {
+        "bbox": _as_list(tab.bbox),
+        "cells": [_as_list(c) for c in tab.cells],
+        "row_count": tab.row_count,
+        "col_count": tab.col_count,
+        "header": {
+            "bbox": _as_list(tab.header.bbox),
+            "cells": [_as_list(c) for c in tab.header.cells],
+            "names": list(tab.header.names),
+            "external": tab.header.external,
+        },
+        "header_rows": tab.header_rows,
+        "section_rows": list(tab.section_rows),
+        "extract": tab.extract(),
+        "html": tab.to_html(),
+    }
+
+
+def _page_tables(page, kwargs):
+    """Tables of a page as a list of _table_result() dicts, None on error.
+
+    Top-level so that it can be sent to worker processes."""
+    tabs = page.find_tables(**kwargs)
+    if tabs is None:
+        return None
+    # Round trip through JSON, so results look the same whether they were
+    # just computed or read from the cache.
+    return json.loads(json.dumps([_table_result(tab) for tab in tabs.tables]))
+
+
+def _cache_read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_write(path, result):
+    directory = os.path.dirname(path)
+    fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def _is_file(doc):
+    """Whether worker processes can open `doc` from its file.
+
+    Workers open the file themselves, so it must match `doc`."""
+    if not doc.name or not os.path.isfile(doc.name):
+        return False
+    return not doc.is_dirty and not doc.needs_pass
+
+
+def find_document_tables(doc, pages=None, workers=None, cache=None, **kwargs):
+    """Implementation of Document.find_tables()."""
+    if doc.is_closed or doc.is_encrypted:
+        raise ValueError("document closed or encrypted")
+    if pages is None:
+        pages = range(doc.page_count)
+    pages = [int(pno) for pno in pages]
+    results = [None] * len(pages)
+    paths = [None] * len(pages)
+    arguments = None if cache is None else _arguments_digest(kwargs)
+    if arguments is not None:
+        os.makedirs(cache, exist_ok=True)
+        for i, pno in enumerate(pages):
+            digest = _page_digest(doc[pno])
+            if digest is None:
+                continue
+            key = hashlib.sha256(f"{digest}:{arguments}".encode()).hexdigest()
+            paths[i] = os.path.join(cache, key + ".json")
+            results[i] = _cache_read(paths[i])
+    todo = [i for i, result in enumerate(results) if result is None]
+
+    if workers is not None and workers > 1 and len(todo) > 1 and _is_file(doc):
+        found = pymupdf.apply_pages(
+            doc.name,
+            _page_tables,
+            pagefn_args=(kwargs,),
+            pages=[pages[i] for i in todo],
+            method="mp",
+            concurrency=workers,
+        )
+    else:
+        found = [_page_tables(doc[pages[i]], kwargs) for i in todo]
+
+    for i, result in zip(todo, found):
+        results[i] = result
+        if result is not None and paths[i] is not None:
+            _cache_write(paths[i], result)
+    return results
@@ -35,6 +35,8 @@ import itertools
 import re
 import pymupdf
 
+from pymupdf._table_analysis import BoxIndex, analyzing, page_analysis
+
 
 # Grid refinement runs three splitters, each taking (page, grid) and returning a
 # grid without mutating the page:
@@ -46,20 +48,23 @@ import pymupdf
 #                                   records into a single grid row.
 # Word selection uses center-point cell membership with rotated/vertical span
 # substitution; it is independent of the CHARS/extract_words path in
-# pymupdf.table, so refinement needs no CHARS state.
+# pymupdf.table, so refinement needs no CHARS state. Words, spans and drawings
+# come from the page's PageAnalysis (pymupdf._table_analysis), so each is
+# extracted once per find_tables() call however many tables are refined; cell
+# word lookups query a BoxIndex of the words rather than scanning them all.
 
 _REFINE_LINE_GAP = 3.0  # center-y gap (points) that groups body words into lines
 
 
 # --- word selection: center-point membership + rotated-span substitution -----
-def _refine_rawdict_spans(page):
+def _refine_rawdict_spans(analysis):
     """Flattened rawdict text spans carrying line-direction metadata.
 
     Only used to locate vertical/rotated text so those words can be replaced by
     span-level bboxes in _refine_page_words. Minimal fields (bbox/text/dir/wmode)
     -- the only ones the consumers read."""
     spans = []
-    raw = page.get_text("rawdict")
+    raw = analysis.rawdict
     for block in raw.get("blocks", []):
         if block.get("type") != 0:
             continue
@@ -100,22 +105,31 @@ def _refine_is_vertical_or_rotated(span):
 
 
 def _refine_page_words(page):
-    """Center-point word list for grid refinement, cached on the page object.
-
-    Extract page words once (page.get_text("words")), then substitute vertical/
-    rotated text: any horizontal word whose center falls inside a rotated span's
-    bbox is dropped, and each rotated span is appended as a single word."""
-    cache = getattr(page, "_refine_words_cache", None)
-    if cache is not None:
-        return cache
+    """Center-point word list for grid refinement, kept by the page's analysis.
+
+    Page words (page.get_text("words")) with vertical/rotated text substituted:
+    any horizontal word whose center falls inside a rotated span's bbox is
+    dropped, and each rotated span is appended as a single word."""
+    return page_analysis(page).view("refine_words", _refine_build_page_words)
+
+
+def _refine_word_index(page):
+    """BoxIndex of _refine_page_words(page), kept by the page's analysis."""
+    return page_analysis(page).view(
+        "refine_word_index",
+        lambda analysis: BoxIndex(analysis.view("refine_words", _refine_build_page_words)),
+    )
+
+
+def _refine_build_page_words(analysis):
     words = [
         (float(w[0]), float(w[1]), float(w[2]), float(w[3]), str(w[4]))
-        for w in page.get_text("words")
+        for w in analysis.words
         if str(w[4]).strip()
     ]
     rotated_spans = [
         span
-        for span in _refine_rawdict_spans(page)
+        for span in _refine_rawdict_spans(analysis)
         if _refine_is_vertical_or_rotated(span) and str(span.get("text") or "").strip()
     ]
     if rotated_spans:
@@ -134,10 +148,6 @@ def _refine_page_words(page):
                 (float(rect.x0), float(rect.y0), float(rect.x1), float(rect.y1), str(span["text"]))
             )
         words = sorted(kept, key=lambda item: (item[1], item[0]))
-    try:
-        setattr(page, "_refine_words_cache", words)
-    except Exception:
-        pass
     return words
 
 
@@ -153,10 +163,12 @@ def _refine_word_in_rect(wx0, wy0, wx1, wy1, x0, y0, x1, y1):
 def _refine_words_in_rect(page, rect):
     """Page words whose center lies in rect, as (x0, y0, x1, y1, text) tuples."""
     x0, y0, x1, y1 = float(rect.x0), float(rect.y0), float(rect.x1), float(rect.y1)
+    index = _refine_word_index(page)
+    words = index.items
     return [
-        (wx0, wy0, wx1, wy1, text)
-        for wx0, wy0, wx1, wy1, text in _refine_page_words(page)
-        if _refine_word_in_rect(wx0, wy0, wx1, wy1, x0, y0, x1, y1)
+        words[i]
+        for i in index.candidates(x0, y0, x1, y1)
+        if _refine_word_in_rect(*words[i][:4], x0, y0, x1, y1)
     ]
 
 
@@ -204,7 +216,7 @@ def _refine_table_rect(cells, table_bbox):
 def _refine_raw_shaded_rects(page, table_rect, *, min_dim):
     out = []
     page_width = float(page.rect.width)
-    for drawing in page.get_drawings():
+    for drawing in page_analysis(page).drawings:
         if _refine_is_white(drawing.get("fill")):
             continue
         for item in drawing.get("items", []):
@@ -255,7 +267,7 @@ def _refine_cluster(values, *, tolerance):
 def _refine_border_lines(page, table_rect):
     xs = set()
     ys = set()
-    for drawing in page.get_drawings():
+    for drawing in page_analysis(page).drawings:
         stroked = drawing.get("type") in ("s", "fs")
         for item in drawing.get("items", []):
             kind = item[0]
@@ -296,8 +308,10 @@ def _refine_drop_near(edges, borders, *, tolerance):
     return [edge for edge in edges if not any(abs(edge - border) <= tolerance for border in borders)]
 
 
-def _refine_has_text(words, x0, y0, x1, y1, *, margin):
-    for wx0, wy0, wx1, wy1, text in words:
+def _refine_has_text(word_index, x0, y0, x1, y1, *, margin):
+    words = word_index.items
+    for i in word_index.candidates(x0 + margin, y0 + margin, x1 - margin, y1 - margin):
+        wx0, wy0, wx1, wy1, text = words[i]
         if not str(text).strip():
             continue
         cx = (wx0 + wx1) * 0.5
@@ -307,13 +321,13 @@ def _refine_has_text(words, x0, y0, x1, y1, *, margin):
     return False
 
 
-def _refine_content_filter_row_edges(words, y0, y1, candidates, x0, x1, *, margin):
+def _refine_content_filter_row_edges(word_index, y0, y1, candidates, x0, x1, *, margin):
     edges = sorted(edge for edge in candidates if y0 + margin < edge < y1 - margin)
     while edges:
         bounds = [y0, *edges, y1]
         empty_index = None
         for index in range(len(bounds) - 1):
-            if not _refine_has_text(words, x0, bounds[index], x1, bounds[index + 1], margin=margin):
+            if not _refine_has_text(word_index, x0, bounds[index], x1, bounds[index + 1], margin=margin):
                 empty_index = index
                 break
         if empty_index is None:
@@ -360,7 +374,7 @@ def _split_shaded_rows(
     if not y_edges:
         return cells
 
-    words = _refine_page_words(page)
+    word_index = _refine_word_index(page)
     new_cells = []
     added_rows = 0
     for row in cells:
@@ -372,7 +386,7 @@ def _split_shaded_rows(
         ry1 = max(float(cell.y1) for cell in live)
         rx0 = min(float(cell.x0) for cell in live)
         rx1 = max(float(cell.x1) for cell in live)
-        cuts = _refine_content_filter_row_edges(words, ry0, ry1, y_edges, rx0, rx1, margin=margin)
+        cuts = _refine_content_filter_row_edges(word_index, ry0, ry1, y_edges, rx0, rx1, margin=margin)
         if not cuts:
             new_cells.append(row)
             continue
@@ -677,7 +691,9 @@ def _refine_line_columns(line, col_bounds):
 def _refine_page_words_in_rect(page, rect):
     words = []
     rx0, ry0, rx1, ry1 = float(rect.x0), float(rect.y0), float(rect.x1), float(rect.y1)
-    for x0, y0, x1, y1, text in _refine_page_words(page):
+    index = _refine_word_index(page)
+    for i in index.candidates(rx0, ry0, rx1, ry1):
+        x0, y0, x1, y1, text = index.items[i]
         cx = (x0 + x1) * 0.5
         cy = (y0 + y1) * 0.5
         if rx0 <= cx <= rx1 and ry0 <= cy <= ry1:
@@ -798,8 +814,9 @@ def refine_grid_structure(page, cells, *, table_bbox=None):
     boundary of the post-structure grid can insert that computation between the
     two phases. table_bbox, when given, bounds the shaded-rectangle search;
     otherwise the cells' union is used."""
-    cells = _split_shaded_rows(page, cells, table_bbox)
-    cells = _split_undersegmented_columns(page, cells)
+    with analyzing(page):
+        cells = _split_shaded_rows(page, cells, table_bbox)
+        cells = _split_undersegmented_columns(page, cells)
     return cells
 
 
@@ -808,13 +825,14 @@ def refine_grid_rows(page, cells, *, header_row_count=1, clean_threshold=0.85, m
     into one grid row. header_row_count is the number of leading header rows to
     keep intact; callers that resolve a header region pass it in, and the default
     of 1 is a conservative single-header assumption."""
-    return _split_overmerged_rows(
-        page,
-        cells,
-        clean_threshold=clean_threshold,
-        merge_overlap_frac=merge_overlap_frac,
-        header_row_count=header_row_count,
-    )
+    with analyzing(page):
+        return _split_overmerged_rows(
+            page,
+            cells,
+            clean_threshold=clean_threshold,
+            merge_overlap_frac=merge_overlap_frac,
+            header_row_count=header_row_count,
+        )
 
 
 def refine_grid(page, cells, *, table_bbox=None, header_row_count=1):
@@ -833,8 +851,9 @@ def refine_grid(page, cells, *, table_bbox=None, header_row_count=1):
     a caller needing the header boundary of the intermediate grid can instead
     call :func:`refine_grid_structure` then :func:`refine_grid_rows`.
     """
-    cells = refine_grid_structure(page, cells, table_bbox=table_bbox)
-    cells = refine_grid_rows(page, cells, header_row_count=header_row_count)
+    with analyzing(page):
+        cells = refine_grid_structure(page, cells, table_bbox=table_bbox)
+        cells = refine_grid_rows(page, cells, header_row_count=header_row_count)
     return cells
 
 
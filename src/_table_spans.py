@@ -33,9 +33,10 @@ Reuses the word-selection helpers of pymupdf._table_refine.
 
 import pymupdf
 
+from pymupdf._table_analysis import analyzing, page_analysis
 from pymupdf._table_refine import (
     _refine_is_vertical_or_rotated,
-    _refine_page_words,
+    _refine_word_index,
 )
 
 
@@ -190,15 +191,16 @@ def _span_line_rect(line):
 
 
 def _span_vertical_text_lines(page):
-    """Vertical/rotated text lines as (rect, text), cached on the page.
+    """Vertical/rotated text lines as (rect, text), kept by the page's analysis.
 
     Selects non-horizontal lines whose reading order get_text('dict') already
     preserves."""
-    cached = getattr(page, "_span_vertical_lines_cache", None)
-    if cached is not None:
-        return cached
+    return page_analysis(page).view("span_vertical_lines", _span_build_vertical_text_lines)
+
+
+def _span_build_vertical_text_lines(analysis):
     lines = []
-    for block in page.get_text("dict").get("blocks", []):
+    for block in analysis.dict.get("blocks", []):
         if block.get("type") not in (None, 0):
             continue
         for line in block.get("lines", []):
@@ -211,10 +213,6 @@ def _span_vertical_text_lines(page):
             if rect is None:
                 continue
             lines.append((rect, text))
-    try:
-        setattr(page, "_span_vertical_lines_cache", lines)
-    except Exception:
-        pass
     return lines
 
 
@@ -295,10 +293,15 @@ def _span_word_line_tuple(word):
 def _span_select_words_in_rect(page_words, rect):
     """(index, word) pairs whose center lies in rect, index into ``page_words``.
 
-    The index is what lets resolve_spans claim each page word for exactly one
+    ``page_words`` is the BoxIndex of the page words (_refine_word_index). The
+    index is what lets resolve_spans claim each page word for exactly one
     placement (an earlier cell's word is not re-claimed by a later one)."""
     selected = []
-    for index, word in enumerate(page_words):
+    words = page_words.items
+    for index in page_words.candidates(
+        float(rect.x0), float(rect.y0), float(rect.x1), float(rect.y1)
+    ):
+        word = words[index]
         wx0, wy0, wx1, wy1, text = word
         if not str(text).strip():
             continue
@@ -330,32 +333,14 @@ def _span_claim_text_in_rect(page, rect, page_words, claimed_words):
 
 
 def _span_text_spans(page):
-    """Page text spans as (rect, text), length>=2, cached on the page.
+    """Page text spans as (rect, text), length>=2, kept by the page's analysis.
 
     These drive merged-cell detection: a single span whose x-extent crosses a
     grid column line signals cells the line grid split but text joins."""
-    cached = getattr(page, "_span_text_spans_cache", None)
-    if cached is not None:
-        return cached
-    spans = []
-    for block in page.get_text("dict").get("blocks", []):
-        for line in block.get("lines", []):
-            for span in line.get("spans", []):
-                text = str(span.get("text") or "").strip()
-                if len(text) < 2:
-                    continue
-                bbox = span.get("bbox")
-                if not bbox:
-                    continue
-                rect = pymupdf.Rect(bbox)
-                if rect.is_empty:
-                    continue
-                spans.append((rect, text))
-    try:
-        setattr(page, "_span_text_spans_cache", spans)
-    except Exception:
-        pass
-    return spans
+    return page_analysis(page).view(
+        "span_text_spans",
+        lambda analysis: [(rect, text) for rect, text in analysis.spans if len(text) >= 2],
+    )
 
 
 def _span_crossing_intervals(entries, text_spans):
@@ -519,6 +504,14 @@ def resolve_spans(page, cells, *, header_row_count=None, strict_colspan=False):
     would contradict the header/body column split. This is a PyMuPDF extension;
     it reads page text/graphics but does not mutate the page.
     """
+    with analyzing(page):
+        return _span_resolve(
+            page, cells, header_row_count=header_row_count, strict_colspan=strict_colspan
+        )
+
+
+def _span_resolve(page, cells, *, header_row_count, strict_colspan):
+    """resolve_spans body, run with the page's analysis bound."""
     rows = len(cells)
 
     x_edges = []
@@ -537,7 +530,7 @@ def resolve_spans(page, cells, *, header_row_count=None, strict_colspan=False):
     base_cells = _span_build_base_cells(cells, x_boundaries, body_start) if strict_colspan else []
 
     text_spans = _span_text_spans(page)
-    page_words = _refine_page_words(page)
+    page_words = _refine_word_index(page)
     claimed_words = set()
     placements = []
     for row_idx, row in enumerate(cells):
@@ -30,6 +30,7 @@ TableFinder and _iou come from pymupdf.table; find_tables is imported lazily.
 
 import pymupdf
 
+from pymupdf._table_analysis import page_analysis
 from pymupdf.table import CHARS, EDGES, Table, TableFinder, _iou
 
 
@@ -166,30 +167,13 @@ def _union_find_owner(candidate_bbox, existing_bboxes):
 
 
 def _union_text_span_rects(page):
-    """Non-empty page text-span rects, cached on the page.
+    """Non-empty page text-span rects, from the page's analysis.
 
     Drives the grid-ref span-multiplicity gate: every non-blank span as a bare
     rect."""
-    cached = getattr(page, "_union_text_spans_cache", None)
-    if cached is not None:
-        return cached
-    spans = []
-    for block in page.get_text("dict").get("blocks", []) or []:
-        for line in block.get("lines", []) or []:
-            for span in line.get("spans", []) or []:
-                if not str(span.get("text") or "").strip():
-                    continue
-                bbox = span.get("bbox")
-                if not bbox:
-                    continue
-                rect = pymupdf.Rect(bbox)
-                if not rect.is_empty:
-                    spans.append(rect)
-    try:
-        setattr(page, "_union_text_spans_cache", spans)
-    except Exception:
-        pass
-    return spans
+    return page_analysis(page).view(
+        "union_text_spans", lambda analysis: [rect for rect, _ in analysis.spans]
+    )
 
 
 def _union_cell_span_group_count(cell, text_spans):
@@ -101,6 +101,9 @@ catch(...) {
 
 #include <algorithm>
 #include <float.h>
+#include <map>
+#include <string>
+#include <vector>
 
 
 #define MAKE_MUPDF_VERSION_INT(major, minor, patch) ((major << 16) + (minor << 8) + (patch << 0))
@@ -1449,9 +1452,50 @@ static pdf_obj *lll_JM_pdf_obj_from_str(fz_context *ctx, pdf_document *doc, cons
 // Page._addAnnot_FromString
 // Add new links provided as an array of string object definitions.
 /*********************************************************************/
-PyObject* Page_addAnnot_FromString(mupdf::PdfPage& page, PyObject* linklist)
+/* Adds annotations made from the object sources in <linklist> to the
+/Annots array of <page_obj>. */
+static void JM_add_annots_from_strings(mupdf::PdfDocument& doc, mupdf::PdfObj page_obj, PyObject* linklist, int lcount)
 {
     PyObject* txtpy = nullptr;
+    if (!mupdf::pdf_dict_get(page_obj, PDF_NAME2(Annots)).m_internal)
+    {
+        mupdf::pdf_dict_put_array(page_obj, PDF_NAME2(Annots), lcount);
+    }
+    mupdf::PdfObj annots = mupdf::pdf_dict_get(page_obj, PDF_NAME2(Annots));
+    //printf("lcount=%i\n", lcount);
+    fz_context* ctx = mupdf::internal_context_get();
+    for (int i = 0; i < lcount; i++)
+    {
+        const char* text = nullptr;
+        txtpy = PySequence_ITEM(linklist, (Py_ssize_t) i);
+        text = PyUnicode_AsUTF8(txtpy);
+        Py_CLEAR(txtpy);
+        if (!text)
+        {
+            messagef("skipping bad link / annot item %i.", i);
+            continue;
+        }
+        try
+        {
+            pdf_obj* obj = lll_JM_pdf_obj_from_str(ctx, doc.m_internal, text);
+            pdf_obj* annot = pdf_add_object_drop(
+                    ctx,
+                    doc.m_internal,
+                    obj
+                    );
+            pdf_obj* ind_obj = pdf_new_indirect(ctx, doc.m_internal, pdf_to_num(ctx, annot), 0);
+            pdf_array_push_drop(ctx, annots.m_internal, ind_obj);
+            pdf_drop_obj(ctx, annot);
+         }
+        catch (std::exception&)
+        {
+            messagef("skipping bad link / annot item %i.", i);
+        }
+    }
+}
+
+PyObject* Page_addAnnot_FromString(mupdf::PdfPage& page, PyObject* linklist)
+{
     int lcount = (int) PySequence_Size(linklist); // link count
     //printf("Page_addAnnot_FromString(): lcount=%i\n", lcount);
     if (lcount < 1)
@@ -1465,45 +1509,42 @@ PyObject* Page_addAnnot_FromString(mupdf::PdfPage& page, PyObject* linklist)
         {
             throw std::runtime_error(MSG_IS_NO_PDF);
         }
-        if (!mupdf::pdf_dict_get(page.obj(), PDF_NAME2(Annots)).m_internal)
-        {
-            mupdf::pdf_dict_put_array(page.obj(), PDF_NAME2(Annots), lcount);
-        }
-        mupdf::PdfObj annots = mupdf::pdf_dict_get(page.obj(), PDF_NAME2(Annots));
         mupdf::PdfDocument doc = page.doc();
-        //printf("lcount=%i\n", lcount);
-        fz_context* ctx = mupdf::internal_context_get();
-        for (int i = 0; i < lcount; i++)
+        JM_add_annots_from_strings(doc, page.obj(), linklist, lcount);
+    }
+    catch (std::exception&)
+    {
+        PyErr_Clear();
+        return nullptr;
+    }
+    Py_RETURN_NONE;
+}
+
+/* Like Page_addAnnot_FromString() for many pages: <page_links> is a sequence
+of (page xref, linklist) tuples. The pages need not be loaded. */
+PyObject* Document_addAnnots_FromString(mupdf::PdfDocument& pdf, PyObject* page_links)
+{
+    Py_ssize_t n = PySequence_Size(page_links);
+    PyObject* item = nullptr;
+    try
+    {
+        for (Py_ssize_t i = 0; i < n; i++)
         {
-            const char* text = nullptr;
-            txtpy = PySequence_ITEM(linklist, (Py_ssize_t) i);
-            text = PyUnicode_AsUTF8(txtpy);
-            Py_CLEAR(txtpy);
-            if (!text)
-            {
-                messagef("skipping bad link / annot item %i.", i);
-                continue;
-            }
-            try
+            item = PySequence_ITEM(page_links, i);
+            int xref = (int) PyLong_AsLong(PyTuple_GetItem(item, 0));
+            PyObject* linklist = PyTuple_GetItem(item, 1);
+            int lcount = (int) PySequence_Size(linklist);
+            if (lcount > 0)
             {
-                pdf_obj* obj = lll_JM_pdf_obj_from_str(ctx, doc.m_internal, text);
-                pdf_obj* annot = pdf_add_object_drop(
-                        ctx,
-                        doc.m_internal,
-                        obj
-                        );
-                pdf_obj* ind_obj = pdf_new_indirect(ctx, doc.m_internal, pdf_to_num(ctx, annot), 0);
-                pdf_array_push_drop(ctx, annots.m_internal, ind_obj);
-                pdf_drop_obj(ctx, annot);
-             }
-            catch (std::exception&)
-            {
-                messagef("skipping bad link / annot item %i.", i);
+                mupdf::PdfObj page_obj = mupdf::pdf_new_indirect(pdf, xref, 0);
+                JM_add_annots_from_strings(pdf, page_obj, linklist, lcount);
             }
+            Py_CLEAR(item);
         }
     }
     catch (std::exception&)
     {
+        Py_XDECREF(item);
         PyErr_Clear();
         return nullptr;
     }
@@ -3004,6 +3045,262 @@ PyObject* get_cdrawings(mupdf::FzPage& page, PyObject *extended=NULL, PyObject *
 }
 
 
+//-----------------------------------------------------------------------------
+// Helpers for Page.get_drawings(): convert the point-likes, rect-likes and
+// quad-likes of get_cdrawings() output to Point, Rect and Quad objects.
+// Objects are created without running the classes' generic __init__().
+//-----------------------------------------------------------------------------
+static PyObject* JM_new_object(PyObject* type)
+{
+    static PyObject* no_args = PyTuple_New(0);
+    newfunc tp_new = (newfunc) PyType_GetSlot((PyTypeObject*) type, Py_tp_new);
+    return tp_new((PyTypeObject*) type, no_args, NULL);
+}
+
+static int JM_set_float_attr(PyObject* obj, PyObject* name, double value)
+{
+    PyObject* f = PyFloat_FromDouble(value);
+    if (!f) return -1;
+    int rc = PyObject_SetAttr(obj, name, f);
+    Py_DECREF(f);
+    return rc;
+}
+
+static PyObject* JM_drawings_point(PyObject* point_type, PyObject* p)
+{
+    static PyObject* x = PyUnicode_InternFromString("x");
+    static PyObject* y = PyUnicode_InternFromString("y");
+    if (!PyTuple_Check(p) || PyTuple_Size(p) != 2)
+    {
+        return PyObject_CallFunctionObjArgs(point_type, p, NULL);
+    }
+    double v[2];
+    for (int i = 0; i < 2; i++)
+    {
+        v[i] = PyFloat_AsDouble(PyTuple_GET_ITEM(p, i));
+        if (v[i] == -1 && PyErr_Occurred()) return NULL;
+    }
+    PyObject* obj = JM_new_object(point_type);
+    if (!obj) return NULL;
+    if (JM_set_float_attr(obj, x, v[0]) || JM_set_float_attr(obj, y, v[1]))
+    {
+        Py_DECREF(obj);
+        return NULL;
+    }
+    return obj;
+}
+
+static PyObject* JM_drawings_rect(PyObject* rect_type, PyObject* r, int normalize)
+{
+    static PyObject* names[4] = {
+            PyUnicode_InternFromString("x0"),
+            PyUnicode_InternFromString("y0"),
+            PyUnicode_InternFromString("x1"),
+            PyUnicode_InternFromString("y1"),
+            };
+    if (!PyTuple_Check(r) || PyTuple_Size(r) != 4)
+    {
+        PyObject* obj = PyObject_CallFunctionObjArgs(rect_type, r, NULL);
+        if (obj && normalize)
+        {
+            PyObject* rc = PyObject_CallMethod(obj, "normalize", NULL);
+            if (!rc)
+            {
+                Py_DECREF(obj);
+                return NULL;
+            }
+            Py_DECREF(rc);
+        }
+        return obj;
+    }
+    double v[4];
+    for (int i = 0; i < 4; i++)
+    {
+        v[i] = PyFloat_AsDouble(PyTuple_GET_ITEM(r, i));
+        if (v[i] == -1 && PyErr_Occurred()) return NULL;
+    }
+    if (normalize)  // as Rect.normalize()
+    {
+        if (v[2] < v[0]) std::swap(v[0], v[2]);
+        if (v[3] < v[1]) std::swap(v[1], v[3]);
+    }
+    PyObject* obj = JM_new_object(rect_type);
+    if (!obj) return NULL;
+    for (int i = 0; i < 4; i++)
+    {
+        if (JM_set_float_attr(obj, names[i], v[i]))
+        {
+            Py_DECREF(obj);
+            return NULL;
+        }
+    }
+    return obj;
+}
+
+static PyObject* JM_drawings_quad(PyObject* point_type, PyObject* quad_type, PyObject* q)
+{
+    static PyObject* names[4] = {
+            PyUnicode_InternFromString("ul"),
+            PyUnicode_InternFromString("ur"),
+            PyUnicode_InternFromString("ll"),
+            PyUnicode_InternFromString("lr"),
+            };
+    if (!PyTuple_Check(q) || PyTuple_Size(q) != 4)
+    {
+        return PyObject_CallFunctionObjArgs(quad_type, q, NULL);
+    }
+    PyObject* obj = JM_new_object(quad_type);
+    if (!obj) return NULL;
+    for (int i = 0; i < 4; i++)
+    {
+        PyObject* p = JM_drawings_point(point_type, PyTuple_GET_ITEM(q, i));
+        int rc = p ? PyObject_SetAttr(obj, names[i], p) : -1;
+        Py_XDECREF(p);
+        if (rc)
+        {
+            Py_DECREF(obj);
+            return NULL;
+        }
+    }
+    return obj;
+}
+
+static PyObject* JM_drawings_item(
+        PyObject* point_type,
+        PyObject* rect_type,
+        PyObject* quad_type,
+        PyObject* item
+        )
+{
+    if (!PyTuple_Check(item) || PyTuple_Size(item) < 1)
+    {
+        PyErr_SetString(PyExc_ValueError, "bad path item");
+        return NULL;
+    }
+    PyObject* cmd = PyTuple_GET_ITEM(item, 0);
+    const char* c = PyUnicode_AsUTF8(cmd);
+    if (!c) return NULL;
+    Py_ssize_t n = PyTuple_Size(item);
+    if (!strcmp(c, "re") && n == 3)
+    {
+        PyObject* rect = JM_drawings_rect(rect_type, PyTuple_GET_ITEM(item, 1), 1);
+        if (!rect) return NULL;
+        return Py_BuildValue("ONO", cmd, rect, PyTuple_GET_ITEM(item, 2));
+    }
+    if (!strcmp(c, "qu") && n == 2)
+    {
+        PyObject* quad = JM_drawings_quad(point_type, quad_type, PyTuple_GET_ITEM(item, 1));
+        if (!quad) return NULL;
+        return Py_BuildValue("ON", cmd, quad);
+    }
+    PyObject* out = PyTuple_New(n);
+    if (!out) return NULL;
+    Py_INCREF(cmd);
+    PyTuple_SET_ITEM(out, 0, cmd);
+    for (Py_ssize_t i = 1; i < n; i++)
+    {
+        PyObject* p = JM_drawings_point(point_type, PyTuple_GET_ITEM(item, i));
+        if (!p)
+        {
+            Py_DECREF(out);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(out, i, p);
+    }
+    return out;
+}
+
+PyObject* drawings_as_objects(
+        PyObject* paths,
+        PyObject* point_type,
+        PyObject* rect_type,
+        PyObject* quad_type
+        )
+{
+    /* Modifies the path dictionaries of list <paths> in place, like the
+    Python loop of Page.get_drawings(), and returns <paths>. */
+    static const char* default_keys[] = {
+            "closePath", "fill", "color", "width", "lineCap", "lineJoin",
+            "dashes", "stroke_opacity", "fill_opacity", "even_odd", NULL,
+            };
+    if (!PyList_Check(paths))
+    {
+        PyErr_SetString(PyExc_TypeError, "paths must be a list");
+        return NULL;
+    }
+    Py_ssize_t count = PyList_Size(paths);
+    for (Py_ssize_t i = 0; i < count; i++)
+    {
+        PyObject* path = PyList_GET_ITEM(paths, i);
+        PyObject* type = PyDict_Check(path) ? PyDict_GetItemString(path, "type") : NULL;
+        const char* t = type ? PyUnicode_AsUTF8(type) : NULL;
+        if (!t)
+        {
+            if (!PyErr_Occurred()) PyErr_SetString(PyExc_ValueError, "bad path");
+            return NULL;
+        }
+        // With Py_LIMITED_API, PyUnicode_AsUTF8() reuses its buffer: so we
+        // evaluate the type before looking at items.
+        const char* key = strncmp(t, "clip", 4) ? "rect" : "scissor";
+        int is_group = !strcmp(t, "group");
+        int has_defaults = !strcmp(t, "f") || !strcmp(t, "s");
+        PyObject* value = PyDict_GetItemString(path, key);
+        if (!value)
+        {
+            PyErr_SetString(PyExc_KeyError, key);
+            return NULL;
+        }
+        PyObject* rect = JM_drawings_rect(rect_type, value, 0);
+        if (!rect || PyDict_SetItemString(path, key, rect))
+        {
+            Py_XDECREF(rect);
+            return NULL;
+        }
+        Py_DECREF(rect);
+        if (!is_group)
+        {
+            PyObject* items = PyDict_GetItem(path, dictkey_items);
+            if (!items || !PyList_Check(items))
+            {
+                PyErr_SetString(PyExc_KeyError, "items");
+                return NULL;
+            }
+            Py_ssize_t n = PyList_Size(items);
+            PyObject* newitems = PyList_New(n);
+            if (!newitems) return NULL;
+            for (Py_ssize_t j = 0; j < n; j++)
+            {
+                PyObject* item = JM_drawings_item(
+                        point_type, rect_type, quad_type, PyList_GET_ITEM(items, j)
+                        );
+                if (!item)
+                {
+                    Py_DECREF(newitems);
+                    return NULL;
+                }
+                PyList_SET_ITEM(newitems, j, item);
+            }
+            int rc = PyDict_SetItem(path, dictkey_items, newitems);
+            Py_DECREF(newitems);
+            if (rc) return NULL;
+        }
+        if (has_defaults)
+        {
+            for (const char** k = default_keys; *k; k++)
+            {
+                if (!PyDict_GetItemString(path, *k)
+                        && PyDict_SetItemString(path, *k, Py_None))
+                {
+                    return NULL;
+                }
+            }
+        }
+    }
+    Py_INCREF(paths);
+    return paths;
+}
+
+
 static int detect_super_script(fz_stext_line *line, fz_stext_char *ch)
 {
     if (line->wmode == 0 && line->dir.x == 1 && line->dir.y == 0)
@@ -3520,6 +3817,395 @@ PyObject* extractBLOCKS(mupdf::FzStextPage& self)
     return lines.release();
 }
 
+//-----------------------------------------------------------------------------
+// Columnar output of chars, words or spans: instead of a Python object per
+// item, we fill one std::vector per attribute and return each as a bytes
+// object, which TextPage.extract_columns() wraps in an array.array.
+//-----------------------------------------------------------------------------
+struct JM_columns
+{
+    int level;  /* 0: chars, 1: words, 2: spans. */
+    PyObject* delimiters;
+    fz_rect tp_rect;
+    
+    std::vector<float> x0, y0, x1, y1;
+    std::vector<float> origin_x, origin_y, size, ascender, descender, dir_x, dir_y;
+    std::vector<int32_t> block, line, span, word, font;
+    std::vector<uint32_t> c, flags, char_flags, color, alpha;
+    
+    /* List of str for words and spans. */
+    ScopedPyObject text;
+    
+    /* List of font names; `font` values are indexes into this list. */
+    ScopedPyObject fonts;
+    std::map<std::string, int32_t> font_ids;
+    fz_font* last_font = nullptr;
+    int32_t last_font_id = -1;
+    
+    int32_t font_id(fz_font* f)
+    {
+        if (f == last_font) return last_font_id;
+        std::string name = JM_font_name(f);
+        auto it = font_ids.find(name);
+        int32_t id;
+        if (it == font_ids.end())
+        {
+            id = (int32_t) font_ids.size();
+            font_ids[name] = id;
+            LIST_APPEND_DROP(fonts.get(), JM_EscapeStrFromStr(name.c_str()));
+        }
+        else
+        {
+            id = it->second;
+        }
+        last_font = f;
+        last_font_id = id;
+        return id;
+    }
+    
+    void append_rect(const fz_rect& r)
+    {
+        x0.push_back(r.x0);
+        y0.push_back(r.y0);
+        x1.push_back(r.x1);
+        y1.push_back(r.y1);
+    }
+};
+
+template<typename T>
+static void JM_columns_set(PyObject* columns, const char* name, const std::vector<T>& v)
+{
+    DICT_SETITEMSTR_DROP(
+            columns,
+            name,
+            PyBytes_FromStringAndSize((const char*) v.data(), (Py_ssize_t) (v.size() * sizeof(T)))
+            );
+}
+
+/* Span style as used by JM_make_spanlist(). */
+struct JM_columns_style
+{
+    float size = -1;
+    unsigned flags = 0;
+    unsigned char_flags = 0;
+    const char* font = "";
+    unsigned argb = 0;
+    
+    bool operator!= (const JM_columns_style& rhs) const
+    {
+        return size != rhs.size
+                || flags != rhs.flags
+                || char_flags != rhs.char_flags
+                || argb != rhs.argb
+                || strcmp(font, rhs.font) != 0
+                ;
+    }
+};
+
+/* Adds spans or chars of a line, using the same span boundaries and
+clipping as JM_make_spanlist(). */
+static void JM_columns_line(JM_columns& cols, fz_stext_line* line, int block_n, int line_n, fz_buffer* buff)
+{
+    JM_columns_style old_style;
+    JM_columns_style style;
+    fz_rect span_rect = fz_empty_rect;
+    fz_point span_origin = {0, 0};
+    fz_font* span_font = nullptr;
+    int span_n = -1;
+    size_t span_char0 = cols.c.size();
+    
+    auto flush = [&](bool last)
+    {
+        if (span_n < 0) return;
+        if (last && fz_is_empty_rect(span_rect))
+        {
+            /* JM_make_spanlist() drops a final empty span. */
+            if (cols.level == 0)
+            {
+                size_t n = span_char0;
+                cols.x0.resize(n); cols.y0.resize(n); cols.x1.resize(n); cols.y1.resize(n);
+                cols.origin_x.resize(n); cols.origin_y.resize(n); cols.size.resize(n);
+                cols.dir_x.resize(n); cols.dir_y.resize(n);
+                cols.block.resize(n); cols.line.resize(n); cols.span.resize(n);
+                cols.font.resize(n); cols.c.resize(n); cols.flags.resize(n);
+                cols.char_flags.resize(n); cols.color.resize(n); cols.alpha.resize(n);
+            }
+            return;
+        }
+        if (cols.level != 2) return;
+        float asc = JM_font_ascender(span_font);
+        float desc = JM_font_descender(span_font);
+        if (asc < 1e-3)
+        {
+            asc = 0.9f;
+            desc = -0.1f;
+        }
+        cols.append_rect(span_rect);
+        cols.origin_x.push_back(span_origin.x);
+        cols.origin_y.push_back(span_origin.y);
+        cols.dir_x.push_back(line->dir.x);
+        cols.dir_y.push_back(line->dir.y);
+        cols.size.push_back(old_style.size);
+        cols.ascender.push_back(asc);
+        cols.descender.push_back(desc);
+        cols.block.push_back(block_n);
+        cols.line.push_back(line_n);
+        cols.span.push_back(span_n);
+        cols.font.push_back(cols.font_id(span_font));
+        cols.flags.push_back(old_style.flags);
+        cols.char_flags.push_back(old_style.char_flags);
+        cols.color.push_back(old_style.argb & 0xffffff);
+        cols.alpha.push_back(old_style.argb >> 24);
+        LIST_APPEND_DROP(cols.text.get(), JM_EscapeStrFromBuffer(buff));
+        mupdf::ll_fz_clear_buffer(buff);
+    };
+    
+    for (fz_stext_char* ch = line->first_char; ch; ch = ch->next)
+    {
+        fz_rect r = JM_char_bbox(line, ch);
+        if (!JM_rects_overlap(cols.tp_rect, r) && !fz_is_infinite_rect(cols.tp_rect))
+        {
+            continue;
+        }
+        style.size = ch->size;
+        style.flags = JM_char_font_flags(ch->font, line, ch);
+        style.char_flags = ch->flags & ~FZ_STEXT_SYNTHETIC;
+        style.font = JM_font_name(ch->font);
+        style.argb = ch->argb;
+        if (span_n < 0 || style != old_style)
+        {
+            flush(false);
+            span_n += 1;
+            old_style = style;
+            span_rect = r;
+            span_origin = ch->origin;
+            span_font = ch->font;
+            span_char0 = cols.c.size();
+        }
+        span_rect = fz_union_rect(span_rect, r);
+        if (cols.level == 0)
+        {
+            cols.append_rect(r);
+            cols.origin_x.push_back(ch->origin.x);
+            cols.origin_y.push_back(ch->origin.y);
+            cols.dir_x.push_back(line->dir.x);
+            cols.dir_y.push_back(line->dir.y);
+            cols.size.push_back(ch->size);
+            cols.block.push_back(block_n);
+            cols.line.push_back(line_n);
+            cols.span.push_back(span_n);
+            cols.font.push_back(cols.font_id(ch->font));
+            cols.c.push_back((uint32_t) ch->c);
+            cols.flags.push_back(style.flags);
+            cols.char_flags.push_back(ch->flags);
+            cols.color.push_back(ch->argb & 0xffffff);
+            cols.alpha.push_back(ch->argb >> 24);
+        }
+        else
+        {
+            JM_append_rune(buff, ch->c);
+        }
+    }
+    flush(true);
+    mupdf::ll_fz_clear_buffer(buff);
+}
+
+/* Adds chars or spans of all text blocks, using the same block and line
+numbers as _as_dict(). */
+static int _as_columns(JM_columns& cols, fz_stext_block* block, fz_buffer* buff, int block_n)
+{
+    fz_rect tp_rect = cols.tp_rect;
+    for (; block; block = block->next)
+    {
+        switch (block->type)
+        {
+            case FZ_STEXT_BLOCK_STRUCT:
+                if (block->u.s.down && block->u.s.down->first_block)
+                {
+                    block_n++;
+                    block_n = _as_columns(cols, block->u.s.down->first_block, buff, block_n);
+                }
+                break;
+            
+            case FZ_STEXT_BLOCK_TEXT:
+                if (JM_rects_overlap(tp_rect, block->bbox) || fz_is_infinite_rect(tp_rect))
+                {
+                    block_n++;
+                    int line_n = -1;
+                    for (fz_stext_line* line = block->u.t.first_line; line; line = line->next)
+                    {
+                        if (fz_is_empty_rect(fz_intersect_rect(tp_rect, line->bbox))
+                                && !fz_is_infinite_rect(tp_rect)
+                                )
+                        {
+                            continue;
+                        }
+                        line_n++;
+                        JM_columns_line(cols, line, block_n, line_n, buff);
+                    }
+                }
+                break;
+            
+            case FZ_STEXT_BLOCK_IMAGE:
+                if (fz_contains_rect(tp_rect, block->bbox) || fz_is_infinite_rect(tp_rect))
+                {
+                    block_n++;
+                }
+                break;
+            
+            case FZ_STEXT_BLOCK_VECTOR:
+            case FZ_STEXT_BLOCK_GRID:
+                if (JM_rects_overlap(tp_rect, block->bbox) || fz_is_infinite_rect(tp_rect))
+                {
+                    block_n++;
+                }
+                break;
+        }
+    }
+    return block_n;
+}
+
+/* Adds a word, like JM_append_word(). */
+static int JM_columns_append_word(JM_columns& cols, fz_buffer* buff, fz_rect* wbbox, int block_n, int line_n, int word_n)
+{
+    cols.append_rect(*wbbox);
+    cols.block.push_back(block_n);
+    cols.line.push_back(line_n);
+    cols.word.push_back(word_n);
+    LIST_APPEND_DROP(cols.text.get(), JM_EscapeStrFromBuffer(buff));
+    *wbbox = fz_empty_rect;
+    return word_n + 1;
+}
+
+/* Adds words, using the same rules and numbering as _as_words(). */
+static int _as_columns_words(JM_columns& cols, fz_stext_block* block, fz_buffer* buff, int block_n)
+{
+    fz_rect tp_rect = cols.tp_rect;
+    for (; block; block = block->next)
+    {
+        switch (block->type)
+        {
+            case FZ_STEXT_BLOCK_STRUCT:
+                if (block->u.s.down)
+                {
+                    block_n = _as_columns_words(cols, block->u.s.down->first_block, buff, block_n);
+                }
+                break;
+            
+            case FZ_STEXT_BLOCK_TEXT:
+            {
+                block_n++;
+                fz_rect wbbox = fz_empty_rect;
+                int line_n = -1;
+                for (fz_stext_line* line = block->u.t.first_line; line; line = line->next)
+                {
+                    line_n++;
+                    int word_n = 0;
+                    mupdf::ll_fz_clear_buffer(buff);
+                    int last_char_rtl = 0;
+                    for (fz_stext_char* ch = line->first_char; ch; ch = ch->next)
+                    {
+                        fz_rect cbbox = JM_char_bbox(line, ch);
+                        if (!JM_rects_overlap(tp_rect, cbbox) && !fz_is_infinite_rect(tp_rect))
+                        {
+                            continue;
+                        }
+                        if (mupdf::ll_fz_buffer_storage(buff, NULL) == 0 && ch->c == 0x200d)
+                        {
+                            continue;
+                        }
+                        int word_delimiter = JM_is_word_delimiter(ch->c, cols.delimiters);
+                        int this_char_rtl = JM_is_rtl_char(ch->c);
+                        if (word_delimiter || this_char_rtl != last_char_rtl)
+                        {
+                            if (mupdf::ll_fz_buffer_storage(buff, NULL) == 0 && word_delimiter)
+                            {
+                                continue;
+                            }
+                            if (!fz_is_empty_rect(wbbox))
+                            {
+                                word_n = JM_columns_append_word(cols, buff, &wbbox, block_n, line_n, word_n);
+                            }
+                            mupdf::ll_fz_clear_buffer(buff);
+                            if (word_delimiter) continue;
+                        }
+                        JM_append_rune(buff, ch->c);
+                        last_char_rtl = this_char_rtl;
+                        wbbox = fz_union_rect(wbbox, cbbox);
+                    }
+                    if (mupdf::ll_fz_buffer_storage(buff, NULL) && !fz_is_empty_rect(wbbox))
+                    {
+                        word_n = JM_columns_append_word(cols, buff, &wbbox, block_n, line_n, word_n);
+                    }
+                    mupdf::ll_fz_clear_buffer(buff);
+                }
+                break;
+            }
+        }
+    }
+    return block_n;
+}
+
+PyObject* extract_columns(mupdf::FzStextPage& this_tpage, int level, PyObject* delimiters)
+{
+    JM_columns cols;
+    cols.level = level;
+    cols.delimiters = delimiters;
+    cols.tp_rect = this_tpage.m_internal->mediabox;
+    cols.text = PyList_New(0);
+    cols.fonts = PyList_New(0);
+    mupdf::FzBuffer buff = mupdf::fz_new_buffer(64);
+    fz_stext_block* block = this_tpage.m_internal->first_block;
+    if (level == 1)
+    {
+        _as_columns_words(cols, block, buff.m_internal, -1);
+    }
+    else
+    {
+        _as_columns(cols, block, buff.m_internal, -1);
+    }
+    
+    ScopedPyObject columns(PyDict_New());
+    PyObject* d = columns.get();
+    JM_columns_set(d, "x0", cols.x0);
+    JM_columns_set(d, "y0", cols.y0);
+    JM_columns_set(d, "x1", cols.x1);
+    JM_columns_set(d, "y1", cols.y1);
+    JM_columns_set(d, "block", cols.block);
+    JM_columns_set(d, "line", cols.line);
+    if (level == 1)
+    {
+        JM_columns_set(d, "word", cols.word);
+        DICT_SETITEMSTR_DROP(d, "text", cols.text.release());
+    }
+    else
+    {
+        JM_columns_set(d, "span", cols.span);
+        JM_columns_set(d, "origin_x", cols.origin_x);
+        JM_columns_set(d, "origin_y", cols.origin_y);
+        JM_columns_set(d, "dir_x", cols.dir_x);
+        JM_columns_set(d, "dir_y", cols.dir_y);
+        JM_columns_set(d, "size", cols.size);
+        JM_columns_set(d, "font", cols.font);
+        JM_columns_set(d, "flags", cols.flags);
+        JM_columns_set(d, "char_flags", cols.char_flags);
+        JM_columns_set(d, "color", cols.color);
+        JM_columns_set(d, "alpha", cols.alpha);
+        DICT_SETITEMSTR_DROP(d, "fonts", cols.fonts.release());
+        if (level == 0)
+        {
+            JM_columns_set(d, "c", cols.c);
+        }
+        else
+        {
+            JM_columns_set(d, "ascender", cols.ascender);
+            JM_columns_set(d, "descender", cols.descender);
+            DICT_SETITEMSTR_DROP(d, "text", cols.text.release());
+        }
+    }
+    return columns.release();
+}
+
 #define EMPTY_STRING PyUnicode_FromString("")
 
 static PyObject *JM_UnicodeFromStr(const char *c)
@@ -3906,6 +4592,76 @@ void JM_make_textpage_dict(fz_stext_page *tp, PyObject *page_dict, int raw)
     fz_drop_buffer(ctx, text_buffer);
 }
 
+//-----------------------------------------------------------------------------
+// Helpers for TextPage.blocks(), which creates block, line, span and char
+// items on demand instead of the complete dict of JM_make_textpage_dict().
+//-----------------------------------------------------------------------------
+fz_stext_block* JM_stext_block_down(fz_stext_block* block)
+{
+    if (block->type == FZ_STEXT_BLOCK_STRUCT && block->u.s.down)
+    {
+        return block->u.s.down->first_block;
+    }
+    return nullptr;
+}
+
+void JM_make_block_dict(fz_stext_block* block, PyObject* block_dict)
+{
+    /* Items of a block as added by _as_dict(), except for "type", "number",
+    and the "lines" and "bbox" of text blocks. */
+    switch (block->type)
+    {
+        case FZ_STEXT_BLOCK_TEXT:
+            DICT_SETITEMSTR_DROP(block_dict, "flags", Py_BuildValue("i", block->u.t.flags));
+            break;
+        case FZ_STEXT_BLOCK_STRUCT:
+            DICT_SETITEM_DROP(block_dict, dictkey_bbox, JM_py_from_rect(block->bbox));
+            JM_make_struct_block(block, block_dict);
+            break;
+        case FZ_STEXT_BLOCK_IMAGE:
+            DICT_SETITEM_DROP(block_dict, dictkey_bbox, JM_py_from_rect(block->bbox));
+            JM_make_image_block(block, block_dict);
+            break;
+        case FZ_STEXT_BLOCK_VECTOR:
+            JM_make_vector_block(block, block_dict);
+            break;
+        case FZ_STEXT_BLOCK_GRID:
+            JM_make_grid_block(block, block_dict);
+            break;
+    }
+}
+
+PyObject* JM_stext_line_chars(fz_stext_page* tp, fz_stext_line* line)
+{
+    /* Returns a list of (span, c, origin_x, origin_y, x0, y0, x1, y1,
+    char_flags) for the chars of a line, with span numbers as in
+    JM_make_spanlist(). */
+    JM_columns cols;
+    cols.level = 0;
+    cols.delimiters = nullptr;
+    cols.tp_rect = tp->mediabox;
+    cols.fonts = PyList_New(0);
+    mupdf::FzBuffer buff = mupdf::fz_new_buffer(64);
+    JM_columns_line(cols, line, 0, 0, buff.m_internal);
+    PyObject* chars = PyList_New((Py_ssize_t) cols.c.size());
+    for (size_t i = 0; i != cols.c.size(); ++i)
+    {
+        PyList_SET_ITEM(chars, (Py_ssize_t) i, Py_BuildValue(
+                "iIffffffI",
+                cols.span[i],
+                cols.c[i],
+                cols.origin_x[i],
+                cols.origin_y[i],
+                cols.x0[i],
+                cols.y0[i],
+                cols.x1[i],
+                cols.y1[i],
+                cols.char_flags[i]
+                ));
+    }
+    return chars;
+}
+
 //-----------------------------------------------------------------
 // get one pixel as a list
 //-----------------------------------------------------------------
@@ -4386,6 +5142,332 @@ PyObject* ll_JM_color_count(fz_pixmap *pm, PyObject *clip)
     return rc;
 }
 
+/* Throws a MuPDF error with <message> and the repr() of the pending Python
+exception, which is cleared. fz_throw() does not run C++ destructors, so the
+text is copied to a fixed size buffer before. */
+static void jm_throw_python_error(fz_context* ctx, const char* message)
+{
+    char text[512];
+    {
+        std::string detail;
+        PyObject *type, *value, *traceback;
+        PyErr_Fetch(&type, &value, &traceback);
+        PyErr_NormalizeException(&type, &value, &traceback);
+        if (value)
+        {
+            detail = ": " + repr(value);
+        }
+        Py_XDECREF(type);
+        Py_XDECREF(value);
+        Py_XDECREF(traceback);
+        fz_snprintf(text, sizeof(text), "%s%s", message, detail.c_str());
+    }
+    fz_throw(ctx, FZ_ERROR_SYSTEM, "%s", text);
+}
+
+/* A fz_stream reading from a Python file object with seek() and readinto()
+methods, for Document(fileobj=...). Data is read on demand in blocks of
+<block_size> bytes, of which the <cache_blocks> least recently used are
+kept. */
+typedef struct
+{
+    PyObject* fileobj;
+    int64_t length;
+    int block_size;
+    int cache_blocks;
+    int64_t clock;
+    int64_t* block_number;  /* per slot; -1 if unused */
+    int64_t* block_used;    /* per slot; clock at last use */
+    unsigned char* blocks;
+} jm_fileobj_state;
+
+static void jm_fileobj_read_block(fz_context* ctx, jm_fileobj_state* state, int64_t block, unsigned char* data, int64_t size)
+{
+    PyObject* rc = PyObject_CallMethod(state->fileobj, "seek", "L", (long long) (block * state->block_size));
+    int64_t done = 0;
+    while (rc && done < size)
+    {
+        Py_DECREF(rc);
+        PyObject* view = PyMemoryView_FromMemory((char*) data + done, size - done, PyBUF_WRITE);
+        if (!view)
+        {
+            rc = NULL;
+            break;
+        }
+        rc = PyObject_CallMethod(state->fileobj, "readinto", "O", view);
+        Py_DECREF(view);
+        if (!rc) break;
+        Py_ssize_t n = PyLong_AsSsize_t(rc);
+        if (n <= 0)
+        {
+            if (!PyErr_Occurred())
+            {
+                PyErr_SetString(PyExc_EOFError, "file object shorter than expected");
+            }
+            Py_CLEAR(rc);
+            break;
+        }
+        done += n;
+    }
+    if (!rc)
+    {
+        jm_throw_python_error(ctx, "cannot read file object");
+    }
+    Py_DECREF(rc);
+}
+
+static int jm_fileobj_next(fz_context* ctx, fz_stream* stm, size_t max)
+{
+    jm_fileobj_state* state = (jm_fileobj_state*) stm->state;
+    if (stm->pos >= state->length) return EOF;
+    int64_t block = stm->pos / state->block_size;
+    int64_t start = block * state->block_size;
+    int64_t size = fz_mini64(state->block_size, state->length - start);
+    int slot = 0;
+    for (int i = 0; i < state->cache_blocks; ++i)
+    {
+        if (state->block_number[i] == block)
+        {
+            slot = i;
+            break;
+        }
+        if (state->block_used[i] < state->block_used[slot]) slot = i;
+    }
+    unsigned char* data = state->blocks + (size_t) slot * state->block_size;
+    if (state->block_number[slot] != block)
+    {
+        state->block_number[slot] = -1;
+        jm_fileobj_read_block(ctx, state, block, data, size);
+        state->block_number[slot] = block;
+    }
+    state->block_used[slot] = ++state->clock;
+    stm->rp = data + (stm->pos - start);
+    stm->wp = data + size;
+    stm->pos = start + size;
+    return *stm->rp++;
+}
+
+static void jm_fileobj_seek(fz_context* ctx, fz_stream* stm, int64_t offset, int whence)
+{
+    jm_fileobj_state* state = (jm_fileobj_state*) stm->state;
+    if (whence == SEEK_END) offset += state->length;
+    else if (whence == SEEK_CUR) offset += stm->pos;
+    stm->pos = fz_clamp64(offset, 0, state->length);
+    stm->rp = stm->wp = state->blocks;
+}
+
+static void jm_fileobj_drop(fz_context* ctx, void* state_)
+{
+    jm_fileobj_state* state = (jm_fileobj_state*) state_;
+    Py_XDECREF(state->fileobj);
+    fz_free(ctx, state->block_number);
+    fz_free(ctx, state->block_used);
+    fz_free(ctx, state->blocks);
+    fz_free(ctx, state);
+}
+
+mupdf::FzStream JM_new_fileobj_stream(PyObject* fileobj, long long length, int block_size, int cache_blocks)
+{
+    fz_context* ctx = mupdf::internal_context_get();
+    block_size = fz_maxi(block_size, 1);
+    cache_blocks = fz_maxi(cache_blocks, 1);
+    jm_fileobj_state* state = (jm_fileobj_state*) mupdf::ll_fz_calloc(1, sizeof(*state));
+    state->length = length;
+    state->block_size = block_size;
+    state->cache_blocks = cache_blocks;
+    try
+    {
+        state->block_number = (int64_t*) mupdf::ll_fz_malloc(cache_blocks * sizeof(int64_t));
+        state->block_used = (int64_t*) mupdf::ll_fz_calloc(cache_blocks, sizeof(int64_t));
+        state->blocks = (unsigned char*) mupdf::ll_fz_malloc((size_t) cache_blocks * block_size);
+    }
+    catch (...)
+    {
+        jm_fileobj_drop(ctx, state);
+        throw;
+    }
+    for (int i = 0; i < cache_blocks; ++i)
+    {
+        state->block_number[i] = -1;
+    }
+    Py_INCREF(fileobj);
+    state->fileobj = fileobj;
+    /* On error, this drops the state. */
+    fz_stream* stm = mupdf::ll_fz_new_stream(state, jm_fileobj_next, jm_fileobj_drop);
+    stm->seek = jm_fileobj_seek;
+    return mupdf::FzStream(stm);
+}
+
+/* A fz_output writing to a Python file object's write() method, for
+Document.save() to file objects. MuPDF collects output in a buffer, so
+write() is called with large pieces of data. Positions count from the start
+of the output. If write() fails, its Python exception is kept in the state
+for JM_write_document_fileobj() to raise. */
+typedef struct
+{
+    PyObject* fileobj;
+    int64_t pos;
+    PyObject* error_type;
+    PyObject* error_value;
+    PyObject* error_traceback;
+} jm_fileobj_output_state;
+
+/* Moves the pending Python exception to <state> and throws a MuPDF error. */
+static void jm_fileobj_output_error(fz_context* ctx, jm_fileobj_output_state* state)
+{
+    if (state->error_type)
+    {
+        PyErr_Clear();
+    }
+    else
+    {
+        PyErr_Fetch(&state->error_type, &state->error_value, &state->error_traceback);
+    }
+    fz_throw(ctx, FZ_ERROR_SYSTEM, "cannot write file object");
+}
+
+static void jm_fileobj_output_write(fz_context* ctx, void* state_, const void* data, size_t n)
+{
+    jm_fileobj_output_state* state = (jm_fileobj_output_state*) state_;
+    const char* p = (const char*) data;
+    while (n > 0)
+    {
+        /* A copy, because write() may keep a reference to its argument. */
+        PyObject* bytes = PyBytes_FromStringAndSize(p, (Py_ssize_t) n);
+        PyObject* rc = (bytes) ? PyObject_CallMethod(state->fileobj, "write", "O", bytes) : NULL;
+        Py_XDECREF(bytes);
+        if (!rc)
+        {
+            jm_fileobj_output_error(ctx, state);
+        }
+        /* Raw files may write less than passed, but writing nothing would
+        lose data. Other return values, including None, mean that all was
+        written. */
+        size_t done = n;
+        if (PyLong_Check(rc))
+        {
+            Py_ssize_t k = PyLong_AsSsize_t(rc);
+            PyErr_Clear();
+            if (k == 0)
+            {
+                Py_DECREF(rc);
+                PyErr_SetString(PyExc_OSError, "file object write() returned 0");
+                jm_fileobj_output_error(ctx, state);
+            }
+            if (k > 0 && (size_t) k < n) done = (size_t) k;
+        }
+        Py_DECREF(rc);
+        state->pos += done;
+        p += done;
+        n -= done;
+    }
+}
+
+static int64_t jm_fileobj_output_tell(fz_context* ctx, void* state_)
+{
+    jm_fileobj_output_state* state = (jm_fileobj_output_state*) state_;
+    return state->pos;
+}
+
+static void jm_fileobj_output_drop(fz_context* ctx, void* state_)
+{
+    jm_fileobj_output_state* state = (jm_fileobj_output_state*) state_;
+    Py_XDECREF(state->fileobj);
+    Py_XDECREF(state->error_type);
+    Py_XDECREF(state->error_value);
+    Py_XDECREF(state->error_traceback);
+    fz_free(ctx, state);
+}
+
+/* Writes <pdf> to file object <fileobj> in pieces of <buffer_size> bytes.
+Returns None, or NULL with the exception from write() set. */
+PyObject* JM_write_document_fileobj(mupdf::PdfDocument& pdf, PyObject* fileobj, mupdf::PdfWriteOptions& opts, int buffer_size)
+{
+    jm_fileobj_output_state* state = (jm_fileobj_output_state*) mupdf::ll_fz_calloc(1, sizeof(*state));
+    Py_INCREF(fileobj);
+    state->fileobj = fileobj;
+    /* On error, this drops the state. */
+    fz_output* out_ = mupdf::ll_fz_new_output(fz_maxi(buffer_size, 1), state, jm_fileobj_output_write, NULL, jm_fileobj_output_drop);
+    out_->tell = jm_fileobj_output_tell;
+    mupdf::FzOutput out(out_);
+    try
+    {
+        mupdf::pdf_write_document(pdf, out, opts);
+        mupdf::fz_close_output(out);
+    }
+    catch (...)
+    {
+        /* Discard buffered output, so that closing does not write again. */
+        out_->wp = out_->bp;
+        mupdf::ll_fz_close_output(out_);
+        if (!state->error_type) throw;
+    }
+    if (state->error_type)
+    {
+        PyErr_Restore(state->error_type, state->error_value, state->error_traceback);
+        state->error_type = state->error_value = state->error_traceback = NULL;
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+//-----------------------------------------------------------------------------
+// Glyph advances (font size 1) of all characters of a str, as a list of
+// floats, with the character encoding of Font.glyph_advance().
+//-----------------------------------------------------------------------------
+PyObject* Font_char_advances(
+        mupdf::FzFont& font,
+        PyObject* text,
+        int script,
+        int lang,
+        int wmode,
+        int small_caps
+        )
+{
+    Py_ssize_t n = PyUnicode_GetLength(text);
+    if (n < 0) return nullptr;
+    Py_UCS4* chars = PyUnicode_AsUCS4Copy(text);
+    if (!chars) return nullptr;
+    PyObject* ret = PyList_New(n);
+    if (!ret)
+    {
+        PyMem_Free(chars);
+        return nullptr;
+    }
+    try
+    {
+        for (Py_ssize_t i = 0; i < n; i++)
+        {
+            fz_font* out_font = font.m_internal;
+            int gid;
+            if (small_caps)
+            {
+                gid = mupdf::ll_fz_encode_character_sc(out_font, (int) chars[i]);
+            }
+            else
+            {
+                gid = mupdf::ll_fz_encode_character_with_fallback(
+                        font.m_internal,
+                        (int) chars[i],
+                        script,
+                        lang,
+                        &out_font
+                        );
+            }
+            float adv = mupdf::ll_fz_advance_glyph(out_font, gid, wmode);
+            PyList_SetItem(ret, i, PyFloat_FromDouble((double) adv));
+        }
+    }
+    catch (...)
+    {
+        PyMem_Free(chars);
+        Py_DECREF(ret);
+        throw;
+    }
+    PyMem_Free(chars);
+    return ret;
+}
+
 %}
 
 /* Declarations for functions defined above. */
@@ -4452,6 +5534,7 @@ PyObject* xref_object(mupdf::FzDocument& document, int xref, int compressed=0, i
 PyObject* Link_is_external(mupdf::FzLink& this_link);
 PyObject* Page_addAnnot_FromString(mupdf::PdfPage& page, PyObject* linklist);
 PyObject* Page_addAnnot_FromString(mupdf::FzPage& page, PyObject* linklist);
+PyObject* Document_addAnnots_FromString(mupdf::PdfDocument& pdf, PyObject* page_links);
 mupdf::FzLink Link_next(mupdf::FzLink& this_link);
 
 static int page_count_fz2(void* document);
@@ -4481,6 +5564,7 @@ void set_small_glyph_heights(int on);
 
 mupdf::FzRect JM_cropbox(mupdf::PdfObj& page_obj);
 PyObject* get_cdrawings(mupdf::FzPage& page, PyObject *extended=NULL, PyObject *callback=NULL, PyObject *method=NULL);
+PyObject* drawings_as_objects(PyObject* paths, PyObject* point_type, PyObject* rect_type, PyObject* quad_type);
 
 mupdf::FzRect JM_make_spanlist(
         PyObject *line_dict,
@@ -4492,6 +5576,7 @@ mupdf::FzRect JM_make_spanlist(
 
 PyObject* extractWORDS(mupdf::FzStextPage& this_tpage, PyObject *delimiters);
 PyObject* extractBLOCKS(mupdf::FzStextPage& self);
+PyObject* extract_columns(mupdf::FzStextPage& this_tpage, int level, PyObject* delimiters);
 
 PyObject* link_uri(mupdf::FzLink& link);
 
@@ -4504,6 +5589,9 @@ fz_stext_page* page_get_textpage(
 
 void make_table_dict(fz_stext_page *tp, PyObject *table_dict, PyObject *bbox);
 void JM_make_textpage_dict(fz_stext_page *tp, PyObject *page_dict, int raw);
+fz_stext_block* JM_stext_block_down(fz_stext_block* block);
+void JM_make_block_dict(fz_stext_block* block, PyObject* block_dict);
+PyObject* JM_stext_line_chars(fz_stext_page* tp, fz_stext_line* line);
 PyObject *pixmap_pixel(fz_pixmap* pm, int x, int y);
 int pixmap_n(mupdf::FzPixmap& pixmap);
 
@@ -4518,3 +5606,15 @@ alpha, and we copy the non-alpha bytes. If +1 <src> must not have alpha and
 void pixmap_copy(fz_pixmap* pm, const fz_pixmap* src, int n);
 
 PyObject* ll_JM_color_count(fz_pixmap *pm, PyObject *clip);
+
+mupdf::FzStream JM_new_fileobj_stream(PyObject* fileobj, long long length, int block_size, int cache_blocks);
+PyObject* JM_write_document_fileobj(mupdf::PdfDocument& pdf, PyObject* fileobj, mupdf::PdfWriteOptions& opts, int buffer_size);
+
+PyObject* Font_char_advances(
+        mupdf::FzFont& font,
+        PyObject* text,
+        int script,
+        int lang,
+        int wmode,
+        int small_caps
+        );
@@ -72,10 +72,12 @@ This is implemented as new class TableHeader with the properties:
 
 """
 
+import array
 import inspect
 import itertools
 import string
 import html
+from bisect import bisect_left, bisect_right
 from collections.abc import Sequence
 from contextvars import ContextVar
 from dataclasses import dataclass
@@ -88,12 +90,21 @@ from pymupdf import mupdf
 # re-imported here to keep the public pymupdf.table.* surface unchanged.
 # _table_union imports find_tables back from this module, so it is imported
 # lazily inside find_tables() instead, to avoid an import cycle.
+# All of them, and make_edges(), read the page through the PageAnalysis that
+# find_tables() binds for the duration of a call.
+from pymupdf._table_analysis import (
+    BoxIndex,
+    bind_analysis,
+    cluster_rects,
+    page_analysis,
+    unbind_analysis,
+)
 from pymupdf._table_refine import (
     refine_grid_structure,
     refine_grid_rows,
     _refine_cells_to_grid,
     _refine_grid_to_cells,
-    _refine_page_words,
+    _refine_word_index,
 )
 from pymupdf._table_spans import (
     resolve_spans,
@@ -109,9 +120,10 @@ from pymupdf._table_headers import (
     render_table_html,
 )
 
-# refine_grid is unused in this module; re-exported for the public
+# refine_grid and PageAnalysis are unused in this module; re-exported for the public
 # pymupdf.table.* surface.
 from pymupdf._table_refine import refine_grid  # noqa: F401  # pylint: disable=unused-import
+from pymupdf._table_analysis import PageAnalysis  # noqa: F401  # pylint: disable=unused-import
 
 # -------------------------------------------------------------------
 # Start of PyMuPDF interface code
@@ -195,7 +207,14 @@ def rect_in_rect(inner, outer):
 
 
 def chars_in_rect(CHARS, rect):
-    """Check whether any of the chars in CHAR are inside rectangle 'rect'."""
+    """Check whether any of the chars in CHAR are inside rectangle 'rect'.
+
+    CHARS may also be a BoxIndex of the chars, keyed by their "x0", "y0",
+    "x1" and "y1" values; then only chars it finds near 'rect' are checked.
+    """
+    if isinstance(CHARS, BoxIndex):
+        items = CHARS.items
+        CHARS = [items[i] for i in CHARS.candidates(rect[0], rect[1], rect[2], rect[3])]
     return any(
         1
         and rect[0] <= c["x0"]
@@ -1394,19 +1413,54 @@ def edges_to_intersections(edges, x_tolerance=1, y_tolerance=1) -> dict:
     """
     Given a list of edges, return the points at which they intersect
     within `tolerance` pixels.
+
+    Horizontal edges are indexed by their "top" value, so each vertical edge
+    only visits the rows within its y-range. Within a row, edges are sorted
+    by "x0" and a running maximum of "x1" ends the backwards scan for edges
+    overlapping the vertical edge's x. Results are in the same order as
+    testing every vertical against every horizontal edge.
     """
     intersections = {}
     v_edges, h_edges = [
         list(filter(lambda x: x["orientation"] == o, edges)) for o in ("v", "h")
     ]
+    # Rows of horizontal edges: same "top" value, sorted by "x0".
+    h_edges = sorted(h_edges, key=itemgetter("top", "x0"))
+    tops = []
+    rows = []
+    for h in h_edges:
+        if not tops or tops[-1] != h["top"]:
+            tops.append(h["top"])
+            rows.append(([], [], []))  # edges, x0 values, running max of x1
+        row_edges, x0s, max_x1s = rows[-1]
+        row_edges.append(h)
+        x0s.append(h["x0"])
+        max_x1s.append(h["x1"] if not max_x1s else max(max_x1s[-1], h["x1"]))
+
+    # The index lookups are widened by `slack` against rounding differences
+    # to the exact tests below.
+    slack = 1e-6
     for v in sorted(v_edges, key=itemgetter("x0", "top")):
-        for h in sorted(h_edges, key=itemgetter("top", "x0")):
-            if (
-                (v["top"] <= (h["top"] + y_tolerance))
-                and (v["bottom"] >= (h["top"] - y_tolerance))
-                and (v["x0"] >= (h["x0"] - x_tolerance))
-                and (v["x0"] <= (h["x1"] + x_tolerance))
-            ):
+        x = v["x0"]
+        start = bisect_left(tops, v["top"] - y_tolerance - slack)
+        stop = bisect_right(tops, v["bottom"] + y_tolerance + slack)
+        for row_n in range(start, stop):
+            row_edges, x0s, max_x1s = rows[row_n]
+            found = []
+            # Edges with h["x0"] <= x + x_tolerance, scanning back while some
+            # of them may still reach x - x_tolerance.
+            j = bisect_right(x0s, x + x_tolerance + slack) - 1
+            while j >= 0 and max_x1s[j] >= x - x_tolerance - slack:
+                h = row_edges[j]
+                if (
+                    (v["top"] <= (h["top"] + y_tolerance))
+                    and (v["bottom"] >= (h["top"] - y_tolerance))
+                    and (v["x0"] >= (h["x0"] - x_tolerance))
+                    and (v["x0"] <= (h["x1"] + x_tolerance))
+                ):
+                    found.append(h)
+                j -= 1
+            for h in reversed(found):
                 vertex = (v["x0"], h["top"])
                 if vertex not in intersections:
                     intersections[vertex] = {"v": [], "h": []}
@@ -1430,38 +1484,48 @@ def intersections_to_cells(intersections):
     `intersections` should be a dictionary with (x0, top) tuples as keys,
     and a list of edge objects as values. The edge objects should correspond
     to the edges that touch the intersection.
+
+    Points are indexed by column and row, so the candidates below and right
+    of a point are slices instead of scans over all remaining points.
     """
+    edge_sets = {}
 
-    def edge_connects(p1, p2) -> bool:
-        def edges_to_set(edges):
-            return set(map(obj_to_bbox, edges))
+    def edges_to_set(p, orientation):
+        key = (p, orientation)
+        edge_set = edge_sets.get(key)
+        if edge_set is None:
+            edge_set = edge_sets[key] = set(map(obj_to_bbox, intersections[p][orientation]))
+        return edge_set
 
+    def edge_connects(p1, p2) -> bool:
         if p1[0] == p2[0]:
-            common = edges_to_set(intersections[p1]["v"]).intersection(
-                edges_to_set(intersections[p2]["v"])
-            )
-            if len(common):
+            if not edges_to_set(p1, "v").isdisjoint(edges_to_set(p2, "v")):
                 return True
 
         if p1[1] == p2[1]:
-            common = edges_to_set(intersections[p1]["h"]).intersection(
-                edges_to_set(intersections[p2]["h"])
-            )
-            if len(common):
+            if not edges_to_set(p1, "h").isdisjoint(edges_to_set(p2, "h")):
                 return True
         return False
 
     points = list(sorted(intersections.keys()))
-    n_points = len(points)
 
-    def find_smallest_cell(points, i: int):
-        if i == n_points - 1:
-            return None
-        pt = points[i]
-        rest = points[i + 1 :]
+    # Points with the same x (columns) and the same y (rows), both sorted
+    # because points are, plus each point's position in its column and row.
+    columns = {}
+    rows = {}
+    positions = {}
+    for pt in points:
+        column = columns.setdefault(pt[0], [])
+        row = rows.setdefault(pt[1], [])
+        positions[pt] = (len(column), len(row))
+        column.append(pt)
+        row.append(pt)
+
+    def find_smallest_cell(pt):
+        column_n, row_n = positions[pt]
         # Get all the points directly below and directly right
-        below = [x for x in rest if x[0] == pt[0]]
-        right = [x for x in rest if x[1] == pt[1]]
+        below = columns[pt[0]][column_n + 1 :]
+        right = rows[pt[1]][row_n + 1 :]
         for below_pt in below:
             if not edge_connects(pt, below_pt):
                 continue
@@ -1480,7 +1544,7 @@ def intersections_to_cells(intersections):
                     return (pt[0], pt[1], bottom_right[0], bottom_right[1])
         return None
 
-    cell_gen = (find_smallest_cell(points, i) for i in range(len(points)))
+    cell_gen = (find_smallest_cell(pt) for pt in points)
     return list(filter(None, cell_gen))
 
 
@@ -1660,24 +1724,31 @@ class Table:
         chars = self._chars if self._chars is not None else CHARS
         table_arr = []
 
-        def char_in_bbox(char, bbox) -> bool:
-            v_mid = (char["top"] + char["bottom"]) / 2
-            h_mid = (char["x0"] + char["x1"]) / 2
-            x0, top, x1, bottom = bbox
-            return bool(
-                (h_mid >= x0) and (h_mid < x1) and (v_mid >= top) and (v_mid < bottom)
-            )
+        # Char midpoints as columns, with char indexes sorted by vertical
+        # midpoint, so that each row only looks at the chars in its y-range.
+        h_mids = [(char["x0"] + char["x1"]) / 2 for char in chars]
+        v_mids = [(char["top"] + char["bottom"]) / 2 for char in chars]
+        v_order = sorted(range(len(v_mids)), key=v_mids.__getitem__)
+        v_sorted = [v_mids[i] for i in v_order]
 
         for row in self.rows:
             arr = []
-            row_chars = [char for char in chars if char_in_bbox(char, row.bbox)]
+            x0, top, x1, bottom = row.bbox
+            row_indexes = sorted(
+                i
+                for i in v_order[bisect_left(v_sorted, top) : bisect_left(v_sorted, bottom)]
+                if x0 <= h_mids[i] < x1
+            )
 
             for cell in row.cells:
                 if cell is None:
                     cell_text = None
                 else:
+                    x0, top, x1, bottom = cell
                     cell_chars = [
-                        char for char in row_chars if char_in_bbox(char, cell)
+                        chars[i]
+                        for i in row_indexes
+                        if x0 <= h_mids[i] < x1 and top <= v_mids[i] < bottom
                     ]
 
                     if len(cell_chars):
@@ -2298,64 +2369,130 @@ page information themselves.
 # -----------------------------------------------------------------------------
 # Extract all page characters to fill the CHARS list
 # -----------------------------------------------------------------------------
+def _span_x0(x0s, y0s, x1s, y1s, start, stop):
+    """Return x0 of a span's "rawdict" bbox, the union of its chars' bboxes.
+
+    Like fz_union_rect(), this ignores empty char bboxes, unless all are.
+    """
+    x0 = None
+    for i in range(start, stop):
+        if x0s[i] < x1s[i] and y0s[i] < y1s[i]:
+            x0 = x0s[i] if x0 is None else min(x0, x0s[i])
+    return x0s[start] if x0 is None else x0
+
+
 def make_chars(page, clip=None):
-    """Extract text as "rawdict" to fill CHARS."""
+    """Extract text characters to fill CHARS.
+
+    Characters are read as columns via TextPage.extract_columns(), in the
+    order of "rawdict" extraction with spans and chars sorted by x0, and
+    transformed with plain arithmetic instead of Rect / Point / Matrix
+    objects per character.
+    """
     chars = CHARS._list()  # bind once: avoid per-append proxy overhead below
     page_number = page.number + 1
     page_height = page.rect.height
-    ctm = page.transformation_matrix
+    a, b, c, d, e, f = page.transformation_matrix
     TEXTPAGE = page.get_textpage(clip=clip, flags=FLAGS)
-    blocks = page.get_text("rawdict", textpage=TEXTPAGE)["blocks"]
+    columns = TEXTPAGE.extract_columns("char")
+    count = len(columns["c"])
+    if not count:
+        return TEXTPAGE
     doctop_base = page_height * page.number
-    for block in blocks:
-        for line in block["lines"]:
-            ldir = line["dir"]  # = (cosine, sine) of angle
-            ldir = (round(ldir[0], 4), round(ldir[1], 4))
-            matrix = pymupdf.Matrix(ldir[0], -ldir[1], ldir[1], ldir[0], 0, 0)
-            if ldir[1] == 0:
-                upright = True
-            else:
-                upright = False
-            for span in sorted(line["spans"], key=lambda s: s["bbox"][0]):
-                fontname = span["font"]
-                fontsize = span["size"]
-                span_bold = bool(
-                    span["flags"] & pymupdf.TEXT_FONT_BOLD or span["char_flags"] & 8
-                )
-                color = pymupdf.sRGB_to_pdf(span["color"])
-                for char in sorted(span["chars"], key=lambda c: c["bbox"][0]):
-                    bbox = pymupdf.Rect(char["bbox"])
-                    bbox_ctm = bbox * ctm
-                    origin = pymupdf.Point(char["origin"]) * ctm
-                    matrix.e = origin.x
-                    matrix.f = origin.y
-                    text = char["c"]
-                    char_dict = {
-                        "adv": bbox.x1 - bbox.x0 if upright else bbox.y1 - bbox.y0,
-                        "bottom": bbox.y1,
-                        "doctop": bbox.y0 + doctop_base,
-                        "fontname": fontname,
-                        "height": bbox.y1 - bbox.y0,
-                        "matrix": tuple(matrix),
-                        "ncs": "DeviceRGB",
-                        "non_stroking_color": color,
-                        "non_stroking_pattern": None,
-                        "object_type": "char",
-                        "page_number": page_number,
-                        "size": fontsize if upright else bbox.y1 - bbox.y0,
-                        "stroking_color": color,
-                        "stroking_pattern": None,
-                        "bold": span_bold,
-                        "text": text,
-                        "top": bbox.y0,
-                        "upright": upright,
-                        "width": bbox.x1 - bbox.x0,
-                        "x0": bbox.x0,
-                        "x1": bbox.x1,
-                        "y0": bbox_ctm.y0,
-                        "y1": bbox_ctm.y1,
-                    }
-                    chars.append(char_dict)
+    x0s = columns["x0"].tolist()
+    y0s = columns["y0"].tolist()
+    x1s = columns["x1"].tolist()
+    y1s = columns["y1"].tolist()
+    oxs = columns["origin_x"].tolist()
+    oys = columns["origin_y"].tolist()
+
+    # Transform bboxes and origins with the page's matrix, rounding the
+    # results to float like fz_transform_rect() and fz_transform_point().
+    ctm_y = array.array("f")
+    for x0, y0, x1, y1 in zip(x0s, y0s, x1s, y1s):
+        bx0, bx1 = b * x0, b * x1
+        dy0, dy1 = d * y0, d * y1
+        ctm_y.append(min(bx0, bx1) + min(dy0, dy1) + f)
+        ctm_y.append(max(bx0, bx1) + max(dy0, dy1) + f)
+    ctm_y = ctm_y.tolist()
+    origins = array.array("f")
+    for ox, oy in zip(oxs, oys):
+        origins.append(a * ox + c * oy + e)
+        origins.append(b * ox + d * oy + f)
+    origins = origins.tolist()
+
+    fonts = columns["fonts"]
+    colors = dict()
+    cs = columns["c"]
+    lines = columns["line"]
+    blocks = columns["block"]
+    spans = columns["span"]
+    font_ids = columns["font"]
+    sizes = columns["size"].tolist()
+    dir_xs = columns["dir_x"].tolist()
+    dir_ys = columns["dir_y"].tolist()
+    flags = columns["flags"]
+    char_flags = columns["char_flags"]
+    span_colors = columns["color"]
+
+    # Character index ranges of the spans of each line.
+    line_spans = []
+    i = 0
+    while i < count:
+        line_key = (blocks[i], lines[i])
+        spans_ = []
+        while i < count and (blocks[i], lines[i]) == line_key:
+            span_n = spans[i]
+            start = i
+            while i < count and spans[i] == span_n and (blocks[i], lines[i]) == line_key:
+                i += 1
+            spans_.append((_span_x0(x0s, y0s, x1s, y1s, start, i), start, i))
+        line_spans.append(spans_)
+
+    for spans_ in line_spans:
+        i = spans_[0][1]
+        ldx = round(dir_xs[i], 4)
+        ldy = round(dir_ys[i], 4)  # (cosine, sine) of line angle
+        upright = ldy == 0
+        for _, start, stop in sorted(spans_, key=itemgetter(0)):
+            fontname = fonts[font_ids[start]]
+            fontsize = sizes[start]
+            span_bold = bool(flags[start] & pymupdf.TEXT_FONT_BOLD or char_flags[start] & 8)
+            color = colors.get(span_colors[start])
+            if color is None:
+                color = colors[span_colors[start]] = pymupdf.sRGB_to_pdf(span_colors[start])
+            for i in sorted(range(start, stop), key=x0s.__getitem__):
+                x0 = x0s[i]
+                y0 = y0s[i]
+                x1 = x1s[i]
+                y1 = y1s[i]
+                width = x1 - x0
+                height = y1 - y0
+                chars.append({
+                    "adv": width if upright else height,
+                    "bottom": y1,
+                    "doctop": y0 + doctop_base,
+                    "fontname": fontname,
+                    "height": height,
+                    "matrix": (ldx, -ldy, ldy, ldx, origins[2 * i], origins[2 * i + 1]),
+                    "ncs": "DeviceRGB",
+                    "non_stroking_color": color,
+                    "non_stroking_pattern": None,
+                    "object_type": "char",
+                    "page_number": page_number,
+                    "size": fontsize if upright else height,
+                    "stroking_color": color,
+                    "stroking_pattern": None,
+                    "bold": span_bold,
+                    "text": chr(cs[i]),
+                    "top": y0,
+                    "upright": upright,
+                    "width": width,
+                    "x0": x0,
+                    "x1": x1,
+                    "y0": ctm_y[2 * i],
+                    "y1": ctm_y[2 * i + 1],
+                })
     return TEXTPAGE
 
 
@@ -2420,7 +2557,7 @@ def make_edges(page, clip=None, tset=None, paths=None, add_lines=None, add_boxes
     def clean_graphics(npaths=None):
         """Detect and join rectangles of "connected" vector graphics."""
         if npaths is None:
-            allpaths = page.get_drawings()
+            allpaths = page_analysis(page).drawings
         else:  # accept passed-in vector graphics
             allpaths = npaths[:]  # paths relevant for table detection
         paths = []
@@ -2436,55 +2573,41 @@ def make_edges(page, clip=None, tset=None, paths=None, add_lines=None, add_boxes
                 continue
             paths.append(p)
 
+        # index the chars once for the text checks of the joined rectangles
+        char_index = BoxIndex(CHARS._list(), key=itemgetter("x0", "y0", "x1", "y1"))
+
         # start with all vector graphics rectangles
         prects = sorted(set([p["rect"] for p in paths]), key=lambda r: (r.y1, r.x0))
-        new_rects = []  # the final list of joined rectangles
         # ----------------------------------------------------------------
         # Strategy: Join rectangles that "almost touch" each other.
         # Extend first rectangle with any other that is a "neighbor".
         # Then move it to the final list and continue with the rest.
         # ----------------------------------------------------------------
-        while prects:  # the algorithm will empty this list
-            prect0 = prects[0]  # copy of first rectangle (performance reasons!)
-            repeat = True
-            while repeat:  # this loop extends first rect in list
-                repeat = False  # set to true again if some other rect touches
-                for i in range(len(prects) - 1, 0, -1):  # run backwards
-                    if are_neighbors(prect0, prects[i]):  # close enough to rect 0?
-                        prect0 |= prects[i].tl  # extend rect 0
-                        prect0 |= prects[i].br  # extend rect 0
-                        del prects[i]  # delete this rect
-                        repeat = True  # keep checking the rest
-
-            # move rect 0 over to result list if there is some text in it
-            if chars_in_rect(CHARS, prect0):
-                # contains text, so accept it as a table bbox candidate
-                new_rects.append(prect0)
-            del prects[0]  # remove from rect list
+        new_rects = [  # the final list of joined rectangles
+            prect0
+            for prect0 in cluster_rects(prects, are_neighbors, snap_x, snap_y)
+            # accept as a table bbox candidate if there is some text in it
+            if chars_in_rect(char_index, prect0)
+        ]
 
         return new_rects, paths
 
     bboxes, paths = clean_graphics(npaths=paths)
 
-    def is_parallel(p1, p2):
-        """Check if line is roughly axis-parallel."""
-        if abs(p1.x - p2.x) <= snap_x or abs(p1.y - p2.y) <= snap_y:
-            return True
-        return False
-
-    def make_line(p, p1, p2, clip):
-        """Given 2 points, make a line dictionary for table detection."""
-        if not is_parallel(p1, p2):  # only accepting axis-parallel lines
-            return {}
+    def make_line(p, px0, py0, px1, py1, clip):
+        """Given 2 points, make a line edge dictionary for table detection."""
+        # only accepting axis-parallel lines
+        if abs(px0 - px1) > snap_x and abs(py0 - py1) > snap_y:
+            return None
         # compute the extremal values
-        x0 = min(p1.x, p2.x)
-        x1 = max(p1.x, p2.x)
-        y0 = min(p1.y, p2.y)
-        y1 = max(p1.y, p2.y)
+        x0 = min(px0, px1)
+        x1 = max(px0, px1)
+        y0 = min(py0, py1)
+        y1 = max(py0, py1)
 
         # check for outside clip
         if x0 > clip.x1 or x1 < clip.x0 or y0 > clip.y1 or y1 < clip.y0:
-            return {}
+            return None
 
         if x0 < clip.x0:
             x0 = clip.x0  # adjust to clip boundary
@@ -2501,8 +2624,9 @@ def make_edges(page, clip=None, tset=None, paths=None, add_lines=None, add_boxes
         width = x1 - x0  # from adjusted values
         height = y1 - y0  # from adjusted values
         if width == height == 0:
-            return {}  # nothing left to deal with
-        line_dict = {
+            return None  # nothing left to deal with
+        # Same items as line_to_edge() applied to a "line" object.
+        return {
             "x0": x0,
             "y0": page_height - y0,
             "x1": x1,
@@ -2523,15 +2647,27 @@ def make_edges(page, clip=None, tset=None, paths=None, add_lines=None, add_boxes
             "top": y0,
             "bottom": y1,
             "doctop": y0 + doctop_basis,
+            "orientation": "h" if y0 == y1 else "v",
         }
-        return line_dict
+
+    def add_rect_lines(p, x0, y0, x1, y1):
+        """Add the 4 border lines of a rectangle: left, bottom, right, top."""
+        for edge in (
+            make_line(p, x0, y0, x0, y1, clip),
+            make_line(p, x0, y1, x1, y1, clip),
+            make_line(p, x1, y1, x1, y0, clip),
+            make_line(p, x1, y0, x0, y0, clip),
+        ):
+            if edge:
+                edges.append(edge)
 
     for p in paths:
         items = p["items"]  # items in this path
 
         # if 'closePath', add a line from last to first point
+        # (without modifying the path: it may be shared via PageAnalysis)
         if p["closePath"] and items[0][0] == "l" and items[-1][0] == "l":
-            items.append(("l", items[-1][2], items[0][1]))
+            items = items + [("l", items[-1][2], items[0][1])]
 
         for i in items:
             if i[0] not in ("l", "re", "qu"):
@@ -2539,90 +2675,53 @@ def make_edges(page, clip=None, tset=None, paths=None, add_lines=None, add_boxes
 
             if i[0] == "l":  # a line
                 p1, p2 = i[1:]
-                line_dict = make_line(p, p1, p2, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
+                edge = make_line(p, p1.x, p1.y, p2.x, p2.y, clip)
+                if edge:
+                    edges.append(edge)
 
             elif i[0] == "re":
                 # A rectangle: decompose into 4 lines, but filter out
                 # the ones that simulate a line
-                rect = i[1].normalize()  # normalize the rectangle
-
-                if (
-                    rect.width <= min_length and rect.width < rect.height
-                ):  # simulates a vertical line
-                    x = abs(rect.x1 + rect.x0) / 2  # take middle value for x
-                    p1 = pymupdf.Point(x, rect.y0)
-                    p2 = pymupdf.Point(x, rect.y1)
-                    line_dict = make_line(p, p1, p2, clip)
-                    if line_dict:
-                        edges.append(line_to_edge(line_dict))
+                rect = pymupdf.Rect(i[1]).normalize()  # normalized copy
+                x0, y0, x1, y1 = rect
+                width = x1 - x0
+                height = y1 - y0
+
+                if width <= min_length and width < height:  # simulates a vertical line
+                    x = abs(x1 + x0) / 2  # take middle value for x
+                    edge = make_line(p, x, y0, x, y1, clip)
+                    if edge:
+                        edges.append(edge)
                     continue
 
-                if (
-                    rect.height <= min_length and rect.height < rect.width
-                ):  # simulates a horizontal line
-                    y = abs(rect.y1 + rect.y0) / 2  # take middle value for y
-                    p1 = pymupdf.Point(rect.x0, y)
-                    p2 = pymupdf.Point(rect.x1, y)
-                    line_dict = make_line(p, p1, p2, clip)
-                    if line_dict:
-                        edges.append(line_to_edge(line_dict))
+                if height <= min_length and height < width:  # simulates a horizontal line
+                    y = abs(y1 + y0) / 2  # take middle value for y
+                    edge = make_line(p, x0, y, x1, y, clip)
+                    if edge:
+                        edges.append(edge)
                     continue
 
-                line_dict = make_line(p, rect.tl, rect.bl, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
-
-                line_dict = make_line(p, rect.bl, rect.br, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
-
-                line_dict = make_line(p, rect.br, rect.tr, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
-
-                line_dict = make_line(p, rect.tr, rect.tl, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
+                add_rect_lines(p, x0, y0, x1, y1)
 
             else:  # must be a quad
                 # we convert it into (up to) 4 lines
                 ul, ur, ll, lr = i[1]
-
-                line_dict = make_line(p, ul, ll, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
-
-                line_dict = make_line(p, ll, lr, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
-
-                line_dict = make_line(p, lr, ur, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
-
-                line_dict = make_line(p, ur, ul, clip)
-                if line_dict:
-                    edges.append(line_to_edge(line_dict))
+                for q1, q2 in ((ul, ll), (ll, lr), (lr, ur), (ur, ul)):
+                    edge = make_line(p, q1.x, q1.y, q2.x, q2.y, clip)
+                    if edge:
+                        edges.append(edge)
 
     path = {"color": (0, 0, 0), "fill": None, "width": 1}
     for bbox in bboxes:  # add the border lines for all enveloping bboxes
-        line_dict = make_line(path, bbox.tl, bbox.tr, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
-
-        line_dict = make_line(path, bbox.bl, bbox.br, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
-
-        line_dict = make_line(path, bbox.tl, bbox.bl, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
-
-        line_dict = make_line(path, bbox.tr, bbox.br, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
+        x0, y0, x1, y1 = bbox
+        for edge in (
+            make_line(path, x0, y0, x1, y0, clip),
+            make_line(path, x0, y1, x1, y1, clip),
+            make_line(path, x0, y0, x0, y1, clip),
+            make_line(path, x1, y0, x1, y1, clip),
+        ):
+            if edge:
+                edges.append(edge)
 
     if add_lines is not None:  # add user-specified lines
         assert isinstance(add_lines, (tuple, list))
@@ -2631,28 +2730,16 @@ def make_edges(page, clip=None, tset=None, paths=None, add_lines=None, add_boxes
     for p1, p2 in add_lines:
         p1 = pymupdf.Point(p1)
         p2 = pymupdf.Point(p2)
-        line_dict = make_line(path, p1, p2, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
+        edge = make_line(path, p1.x, p1.y, p2.x, p2.y, clip)
+        if edge:
+            edges.append(edge)
 
     if add_boxes is not None:  # add user-specified rectangles
         assert isinstance(add_boxes, (tuple, list))
     else:
         add_boxes = []
     for box in add_boxes:
-        r = pymupdf.Rect(box)
-        line_dict = make_line(path, r.tl, r.bl, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
-        line_dict = make_line(path, r.bl, r.br, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
-        line_dict = make_line(path, r.br, r.tr, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
-        line_dict = make_line(path, r.tr, r.tl, clip)
-        if line_dict:
-            edges.append(line_to_edge(line_dict))
+        add_rect_lines(path, *pymupdf.Rect(box))
 
 
 def page_rotation_set0(page):
@@ -2743,7 +2830,7 @@ def _refine_flat_placement_grid(page, cells, col_count):
     Selects words per cell by center-point and synthesizes each cell's line text
     ("" for a gap), using the same word source and line builder as resolve_spans.
     Used when span resolution changes the column count."""
-    page_words = _refine_page_words(page)
+    page_words = _refine_word_index(page)
     grid = []
     for row in cells:
         out = []
@@ -2885,6 +2972,9 @@ def find_tables(
         page, old_xref, old_rot, old_mediabox = page_rotation_set0(page)
     else:
         old_xref, old_rot, old_mediabox = None, None, None
+    # Extract text and drawings at most once for all stages below. A nested
+    # call for the same page (union candidates) shares this analysis.
+    analysis_token = bind_analysis(page)
 
     if snap_x_tolerance is None:
         snap_x_tolerance = UNSET
@@ -3018,6 +3108,7 @@ def find_tables(
         pymupdf.message("find_tables: exception occurred: %s" % str(e))
         return None
     finally:
+        unbind_analysis(analysis_token)
         pymupdf.TOOLS.set_small_glyph_heights(old_small)
         if old_xref is not None:
             page = page_rotation_reset(page, old_xref, old_rot, old_mediabox)
@@ -59,3 +59,54 @@ def test_4599():
     assert n == 3
     
     
+
+
+def test_cluster_rects():
+    """Indexed rectangle joining gives the same result as the plain loop."""
+    import random
+    from pymupdf._table_analysis import cluster_rects
+
+    def neighbors(r1, r2):
+        return not (
+            max(r1.x0, r1.x1) < min(r2.x0, r2.x1) - 3
+            or min(r1.x0, r1.x1) > max(r2.x0, r2.x1) + 3
+            or max(r1.y0, r1.y1) < min(r2.y0, r2.y1) - 3
+            or min(r1.y0, r1.y1) > max(r2.y0, r2.y1) + 3
+        )
+
+    def crossing(r1, r2):
+        # not monotone: the result depends on the order of joins
+        return neighbors(r1, r2) and (
+            abs(r1.x0 - r2.x0) <= 3 or abs(r1.y1 - r2.y1) <= 3
+        )
+
+    def plain(rects, are_neighbors):
+        rects = list(rects)
+        clusters = []
+        while rects:
+            r = rects[0]
+            repeat = True
+            while repeat:
+                repeat = False
+                for i in range(len(rects) - 1, 0, -1):
+                    if are_neighbors(r, rects[i]):
+                        r = r | rects[i].tl | rects[i].br
+                        del rects[i]
+                        repeat = True
+            clusters.append(r)
+            del rects[0]
+        return clusters
+
+    rng = random.Random(1)
+    for _ in range(50):
+        rects = []
+        for _ in range(rng.randint(0, 200)):
+            x = rng.uniform(0, 600)
+            y = rng.uniform(0, 800)
+            w, h = rng.choice(((400, 2), (2, 400), (30, 30), (-5, 5)))
+            rects.append(pymupdf.Rect(x, y, x + rng.uniform(0, w), y + rng.uniform(0, h)))
+        rects.append(pymupdf.Rect(-1e9, 0, 1e9, 1))
+        rects.sort(key=lambda r: (r.y1, r.x0))
+        for are_neighbors in (neighbors, crossing):
+            expected = plain(rects, are_neighbors)
+            assert cluster_rects(rects, are_neighbors, 3, 3) == expected
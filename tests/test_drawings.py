@@ -264,3 +264,42 @@ def test_4954_2():
         d = document[0].get_drawings()[-1]
         print(f'{d["width"]=}')  # Expected: 2.0, Actual: 1.0
         assert abs(d['width'] - 2.449) < 0.01
+
+
+def test_drawings_conversion():
+    """get_drawings() converts get_cdrawings() output the same way in C and
+    in Python."""
+    if not pymupdf.g_use_extra:
+        print('test_drawings_conversion(): not running because extra not used.')
+        return
+
+    def typed(value):
+        if isinstance(value, (pymupdf.Point, pymupdf.Rect, pymupdf.Quad)):
+            return type(value).__name__, tuple(map(typed, value))
+        if isinstance(value, dict):
+            return [(k, typed(v)) for k, v in value.items()]
+        if isinstance(value, (list, tuple)):
+            return type(value).__name__, [typed(v) for v in value]
+        return value
+
+    doc = pymupdf.open()
+    page = doc.new_page()
+    shape = page.new_shape()
+    shape.draw_line((10, 10), (100, 20))
+    shape.draw_bezier((10, 10), (20, 30), (40, 5), (60, 60))
+    shape.finish(color=(0, 0, 0), closePath=True)
+    shape.draw_rect((200, 200, 100, 100))
+    shape.finish(fill=(1, 0, 0))
+    shape.draw_quad(pymupdf.Rect(300, 300, 400, 350).quad.morph(pymupdf.Point(350, 325), pymupdf.Matrix(30)))
+    shape.finish(color=(0, 0, 1), fill=(0, 1, 0))
+    shape.commit()
+    doc = pymupdf.open(filename)
+    for page in (page, doc[0]):
+        for extended in (False, True):
+            drawings = page.get_drawings(extended=extended)
+            pymupdf.g_use_extra = False
+            try:
+                expected = page.get_drawings(extended=extended)
+            finally:
+                pymupdf.g_use_extra = True
+            assert typed(drawings) == typed(expected)
@@ -4,6 +4,7 @@ Tests for the Font class.
 import math
 import os
 import platform
+import pytest
 import pymupdf
 import subprocess
 import textwrap
@@ -395,3 +396,21 @@ def test_5049():
     path_out = os.path.normpath(f'{__file__}/../../tests/test_5049_out.pdf')
     exam.save(path_out, garbage=4, deflate=True, clean=True)
     exam.close()
+
+
+def test_text_lengths():
+    font = pymupdf.Font("helv")
+    texts = ["PyMuPDF", "", "Äpfel und Birnen", "PyMuPDF", "€ 100", "漢字"]
+    lengths = font.text_lengths(texts, fontsize=12)
+    assert lengths == [font.text_length(t, fontsize=12) for t in texts]
+    for t, length in zip(texts, lengths):
+        assert abs(sum(font.char_lengths(t, fontsize=12)) - length) < 1e-6
+    # Cached advances are kept apart by small_caps.
+    lower = font.text_length("abc", small_caps=True)
+    assert lower == font.text_lengths(["abc"], small_caps=True)[0]
+    assert font.text_length("abc") == font.text_lengths(["abc"])[0]
+    assert font.char_lengths("abc", fontsize=2) == [
+        2 * font.glyph_advance(ord(c)) for c in "abc"
+    ]
+    with pytest.raises(TypeError):
+        font.text_lengths(["abc", 1])
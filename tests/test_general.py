@@ -12,6 +12,7 @@ import pathlib
 import pickle
 import platform
 import pymupdf
+import pytest
 import re
 import shlex
 import shutil
@@ -2271,3 +2272,116 @@ def test_5054():
             assert text2 != text1
         else:
             assert text2 == text1
+
+
+def test_write_buffer(tmpdir):
+    # Document.write() and Document.save() to a file object write to a
+    # native buffer; check they give the same bytes as saving to a file.
+    with pymupdf.open() as doc:
+        for i in range(300):
+            page = doc.new_page()
+            page.insert_text((50, 72), f"page {i}")
+            page.add_text_annot((50, 100), f"note {i}")
+        source = doc.tobytes()
+    path = os.path.join(tmpdir, 'test_write_buffer.pdf')
+    for options in (dict(), dict(garbage=3, deflate=True), dict(use_objstms=1)):
+        # Saving may change the document, e.g. renumber objects, so each
+        # save starts from a new copy.
+        with pymupdf.open('pdf', source) as doc:
+            doc.save(path, no_new_id=True, **options)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with pymupdf.open('pdf', source) as doc:
+            t = time.time()
+            data_write = doc.tobytes(no_new_id=True, **options)
+            t = time.time() - t
+        bio = io.BytesIO()
+        with pymupdf.open('pdf', source) as doc:
+            doc.save(bio, no_new_id=True, **options)
+        print(f'test_write_buffer(): {options=} {len(data)=} tobytes: {t:.3f}s')
+        assert data_write == data
+        assert bio.getvalue() == data
+
+    if not pymupdf.g_use_extra:
+        # Without extra, output goes through Python callbacks that need tell().
+        return
+
+    class Sink:
+        # An object with only write(), like a socket, that keeps the pieces
+        # that it is passed.
+        def __init__(self):
+            self.pieces = list()
+        def write(self, b):
+            self.pieces.append(bytes(b))
+            return len(b)
+
+    with pymupdf.open() as doc:
+        for i in range(10):
+            page = doc.new_page()
+            xref = doc.get_new_xref()
+            doc.update_object(xref, '<<>>')
+            doc.update_stream(xref, os.urandom(300_000), compress=False)
+        sink = Sink()
+        doc.save(sink, no_new_id=True)
+        data = doc.tobytes(no_new_id=True)
+    assert b''.join(sink.pieces) == data
+    # Output is passed on in pieces, not as a whole.
+    assert len(data) > 3_000_000
+    assert len(sink.pieces) > 1
+    assert max(len(piece) for piece in sink.pieces) <= 1024 * 1024
+
+    # Exceptions from write() are raised unchanged.
+    class DiskFull(Exception):
+        pass
+    class FailingSink(Sink):
+        def write(self, b):
+            raise DiskFull('disk full')
+    with pymupdf.open('pdf', source) as doc:
+        with pytest.raises(DiskFull, match='disk full'):
+            doc.save(FailingSink())
+    
+    # Writing nothing is an error, not success.
+    class StuckSink(Sink):
+        def write(self, b):
+            return 0
+    with pymupdf.open('pdf', source) as doc:
+        with pytest.raises(OSError, match='returned 0'):
+            doc.save(StuckSink())
+
+
+def test_open_mmap_fileobj():
+    path = os.path.normpath(f'{__file__}/../../tests/resources/test_2634.pdf')
+    with pymupdf.open(path) as document:
+        texts = [page.get_text() for page in document]
+        data = document.tobytes(no_new_id=True)
+
+    with pymupdf.open(path, mmap=True) as document:
+        assert [page.get_text() for page in document] == texts
+        assert document.tobytes(no_new_id=True) == data
+        mapping = document._mmap
+    # Closing the document unmaps the file.
+    assert mapping.closed
+    assert document._mmap is None
+
+    class File(io.FileIO):
+        # Counts the bytes read.
+        count = 0
+        def readinto(self, b):
+            n = super().readinto(b)
+            self.count += n
+            return n
+
+    with File(path) as f:
+        with pymupdf.open(fileobj=f) as document:
+            # Only parts of the file have been read.
+            print(f'test_open_mmap_fileobj(): read {f.count} of {os.path.getsize(path)} bytes.')
+            assert f.count < os.path.getsize(path)
+            assert [page.get_text() for page in document] == texts
+            assert document.tobytes(no_new_id=True) == data
+
+    with pytest.raises(pymupdf.EmptyFileError):
+        pymupdf.open(fileobj=io.BytesIO())
+    with pytest.raises(ValueError):
+        pymupdf.open(stream=data, fileobj=io.BytesIO(data))
+    with pytest.raises(ValueError):
+        pymupdf.open(stream=data, mmap=True)
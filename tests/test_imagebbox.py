@@ -47,3 +47,26 @@ def test_bboxlog():
     box_type, bbox = bbox_log[0]
     assert box_type == "fill-image"
     assert bbox == info["bbox"]
+
+
+def test_image_digest_index():
+    doc = pymupdf.open()
+    page = doc.new_page()
+    xref = page.insert_image((50, 50, 150, 150), filename=image)
+    page = doc.new_page()
+    page.insert_image((100, 100, 300, 300), xref=xref)
+    digest = pymupdf.Pixmap(doc, xref).digest
+    for page in doc:
+        assert [info["xref"] for info in page.get_image_info(xrefs=True)] == [xref]
+    assert list(doc._image_digests) == [xref]
+    assert doc._image_digests[xref][0] == digest
+    bbox = pymupdf.Rect(doc[1].get_image_info()[0]["bbox"])
+    assert doc[1].get_image_rects(xref) == [bbox]
+
+    # Replacing the image invalidates its digest.
+    pix = pymupdf.Pixmap(pymupdf.csRGB, (0, 0, 2, 2), 0)
+    pix.clear_with(0)
+    doc[0].replace_image(xref, pixmap=pix)
+    assert xref not in doc._image_digests
+    assert doc[1].get_image_rects(xref) == [bbox]
+    assert doc._image_digests[xref][0] == pix.digest
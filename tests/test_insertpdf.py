@@ -9,6 +9,7 @@
 import io
 import os
 import re
+import time
 import pymupdf
 from pymupdf import mupdf
 
@@ -359,3 +360,112 @@ def test_4958():
         print(f'test_4958(): orig: {from_rects_orig}')
         print(f'test_4958(): copy: {from_rects_copy}')
         assert from_rects_orig == from_rects_copy
+
+
+def test_links_large_merge():
+    # Link copying must scale with the number of pages: page numbers are
+    # mapped through a dict and annotations are added in bulk.
+    src = pymupdf.open()
+    for i in range(10):
+        src.new_page()
+    for i, page in enumerate(src):
+        for j in range(10):
+            r = pymupdf.Rect(50, 50 + 20 * j, 150, 65 + 20 * j)
+            if j % 2:
+                page.insert_link(
+                        {
+                            'kind': pymupdf.LINK_URI,
+                            'from': r,
+                            'uri': f'https://example.org/{i}/{j}',
+                        }
+                        )
+            else:
+                page.insert_link(
+                        {
+                            'kind': pymupdf.LINK_GOTO,
+                            'from': r,
+                            'page': (i + j) % 10,
+                            'to': pymupdf.Point(10, 20),
+                        }
+                        )
+    src = pymupdf.open('pdf', src.tobytes())
+    for page in src:
+        expected = page.get_links()
+        for l in expected:
+            del l['xref'], l['id']
+        links = pymupdf._page_link_dicts(page)
+        for l in links:
+            l.pop('xref', None)
+            l.pop('id', None)
+        assert links == expected
+
+    for copies in (10, 40):
+        doc = pymupdf.open()
+        t = time.time()
+        for _ in range(copies):
+            doc.insert_pdf(src, links=True)
+        t = time.time() - t
+        print(f'test_links_large_merge(): {doc.page_count} pages: {t:.2f}s')
+        for pno in (0, doc.page_count - 1):
+            offset = pno - pno % 10
+            links = doc[pno].get_links()
+            assert len(links) == 10
+            for l, expected in zip(links, src[pno % 10].get_links()):
+                assert l['kind'] == expected['kind']
+                assert l['from'] == expected['from']
+                if l['kind'] == pymupdf.LINK_GOTO:
+                    assert l['page'] == offset + expected['page']
+                else:
+                    assert l['uri'] == expected['uri']
+
+
+def test_merge(tmpdir):
+    # A source with an embedded font, an image, links and a form field.
+    src = pymupdf.open()
+    for i in range(3):
+        page = src.new_page()
+        page.insert_font(fontname='prag', fontfile=f'{resources}/PragmaticaC.otf')
+        page.insert_text((50, 100), f'page {i}', fontname='prag')
+        page.insert_image((50, 150, 150, 250), filename=f'{resources}/img-transparent.png')
+    src[0].insert_link({'kind': pymupdf.LINK_GOTO, 'from': pymupdf.Rect(50, 80, 100, 100), 'page': 2})
+    src[2].insert_link({'kind': pymupdf.LINK_GOTO, 'from': pymupdf.Rect(50, 80, 100, 100), 'page': 0})
+    widget = pymupdf.Widget()
+    widget.field_type = pymupdf.PDF_WIDGET_TYPE_TEXT
+    widget.field_name = 'name'
+    widget.rect = pymupdf.Rect(50, 300, 200, 320)
+    src[1].add_widget(widget)
+    path = os.path.join(tmpdir, 'test_merge.pdf')
+    src.save(path)
+    src.close()
+    src = pymupdf.open(path)
+
+    doc = pymupdf.open()
+    doc.merge([path, (src, [2, (0, 1)]), (path, 0)])
+    assert not src.is_closed
+    assert [page.get_text().split()[1] for page in doc] == ['0', '1', '2', '2', '0', '1', '0']
+    # Links are kept across page ranges of a source, links to pages that
+    # were not copied are dropped.
+    assert [[l['page'] for l in page.get_links()] for page in doc] == [
+            [2], [], [0], [4], [3], [], []
+            ]
+    names = [w.field_name for page in doc for w in page.widgets()]
+    assert len(names) == 2 and names[0] == 'name' and len(set(names)) == 2
+    # Font and image are stored once.
+    assert len({f[0] for page in doc for f in page.get_fonts()}) == 1
+    assert len({i[0] for page in doc for i in page.get_images()}) == 1
+    doc2 = pymupdf.open()
+    doc2.merge([path, (src, [2, (0, 1)]), (path, 0)], deduplicate=False)
+    assert len({f[0] for page in doc2 for f in page.get_fonts()}) == 3
+    assert len(doc.tobytes(garbage=1)) < len(doc2.tobytes(garbage=1))
+    doc = pymupdf.open('pdf', doc.tobytes(garbage=1))
+    assert [page.get_text() for page in doc] == [page.get_text() for page in doc2]
+
+    # Merge time must grow linearly with the page count.
+    for copies in (100, 400):
+        doc = pymupdf.open()
+        t = time.time()
+        doc.merge([src] * copies, links=False, widgets=False)
+        t = time.time() - t
+        print(f'test_merge(): {doc.page_count} pages: {t:.2f}s')
+        assert doc.page_count == 3 * copies
+        assert doc[-1].get_text() == src[-1].get_text()
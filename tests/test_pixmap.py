@@ -758,3 +758,216 @@ def test_natural():
         )
         pix=pymupdf.Pixmap(pm)
         print(f"{pix=}")    
+
+
+def _page_samples(page):
+    pixmap = page.get_pixmap(dpi=50)
+    return pixmap.width, pixmap.height, pixmap.samples
+
+
+def test_apply_pages_shared_memory():
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_apply_pages_shared_memory(): not running on Pyodide - multiprocessing not available.')
+        return
+    path = os.path.normpath(f'{__file__}/../../tests/resources/mupdf_explored.pdf')
+    pages = list(range(8))
+    expected = pymupdf.apply_pages(path, _page_samples, pages=pages)
+    methods = ['mp']
+    if platform.system() != 'Windows':
+        methods.append('fork')
+    for method in methods:
+        results = pymupdf.apply_pages(
+                path,
+                _page_samples,
+                pages=pages,
+                method=method,
+                concurrency=2,
+                shared_memory=True,
+                )
+        for (w, h, samples), (w2, h2, samples2) in zip(expected, results):
+            assert (w, h) == (w2, h2)
+            assert isinstance(samples2, (memoryview, bytes))
+            assert samples2 == samples
+    with pymupdf.PagePool(2) as pool:
+        for pno, (w, h, samples) in pool.iter_pages(path, _page_samples, pages=pages, shared_memory=True):
+            assert samples == expected[pno][2]
+
+
+
+def _page_samples_slow(page):
+    time.sleep(0.1)
+    return _page_samples(page)
+
+
+def test_iter_pages_shared_memory_close():
+    # Closing the generator early waits for batches that are still running,
+    # before removing the shared directory.
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_iter_pages_shared_memory_close(): not running on Pyodide - multiprocessing not available.')
+        return
+    from pymupdf import _apply_pages
+    path = os.path.normpath(f'{__file__}/../../tests/resources/mupdf_explored.pdf')
+    shared_dirs = list()
+    shared_directory = _apply_pages._shared_directory
+    def shared_directory_record():
+        ret = shared_directory()
+        shared_dirs.append(ret.name)
+        return ret
+    _apply_pages._shared_directory = shared_directory_record
+    try:
+        methods = ['mp']
+        if platform.system() != 'Windows':
+            methods.append('fork')
+        for method in methods:
+            it = pymupdf.iter_pages(path, _page_samples_slow, method=method, concurrency=2, shared_memory=True)
+            next(it)
+            it.close()
+        with pymupdf.PagePool(2) as pool:
+            it = pool.iter_pages(path, _page_samples_slow, shared_memory=True)
+            next(it)
+            it.close()
+            assert not pool._pool._cache
+            it = pool.apply_documents([path], _page_samples_slow, unit_pages=1, shared_memory=True)
+            next(it)
+            it.close()
+            assert not pool._pool._cache
+    finally:
+        _apply_pages._shared_directory = shared_directory
+    assert len(shared_dirs) == len(methods) + 2
+    for d in shared_dirs:
+        assert not os.path.exists(d)
+
+
+def test_displaylist_cache():
+    path = os.path.normpath(f'{__file__}/../../tests/resources/mupdf_explored.pdf')
+    with pymupdf.open(path) as doc:
+        expected = [doc[0].get_pixmap(dpi=dpi).samples for dpi in (36, 72)]
+    with pymupdf.open(path) as doc:
+        doc.set_displaylist_cache(100_000_000)
+        cache = doc._displaylist_cache
+        page = doc[0]
+        for _ in range(2):
+            assert [page.get_pixmap(dpi=dpi).samples for dpi in (36, 72)] == expected
+        assert cache.misses == 1
+        assert cache.hits == 3
+        # Modifying the page replaces its display list.
+        page.insert_text((100, 100), 'Hello', fontsize=30)
+        assert page.get_pixmap(dpi=36).samples != expected[0]
+        assert cache.misses == 2
+        # Moving pages empties the cache.
+        doc.move_page(0, 2)
+        assert cache.size == 0
+        doc.set_displaylist_cache(0)
+        assert doc._displaylist_cache is None
+    with pymupdf.open(epub) as doc:
+        with pytest.raises(ValueError):
+            doc.set_displaylist_cache(1000)
+
+
+def test_displaylist_cache_objects():
+    # Changing an object that pages use, but that is not part of their page
+    # objects, replaces their display lists.
+    def make_pixmap(color):
+        pix = pymupdf.Pixmap(pymupdf.csRGB, (0, 0, 10, 10), False)
+        pix.set_rect(pix.irect, color)
+        return pix
+
+    def renders(doc):
+        return [page.get_pixmap(dpi=36).samples for page in doc]
+
+    with pymupdf.open() as src:
+        src.new_page(width=100, height=100).draw_rect((10, 10, 90, 90), fill=(0, 0, 1))
+        with pymupdf.open() as doc:
+            rect = pymupdf.Rect(0, 0, 100, 100)
+            for i in range(3):
+                doc.new_page()
+            xref = doc[0].insert_image(rect, pixmap=make_pixmap((255, 0, 0)))
+            doc[1].insert_image(rect, xref=xref)
+            doc[2].show_pdf_page(rect, src, 0)
+            form_xref = doc[2].get_xobjects()[0][0]
+            doc.set_displaylist_cache(100_000_000)
+            cache = doc._displaylist_cache
+            before = renders(doc)
+            assert renders(doc) == before
+            assert cache.misses == 3 and cache.hits == 3
+            # An image shared by two pages.
+            doc[0].replace_image(xref, pixmap=make_pixmap((0, 255, 0)))
+            after = renders(doc)
+            assert after[0] != before[0] and after[1] != before[1]
+            assert after[2] == before[2]
+            assert cache.misses == 5
+            doc.update_stream(form_xref, b"0 1 0 rg 10 10 80 80 re f")
+            assert renders(doc)[2] != before[2]
+            assert cache.misses == 6
+            # Unrelated objects do not invalidate anything.
+            doc.update_object(doc.get_new_xref(), "<<>>")
+            cached = renders(doc)
+            assert cache.misses == 6
+            doc.set_displaylist_cache(0)
+            assert cached == renders(doc)
+
+
+def test_render_tiles():
+    path = os.path.normpath(f'{__file__}/../../tests/resources/mupdf_explored.pdf')
+    with pymupdf.open(path) as doc:
+        page = doc[0]
+        for kwargs in (dict(dpi=100), dict(dpi=50, clip=(50, 60, 300, 400), alpha=True)):
+            expected = page.get_pixmap(**kwargs)
+            for tile_size in (97, (0, 64)):
+                pixmap = pymupdf.Pixmap(expected.colorspace, expected.irect, expected.alpha)
+                for x, y, tile in page.render_tiles(tile_size, **kwargs):
+                    assert (x, y) == (tile.x - expected.x, tile.y - expected.y)
+                    assert tile.width <= (tile_size if tile_size == 97 else expected.width)
+                    assert tile.xres == kwargs['dpi']
+                    pixmap.copy(tile, tile.irect)
+                if tile_size == 97:
+                    # Glyphs cut by tile borders may be anti-aliased slightly
+                    # differently.
+                    diffs = [abs(a - b) for a, b in zip(pixmap.samples, expected.samples) if a != b]
+                    assert len(diffs) < len(expected.samples) / 1000
+                    assert max(diffs, default=0) < 16
+                else:
+                    assert pixmap.samples == expected.samples
+        with pytest.raises(ValueError):
+            page.render_tiles(0)
+
+
+def test_render_to_file():
+    path = os.path.normpath(f'{__file__}/../../tests/resources/mupdf_explored.pdf')
+    with pymupdf.open(path) as doc:
+        page = doc[0]
+        for output, kwargs in (
+                ('png', dict(alpha=True)),
+                ('pgm', dict(colorspace='gray')),
+                ('pam', dict(colorspace='cmyk')),
+                ):
+            path_full = os.path.normpath(f'{__file__}/../../tests/test_render_to_file_full.{output}')
+            path_bands = os.path.normpath(f'{__file__}/../../tests/test_render_to_file_bands.{output}')
+            t = time.time()
+            page.get_pixmap(dpi=100, **kwargs).save(path_full)
+            t_full = time.time() - t
+            t = time.time()
+            page.render_to_file(path_bands, dpi=100, band_height=64, **kwargs)
+            t_bands = time.time() - t
+            print(f'test_render_to_file(): {output=} {t_full=} {t_bands=}')
+            expected = pymupdf.Pixmap(path_full)
+            pixmap = pymupdf.Pixmap(path_bands)
+            assert (pixmap.width, pixmap.height, pixmap.n) == (expected.width, expected.height, expected.n)
+            assert pixmap.samples == expected.samples
+        # Bitmap formats are halftoned like MuPDF does for a full pixmap.
+        for output, colorspace in ('pbm', 'gray'), ('pkm', 'cmyk'):
+            path_full = os.path.normpath(f'{__file__}/../../tests/test_render_to_file_full.{output}')
+            path_bands = os.path.normpath(f'{__file__}/../../tests/test_render_to_file_bands.{output}')
+            pixmap = page.get_pixmap(dpi=100, colorspace=colorspace)
+            getattr(pymupdf.mupdf, f'fz_save_pixmap_as_{output}')(pixmap.this, path_full)
+            page.render_to_file(path_bands, dpi=100, band_height=37)
+            with open(path_full, 'rb') as f:
+                expected = f.read()
+            with open(path_bands, 'rb') as f:
+                assert f.read() == expected
+        with pytest.raises(ValueError):
+            page.render_to_file(path_bands, 'pbm', colorspace='rgb')
+        with pytest.raises(ValueError):
+            page.render_to_file(path_bands, 'jpg')
+        with pytest.raises(ValueError):
+            page.render_to_file(path_bands, 'pnm', alpha=True)
@@ -118,6 +118,10 @@ def test_pylint():
             '__init__.py',
             '__main__.py',
             '_apply_pages.py',
+            '_displaylist_cache.py',
+            '_merge.py',
+            '_table_analysis.py',
+            '_table_cache.py',
             '_table_headers.py',
             '_table_refine.py',
             '_table_spans.py',
@@ -676,6 +676,40 @@ def test_find_tables_refine_splits_rows_default_unchanged():
         doc.close()
 
 
+def test_find_tables_refine_shares_page_analysis():
+    """find_tables(refine=True) extracts the page's drawings once and makes one
+    whole-page TextPage for refinement besides the one holding the table
+    characters. Table headers still read the (clipped) area above each table.
+
+    *** PyMuPDF extension. ***
+    """
+    doc, page = _make_overmerged_page()
+    try:
+        analysis = pymupdf.table.PageAnalysis(page)
+        assert analysis.words == page.get_text("words")
+        assert analysis.drawings == page.get_drawings()
+
+        calls = {"get_drawings": 0, "get_textpage": 0}
+
+        def counted(name):
+            method = getattr(page, name)
+
+            def wrapper(*args, **kwargs):
+                if kwargs.get("clip") is None:
+                    calls[name] += 1
+                return method(*args, **kwargs)
+
+            return wrapper
+
+        page.get_drawings = counted("get_drawings")
+        page.get_textpage = counted("get_textpage")
+        refined = page.find_tables(use_layout=False, refine=True)
+        assert refined.tables[0].row_count == 4
+        assert calls == {"get_drawings": 1, "get_textpage": 2}
+    finally:
+        doc.close()
+
+
 def _make_merged_header_page():
     """A page whose line grid detects a header cell that spans both body columns.
 
@@ -939,3 +973,165 @@ def test_find_tables_union_no_layout_degrades_to_line_candidates():
     finally:
         pymupdf._get_layout = original_get_layout_fn
         doc.close()
+
+
+def test_make_chars_matches_rawdict():
+    """CHARS are built from columnar text extraction; check them against
+    "rawdict" output, which they used to be built from.
+    """
+    doc = pymupdf.open(filename)
+    page = doc[0]
+    pymupdf.table.CHARS.clear()
+    textpage = pymupdf.table.make_chars(page)
+    chars = list(pymupdf.table.CHARS)
+    pymupdf.table.CHARS.clear()
+    expected = []
+    for block in page.get_text("rawdict", textpage=textpage)["blocks"]:
+        for line in block["lines"]:
+            for span in sorted(line["spans"], key=lambda s: s["bbox"][0]):
+                for char in sorted(span["chars"], key=lambda c: c["bbox"][0]):
+                    bbox = pymupdf.Rect(char["bbox"])
+                    bbox_ctm = bbox * page.transformation_matrix
+                    expected.append(
+                        (char["c"], span["font"], tuple(bbox), bbox_ctm.y0, bbox_ctm.y1)
+                    )
+    assert expected
+    assert [
+        (c["text"], c["fontname"], (c["x0"], c["top"], c["x1"], c["bottom"]), c["y0"], c["y1"])
+        for c in chars
+    ] == expected
+    doc.close()
+
+
+def _grid_edges(n, w=10, h=8, drop=None):
+    """Edges of an n x n grid, one edge per cell side. If `drop` is a
+    random.Random, about 20% of the edges are omitted.
+    """
+    edges = []
+    for r in range(n + 1):
+        for c in range(n):
+            if not drop or drop.random() >= 0.2:
+                edges.append({"x0": c * w, "x1": (c + 1) * w, "top": r * h, "bottom": r * h, "orientation": "h"})
+    for c in range(n + 1):
+        for r in range(n):
+            if not drop or drop.random() >= 0.2:
+                edges.append({"x0": c * w, "x1": c * w, "top": r * h, "bottom": (r + 1) * h, "orientation": "v"})
+    return edges
+
+
+def test_grid_intersections_and_cells():
+    """Check the indexed edges_to_intersections() against a plain nested loop,
+    and show how it and intersections_to_cells() scale on dense grids.
+    """
+    import random
+    import time
+    from operator import itemgetter
+    from pymupdf.table import edges_to_intersections, intersections_to_cells
+
+    edges = _grid_edges(20, drop=random.Random(4))
+    expected = {}
+    v_edges = [e for e in edges if e["orientation"] == "v"]
+    h_edges = [e for e in edges if e["orientation"] == "h"]
+    for v in sorted(v_edges, key=itemgetter("x0", "top")):
+        for h in sorted(h_edges, key=itemgetter("top", "x0")):
+            if (
+                v["top"] <= h["top"] + 1
+                and v["bottom"] >= h["top"] - 1
+                and h["x0"] - 1 <= v["x0"] <= h["x1"] + 1
+            ):
+                item = expected.setdefault((v["x0"], h["top"]), {"v": [], "h": []})
+                item["v"].append(v)
+                item["h"].append(h)
+    intersections = edges_to_intersections(edges)
+    assert list(intersections.items()) == list(expected.items())
+
+    for n in (25, 50, 100):
+        edges = _grid_edges(n)
+        t0 = time.time()
+        intersections = edges_to_intersections(edges)
+        t1 = time.time()
+        cells = intersections_to_cells(intersections)
+        t2 = time.time()
+        print(f"{n}x{n} grid, {len(edges)} edges: intersections {t1 - t0:.3f}s, cells {t2 - t1:.3f}s")
+        assert len(intersections) == (n + 1) ** 2
+        assert len(cells) == n * n
+        assert cells[0] == (0, 0, 10, 8)
+
+
+def test_box_index_candidates():
+    """BoxIndex candidates contain every box whose center lies in, or which is
+    contained in, the query rectangle, in ascending order.
+    """
+    import random
+
+    rng = random.Random(4)
+    boxes = []
+    for _ in range(2000):
+        x0 = rng.uniform(-50, 650)
+        y0 = rng.uniform(-50, 850)
+        boxes.append((x0, y0, x0 + rng.uniform(0, 40), y0 + rng.uniform(0, 12)))
+    boxes.append((10, 10, 5, 20))  # inverted
+    boxes.append((float("nan"), 0, 1, 1))
+    boxes.append((0, 0, float("inf"), 1))
+    index = pymupdf.table.BoxIndex(boxes)
+    for _ in range(300):
+        x0 = rng.uniform(-100, 700)
+        y0 = rng.uniform(-100, 900)
+        rect = (x0, y0, x0 + rng.uniform(0, 300), y0 + rng.uniform(0, 100))
+        candidates = index.candidates(*rect)
+        assert candidates == sorted(set(candidates))
+        expected = [
+            i
+            for i, (bx0, by0, bx1, by1) in enumerate(boxes)
+            if rect[0] <= (bx0 + bx1) / 2 <= rect[2] and rect[1] <= (by0 + by1) / 2 <= rect[3]
+            or rect[0] <= bx0 and bx1 <= rect[2] and rect[1] <= by0 and by1 <= rect[3]
+        ]
+        assert set(expected) <= set(candidates)
+    assert index.candidates(-1e300, -1e300, 1e300, 1e300) == list(range(len(boxes)))
+
+
+def test_document_find_tables():
+    """Document.find_tables() results equal Page.find_tables(), with and
+    without worker processes, and are served from the cache while a page's
+    content is unchanged.
+    """
+    import shutil
+
+    path = os.path.abspath(f"{__file__}/../../tests/test_document_find_tables_out.pdf")
+    cache = os.path.abspath(f"{__file__}/../../tests/test_document_find_tables_cache")
+    shutil.rmtree(cache, ignore_errors=True)
+    doc = pymupdf.open()
+    for name in ("chinese-tables.pdf", "small-table.pdf", "strict-yes-no.pdf"):
+        doc.insert_pdf(pymupdf.open(os.path.join(scriptdir, "resources", name)))
+    doc.save(path)
+    doc = pymupdf.open(path)
+
+    results = doc.find_tables(cache=cache)
+    assert len(results) == doc.page_count
+    for page, result in zip(doc, results):
+        tabs = page.find_tables()
+        assert [t["bbox"] for t in result] == [list(t.bbox) for t in tabs]
+        assert [t["extract"] for t in result] == [t.extract() for t in tabs]
+    assert len(os.listdir(cache)) == doc.page_count
+
+    if platform.system() != "Emscripten":
+        assert doc.find_tables(workers=2) == results
+
+    assert doc.find_tables(cache=cache) == results
+    assert len(os.listdir(cache)) == doc.page_count
+    # Changing a page only invalidates that page's entry.
+    doc[0].draw_rect((100, 100, 200, 200))
+    assert doc.find_tables(cache=cache) == doc.find_tables()
+    assert len(os.listdir(cache)) == doc.page_count + 1
+    shutil.rmtree(cache)
+
+    # Arguments are keyed by value; arguments that are not plain data are
+    # not cached.
+    from pymupdf import _table_cache
+
+    digest = _table_cache._arguments_digest
+    assert digest({"clip": pymupdf.Rect(0, 0, 100, 100)}) == digest({"clip": pymupdf.Rect(0, 0, 100, 100)})
+    assert digest({"clip": pymupdf.Rect(0, 0, 100, 100)}) != digest({"clip": pymupdf.Rect(0, 0, 100, 100.000001)})
+    assert digest({"snap_tolerance": 0.1 + 0.2}) != digest({"snap_tolerance": 0.3})
+    assert digest({"paths": doc[0].get_drawings()}) is not None
+    assert digest({"clip": object()}) is None
@@ -11,6 +11,9 @@ import gentle_compare
 
 import os
 import textwrap
+import time
+
+import pytest
 
 # codespell:ignore-begin
 text = """Der Kleine Schwertwal (Pseudorca crassidens), auch bekannt als Unechter oder Schwarzer Schwertwal, ist eine Art der Delfine (Delphinidae) und der einzige rezente Vertreter der Gattung Pseudorca.
@@ -367,3 +370,68 @@ def test_4613():
         print(f'test_4613(): {scale_low=}: {spare_height=} {scale=}')
         assert spare_height == -1
         assert scale == scale_low
+
+
+def test_htmlbox_template():
+    """Insert a prepared HtmlBox repeatedly and compare with plain text."""
+    html = "<b>Hello</b> <i>world</i>, this is a test. " * 4
+    css = "* {font-family: sans-serif;}"
+    box = pymupdf.HtmlBox(html, css=css)
+    rect = pymupdf.Rect(50, 50, 300, 130)
+
+    doc0 = pymupdf.open()
+    t0 = time.time()
+    for i in range(20):
+        page = doc0.new_page()
+        result0 = page.insert_htmlbox(rect, html, css=css)
+    t0 = time.time() - t0
+
+    doc1 = pymupdf.open()
+    t1 = time.time()
+    for i in range(20):
+        page = doc1.new_page()
+        result1 = page.insert_htmlbox(rect, box)
+    t1 = time.time() - t1
+    print(f"test_htmlbox_template(): text: {t0:.3f}s, HtmlBox: {t1:.3f}s")
+
+    assert result1 == result0
+    assert doc1[19].get_text() == doc0[19].get_text()
+    # all pages show the same Form XObject
+    shown = set()
+    for page in doc1:
+        shown.update(x[0] for x in page.get_xobjects() if x[2] != 0)
+    assert len(shown) == 1
+    assert len(doc1.tobytes(garbage=3)) < len(doc0.tobytes(garbage=3)) / 5
+
+    # a box size that does not fit
+    page = doc1.new_page()
+    assert page.insert_htmlbox((0, 0, 20, 20), box, scale_low=1)[0] == -1
+
+    with pytest.raises(ValueError):
+        page.insert_htmlbox(rect, box, css=css)
+
+    # only the most recently used layouts are kept
+    box = pymupdf.HtmlBox(html, css=css, max_layouts=2)
+    for width in (200, 210, 220, 200):
+        page.insert_htmlbox((0, 0, width, 100), box)
+    assert [key[0] for key in box._layouts] == [220, 200]
+
+
+def test_textbox_long_words():
+    """Splitting long lines and words takes time linear in their length."""
+    doc = pymupdf.open()
+    page = doc.new_page()
+    rect = pymupdf.Rect(50, 50, 300, 10000)
+    font = pymupdf.Font("helv")
+    words = ["x" * 3000] + [f"word{i}" for i in range(5000)]
+    tw = pymupdf.TextWriter(page.rect)
+    t0 = time.time()
+    rest = tw.fill_textbox(rect, " ".join(words), font=font, fontsize=8, warn=None)
+    t = time.time() - t0
+    print(f"fill_textbox: {t=}")
+    tw.write_text(page)
+    # All text is output, in order, and every line fits into the rectangle.
+    lines = [line for line, _ in rest]
+    extracted = page.get_text("words", clip=pymupdf.INFINITE_RECT())
+    assert "".join(w[4] for w in extracted) + "".join(lines).replace(" ", "") == "".join(words)
+    assert all(w[2] <= rect.x1 + 1 for w in extracted)
@@ -342,6 +342,228 @@ def test_4524():
     assert texts_mp == texts_single
 
 
+def _page_text_length(page):
+    return len(page.get_text())
+
+
+def test_iter_pages():
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_iter_pages(): not running on Pyodide - multiprocessing not available.')
+        return
+    path = os.path.abspath(f'{__file__}/../../tests/resources/mupdf_explored.pdf')
+    pages = [1, 3, 5, 7, 9]
+    expected = pymupdf.apply_pages(path, _page_text_length, pages=pages)
+    methods = ['single', 'mp']
+    if platform.system() != 'Windows':
+        methods.append('fork')
+    for method in methods:
+        results = dict()
+        for pno, length in pymupdf.iter_pages(
+                path,
+                _page_text_length,
+                pages=pages,
+                method=method,
+                concurrency=2,
+                depth=2,
+                ):
+            assert pno not in results
+            results[pno] = length
+        print(f'{method=}: {results=}')
+        assert [results[pno] for pno in pages] == expected
+    
+    # Closing the generator early must not hang.
+    it = pymupdf.iter_pages(path, _page_text_length, method='mp', concurrency=2)
+    pno, length = next(it)
+    it.close()
+
+
+def test_apply_pages_batches():
+    # Many cheap pages, which are sent to workers in batches.
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_apply_pages_batches(): not running on Pyodide - multiprocessing not available.')
+        return
+    path = os.path.normpath(f'{__file__}/../../tests/test_apply_pages_batches.pdf')
+    with pymupdf.open() as document:
+        for i in range(500):
+            page = document.new_page()
+            page.insert_text((50, 50), f'page {i}')
+        document.save(path)
+    pages = list(range(0, 500, 3))
+    expected = pymupdf.get_text(path, pages=pages)
+    assert expected[-1].strip() == 'page 498'
+    methods = ['mp']
+    if platform.system() != 'Windows':
+        methods.append('fork')
+    for method in methods:
+        texts = pymupdf.get_text(path, pages=pages, method=method, concurrency=3)
+        assert texts == expected
+        texts = [text for pno, text in pymupdf.iter_pages(
+                path,
+                pymupdf.Page.get_text,
+                pages=pages,
+                method=method,
+                concurrency=3,
+                depth=7,
+                )]
+        assert sorted(texts) == sorted(expected)
+
+
+def test_page_pool():
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_page_pool(): not running on Pyodide - multiprocessing not available.')
+        return
+    path1 = os.path.abspath(f'{__file__}/../../tests/resources/mupdf_explored.pdf')
+    path2 = os.path.abspath(f'{__file__}/../../tests/resources/symbol-list.pdf')
+    texts1 = pymupdf.get_text(path1, pages=[1, 3, 5])
+    texts2 = pymupdf.get_text(path2)
+    with pymupdf.PagePool(2, max_documents=1) as pool:
+        for i in range(2):
+            assert pool.get_text(path1, pages=[1, 3, 5]) == texts1
+            print(f'{pool.stats=}')
+            assert pool.stats.num_pages == 3
+            assert pool.get_text(path2) == texts2
+        results = dict(pool.iter_pages(path1, _page_text_length, pages=[1, 3, 5], depth=2))
+        assert [results[pno] for pno in (1, 3, 5)] == [len(text) for text in texts1]
+        
+        # Errors do not break the pool.
+        try:
+            pool.get_text(f'{path1}-does-not-exist')
+        except Exception as e:
+            print(f'Received expected exception: {e}')
+        else:
+            assert 0, 'Expected exception.'
+        assert pool.get_text(path2) == texts2
+
+
+def _page_text_or_raise(page):
+    if page.number == 4:
+        raise ValueError('page 4')
+    return page.get_text().strip()
+
+
+def _page_number_or_unpicklable(page):
+    if page.number >= 2:
+        return lambda: page.number
+    return page.number
+
+
+def test_apply_documents_unit_error():
+    # Failure of a later unit as a whole, here when pickling its result, is
+    # reported for each of its pages.
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_apply_documents_unit_error(): not running on Pyodide - multiprocessing not available.')
+        return
+    path = os.path.normpath(f'{__file__}/../../tests/test_apply_documents_unit_error.pdf')
+    with pymupdf.open() as document:
+        for i in range(5):
+            document.new_page()
+        document.save(path)
+    with pymupdf.PagePool(2) as pool:
+        results = dict()
+        for path_, pno, result in pool.apply_documents(
+                [path], _page_number_or_unpicklable, unit_pages=2
+                ):
+            assert path_ == path
+            assert pno not in results
+            results[pno] = result
+        assert sorted(results) == [0, 1, 2, 3, 4]
+        assert results[0] == 0 and results[1] == 1
+        assert all(isinstance(results[pno], Exception) for pno in (2, 3, 4))
+        assert pool.stats.num_documents == 1
+        assert pool.stats.num_pages == 5
+        assert pool.stats.num_errors == 3
+
+
+def _page_number_or_unpicklable_first(page):
+    if page.number == 0:
+        return lambda: page.number
+    return page.number
+
+
+def test_apply_documents_first_unit_error():
+    # Failure of a document's first unit as a whole is reported for each of
+    # its pages, and the rest of the document is still processed.
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_apply_documents_first_unit_error(): not running on Pyodide - multiprocessing not available.')
+        return
+    path = os.path.normpath(f'{__file__}/../../tests/test_apply_documents_first_unit_error.pdf')
+    with pymupdf.open() as document:
+        for i in range(5):
+            document.new_page()
+        document.save(path)
+    with pymupdf.PagePool(2) as pool:
+        results = dict()
+        for path_, pno, result in pool.apply_documents(
+                [path], _page_number_or_unpicklable_first, unit_pages=2
+                ):
+            assert path_ == path
+            assert pno not in results
+            results[pno] = result
+        assert sorted(results) == [0, 1, 2, 3, 4]
+        assert all(isinstance(results[pno], Exception) for pno in (0, 1))
+        assert [results[pno] for pno in (2, 3, 4)] == [2, 3, 4]
+        assert pool.stats.num_documents == 1
+        assert pool.stats.num_pages == 5
+        assert pool.stats.num_errors == 2
+
+
+def test_apply_documents():
+    if os.environ.get('PYODIDE_ROOT'):
+        print('test_apply_documents(): not running on Pyodide - multiprocessing not available.')
+        return
+    paths = list()
+    for n in (1, 40, 3, 7):
+        path = os.path.normpath(f'{__file__}/../../tests/test_apply_documents_{n}.pdf')
+        with pymupdf.open() as document:
+            for i in range(n):
+                document.new_page().insert_text((50, 50), f'{n=} {i=}')
+            document.save(path)
+        paths.append(path)
+    path_encrypted = os.path.normpath(f'{__file__}/../../tests/test_apply_documents_encrypted.pdf')
+    with pymupdf.open() as document:
+        document.new_page().insert_text((50, 50), 'secret')
+        document.save(
+                path_encrypted,
+                encryption=pymupdf.PDF_ENCRYPT_AES_256,
+                user_pw='user',
+                owner_pw='owner',
+                )
+    path_missing = os.path.normpath(f'{__file__}/../../tests/test_apply_documents_missing.pdf')
+    
+    with pymupdf.PagePool(3) as pool:
+        results = dict()
+        for path, pno, result in pool.apply_documents(
+                paths + [path_encrypted, path_missing],
+                _page_text_or_raise,
+                passwords={path_encrypted: 'user'},
+                ):
+            assert (path, pno) not in results
+            results[path, pno] = result
+        print(f'{pool.stats=}')
+        for path, n in zip(paths, (1, 40, 3, 7)):
+            for i in range(n):
+                result = results.pop((path, i))
+                if i == 4:
+                    assert isinstance(result, ValueError)
+                else:
+                    assert result == f'{n=} {i=}'
+        assert results.pop((path_encrypted, 0)) == 'secret'
+        assert isinstance(results.pop((path_missing, None)), Exception)
+        assert not results
+        assert pool.stats.num_documents == 6
+        assert pool.stats.num_pages == 52
+        assert pool.stats.num_errors == 3
+        
+        # Wrong password.
+        results = list(pool.apply_documents([path_encrypted], _page_text_or_raise))
+        assert len(results) == 1
+        assert results[0][:2] == (path_encrypted, None)
+        assert isinstance(results[0][2], Exception)
+    
+    results = list(pymupdf.apply_documents(paths[:2], _page_text_or_raise, concurrency=2))
+    assert len(results) == 41
+
+
 def test_3594():
     verbose = 0
     print()
@@ -948,3 +1170,76 @@ def test_4503():
     
     assert strikeout, f'Expected bit 0 (FZ_STEXT_STRIKEOUT) to be set in {span_0["char_flags"]=:#x}.'
     assert text_0 == 'the right to request the state to review and, if appropriate,'
+
+
+def test_extract_columns():
+    path = os.path.normpath(f'{__file__}/../../tests/resources/2.pdf')
+    with pymupdf.open(path) as document:
+        textpage = document[0].get_textpage()
+        
+        words = textpage.extractWORDS()
+        columns = textpage.extract_columns('word')
+        assert len(columns['x0']) == len(words)
+        for i, word in enumerate(words):
+            item = (
+                    columns['x0'][i],
+                    columns['y0'][i],
+                    columns['x1'][i],
+                    columns['y1'][i],
+                    columns['text'][i],
+                    columns['block'][i],
+                    columns['line'][i],
+                    columns['word'][i],
+                    )
+            assert item[4:] == word[4:]
+            assert pymupdf.Rect(item[:4]) == pymupdf.Rect(word[:4])
+        
+        chars = textpage.extract_columns('char')
+        spans = textpage.extract_columns('span')
+        i = 0
+        j = 0
+        for block in textpage.extractRAWDICT()['blocks']:
+            if block['type'] != 0:
+                continue
+            for line_n, line in enumerate(block['lines']):
+                for span_n, span in enumerate(line['spans']):
+                    assert spans['fonts'][spans['font'][j]] == span['font']
+                    assert (spans['block'][j], spans['line'][j], spans['span'][j]) == (block['number'], line_n, span_n)
+                    assert spans['text'][j] == ''.join(c['c'] for c in span['chars'])
+                    j += 1
+                    for char in span['chars']:
+                        assert chr(chars['c'][i]) == char['c']
+                        assert chars['fonts'][chars['font'][i]] == span['font']
+                        assert (chars['block'][i], chars['line'][i], chars['span'][i]) == (block['number'], line_n, span_n)
+                        assert abs(chars['x1'][i] - char['bbox'][2]) < 1e-3
+                        i += 1
+        assert i == len(chars['c']) and i > 0
+        assert j == len(spans['text'])
+        
+        try:
+            textpage.extract_columns('line')
+        except ValueError:
+            pass
+        else:
+            assert 0, 'Expected ValueError for unknown level.'
+
+
+def test_textpage_blocks():
+    path = os.path.normpath(f'{__file__}/../../tests/resources/2.pdf')
+    with pymupdf.open(path) as document:
+        page = document[0]
+        for flags in (
+                pymupdf.TEXTFLAGS_DICT,
+                pymupdf.TEXTFLAGS_RAWDICT | pymupdf.TEXT_COLLECT_STRUCTURE | pymupdf.TEXT_COLLECT_VECTORS,
+                ):
+            textpage = page.get_textpage(flags=flags)
+            assert textpage.blocks() == textpage.extractDICT()['blocks']
+            assert textpage.blocks(raw=True) == textpage.extractRAWDICT()['blocks']
+        
+        # Spans have both "text" and "chars".
+        textpage = page.get_textpage()
+        block = textpage.blocks()[0]
+        span = block['lines'][0]['spans'][0]
+        assert 'chars' not in span
+        assert span['text'] == ''.join(char['c'] for char in span['chars'])
+        assert list(block['lines'][0]) == ['spans', 'wmode', 'dir', 'bbox']